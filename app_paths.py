@@ -0,0 +1,11 @@
+import os
+import sys
+
+
+def resource_path(relative):
+    """Path of a bundled resource, in the PyInstaller bundle or the source tree."""
+    try:
+        base = sys._MEIPASS
+    except Exception:
+        base = os.path.abspath(".")
+    return os.path.join(base, relative)
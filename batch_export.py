@@ -0,0 +1,152 @@
+"""
+Batch PDF exports: one account statement per client, or one bon de vente
+per unpaid vente, written into a folder or a single .zip.
+
+The documents are read from the database first, as plain data (the same
+export_data tables and get_bon_de_vente() tuples the single exports use),
+then rendered by ReportLab in a pool of processes: rendering is CPU bound
+and does not scale with threads. The workers run nothing from Qt, but the
+spawn start method re-imports the starting script in each of them: started
+from clientflow.py they stay Qt-free, started from the GUI (mainv2 or the
+packaged exe) each one also loads PySide6 before its first document.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+
+import pdf_reports
+from database import get_client_balances, get_client_ventes, get_unpaid_ventes, get_bon_de_vente
+from export_data import statement_table
+
+# What to export
+STATEMENTS_UNPAID = "statements_unpaid"  # clients with reste > 0
+STATEMENTS_ALL = "statements_all"
+UNPAID_SALES = "unpaid_sales"            # bons de vente with reste > 0
+
+# Document kinds rendered by the workers
+_TABLE = "table"
+_SALE = "sale"
+
+
+def _safe(text):
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in (text or "").strip()) or "sans_nom"
+
+
+#------Plain data snapshots------
+def statement_documents(only_unpaid=True):
+    """(kind, file name, args) of the client account statements."""
+    documents = []
+    for balance in get_client_balances():
+        if only_unpaid and balance[6] <= 0.0005:
+            continue
+        documents.append((_TABLE, statement_file_name(balance), statement_args(balance)))
+    return documents
+
+
+def statement_args(balance):
+    """(table, title, client_info) of the statement of a get_client_balance() row."""
+    cid, nom, tel, adr, eml, credit, reste = balance
+    title = f"Relevé de compte - {nom}"
+    client_info = f"Client: {nom} | Montant Total: {credit:.3f} DT | Reste à payer: {reste:.3f} DT"
+    return statement_table(get_client_ventes(cid)), title, client_info
+
+
+def statement_file_name(balance):
+    return f"releve_{_safe(balance[1])}_{balance[0]}.pdf"
+
+
+def unpaid_sale_documents():
+    """(kind, file name, args) of the bons de vente not fully paid."""
+    documents = []
+    for vente_id in get_unpaid_ventes():
+        sale = get_bon_de_vente(vente_id)
+        if sale is None:
+            continue
+        vente, items = sale
+        name = f"bon_de_vente_{_safe(vente[4])}_{_safe(vente[1])}_{vente_id}.pdf"
+        documents.append((_SALE, name, (vente, items)))
+    return documents
+
+
+def collect_documents(what):
+    if what == STATEMENTS_UNPAID:
+        return statement_documents(only_unpaid=True)
+    if what == STATEMENTS_ALL:
+        return statement_documents(only_unpaid=False)
+    if what == UNPAID_SALES:
+        return unpaid_sale_documents()
+    raise ValueError(f"Unknown batch export: {what}")
+
+
+#------Rendering------
+def _render(task):
+    # Runs in a worker process: one document, written to path
+    kind, path, args = task
+    if kind == _TABLE:
+        pdf_reports.generate_table_report(path, *args)
+    else:
+        pdf_reports.generate_sale_pdf(path, *args)
+    return path
+
+
+def render_documents(documents, destination, processes=None, progress=None):
+    """
+    Render documents into destination: a folder, or a .zip archive.
+    processes: worker processes (default: one per core); 1 renders in the
+    calling process. progress(done, total, text) may raise
+    pdf_reports.ExportCancelled, the pool is then stopped.
+    Returns the number of documents written.
+    """
+    total = len(documents)
+    to_zip = destination.lower().endswith(".zip")
+    folder = tempfile.mkdtemp(prefix="clientflow_batch_") if to_zip else destination
+    os.makedirs(folder, exist_ok=True)
+    tasks = [(kind, os.path.join(folder, name), args) for kind, name, args in documents]
+    processes = max(1, min(processes or os.cpu_count() or 1, total or 1))
+
+    archive = zipfile.ZipFile(destination, "w", zipfile.ZIP_STORED) if to_zip else None
+    try:
+        if progress is not None:
+            progress(0, total, f"0/{total} documents")
+        if processes == 1:
+            results = map(_render, tasks)
+            pool = None
+        else:
+            # spawn: same behaviour on Windows (the packaged app) and Linux
+            pool = multiprocessing.get_context("spawn").Pool(processes)
+            results = pool.imap_unordered(_render, tasks)
+        try:
+            for done, path in enumerate(results, 1):
+                if archive is not None:
+                    # PDF streams are already compressed: store them as is
+                    archive.write(path, os.path.basename(path))
+                    os.remove(path)
+                if progress is not None:
+                    progress(done, total, f"{done}/{total} documents")
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+    finally:
+        if archive is not None:
+            archive.close()
+            shutil.rmtree(folder, ignore_errors=True)
+    return total
+
+
+def export_batch(destination, what, processes=None, progress=None):
+    """Read the documents of a batch (see collect_documents) and render them."""
+    if progress is not None:
+        progress(0, 0, "Lecture des données...")
+    documents = collect_documents(what)
+    if not documents:
+        raise ValueError("Aucun document à exporter.")
+    return render_documents(documents, destination, processes, progress)
+
+
+def default_archive_name(what):
+    prefix = "bons_de_vente_impayes" if what == UNPAID_SALES else "releves_clients"
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
@@ -0,0 +1,85 @@
+"""
+Batch export scaling: renders the same set of synthetic statements (or
+bons de vente) with 1, 2, 4... worker processes and prints the speedup.
+
+    python benchmarks/bench_batch_export.py --documents 64 --rows 150
+    python benchmarks/bench_batch_export.py --kind sales --processes 1,2,4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# database (imported by batch_export) needs a data folder, even unused here
+os.environ.setdefault("APPDATA", tempfile.gettempdir())
+
+import batch_export  # noqa: E402
+from export_data import statement_table  # noqa: E402
+
+
+def statement_documents(count, rows):
+    documents = []
+    for n in range(count):
+        ventes = [
+            (i, f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}", f"V{n:04d}{i:05d}", "", 100.0 + i, 40.0 + i / 3)
+            for i in range(rows)
+        ]
+        table = statement_table(ventes)
+        reste = sum(row[4] for row in table.rows) or Decimal(0)
+        info = f"Client: Client {n} | Montant Total: {sum(row[2] for row in table.rows):.3f} DT | Reste à payer: {reste:.3f} DT"
+        documents.append((batch_export._TABLE, f"releve_{n}.pdf", (table, f"Relevé de compte - Client {n}", info)))
+    return documents
+
+
+def sale_documents(count, rows):
+    documents = []
+    for n in range(count):
+        items = [(f"Article {i}", 1 + i % 5, 2.5, 2.5 * (1 + i % 5)) for i in range(rows)]
+        total = sum(item[3] for item in items)
+        vente = ("2026-10-01", f"V{n:06d}", total, total / 2, f"Client {n}", "20 400 041", "Nabeul")
+        documents.append((batch_export._SALE, f"bon_de_vente_{n}.pdf", (vente, items)))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=48)
+    parser.add_argument("--rows", type=int, default=150, help="ventes per statement / items per bon de vente")
+    parser.add_argument("--kind", choices=("statements", "sales"), default="statements")
+    parser.add_argument("--processes", default=None, help="comma separated, default: 1,2,4... up to the cores")
+    parser.add_argument("--zip", action="store_true", help="write a .zip instead of a folder")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    if args.processes:
+        counts = [int(p) for p in args.processes.split(",")]
+    else:
+        counts, p = [], 1
+        while p < cores:
+            counts.append(p)
+            p *= 2
+        counts.append(cores)
+
+    build = statement_documents if args.kind == "statements" else sale_documents
+    documents = build(args.documents, args.rows)
+    print(f"{args.documents} {args.kind} x {args.rows} rows, {cores} cores")
+    print(f"{'processes':>9} {'seconds':>8} {'docs/s':>7} {'speedup':>7}")
+
+    baseline = None
+    for processes in counts:
+        out = tempfile.mkdtemp(prefix="bench_batch_")
+        destination = os.path.join(out, "batch.zip") if args.zip else out
+        start = time.perf_counter()
+        batch_export.render_documents(documents, destination, processes=processes)
+        elapsed = time.perf_counter() - start
+        shutil.rmtree(out, ignore_errors=True)
+        baseline = baseline or elapsed
+        print(f"{processes:>9} {elapsed:>8.2f} {len(documents) / elapsed:>7.1f} {baseline / elapsed:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
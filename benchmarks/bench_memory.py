@@ -0,0 +1,151 @@
+"""
+Memory of ClientDetail's caches: the previous representation (an item dict
+per vente item, a {product_id: quantity} dict per table row) against the
+current one (data_controllers.VenteItemStore and SalesTableModel's
+SalesCube).
+
+    python benchmarks/bench_memory.py --items 100000
+    python benchmarks/bench_memory.py --items 300000 --per-vente 5 --products 48
+
+For each representation: the memory it keeps (tracemalloc, input rows
+freed), the build time and the time of a full gc.collect() while it is
+alive. The same seeded VenteItem rows feed both.
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Only the row types are used: no database is opened, but importing
+# database needs a path (and APPDATA otherwise)
+os.environ.setdefault("CLIENTFLOW_DB", os.path.join(tempfile.gettempdir(), "clientflow_bench_memory.db"))
+
+from data_controllers import VenteItemStore  # noqa: E402
+from database import Vente, VenteItem  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+
+def make_rows(items, per_vente, products, seed):
+    """(ventes, items): Vente and VenteItem rows as the database returns them."""
+    rng = random.Random(seed)
+    ventes, rows = [], []
+    vente_id = 0
+    while len(rows) < items:
+        vente_id += 1
+        count = min(rng.randint(1, 2 * per_vente - 1), items - len(rows))
+        total = 0.0
+        for _ in range(count):
+            pid = rng.randint(1, products)
+            qty = float(rng.randint(1, 20))
+            price = round(rng.uniform(0.5, 120), 3)
+            total += qty * price
+            # A new str per row, like sqlite3 returns them
+            rows.append(VenteItem(len(rows) + 1, vente_id, pid, f"Produit {pid:03d}", qty, price,
+                                  round(qty * price, 3)))
+        ventes.append(Vente(vente_id, f"2024-01-{vente_id % 28 + 1:02d}", f"V{vente_id:07d}", None,
+                            round(total, 3), 0.0))
+    return ventes, rows
+
+
+#------Previous representation------
+def legacy_build(ventes, rows, product_ids):
+    items_map = {}
+    for iid, vente_id, product_id, description, quantity, unit_price, total_price in rows:
+        items_map.setdefault(vente_id, []).append({
+            'id': iid,
+            'product_id': product_id,
+            'description': description,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_price': total_price
+        })
+    # SalesTableModel.set_ventes()
+    search_index = SearchIndex()
+    search_index.set_texts((v.reference or "") + "\n" + (v.description or "") for v in ventes)
+    quantities, total_qtys = [], []
+    for vente in ventes:
+        product_qty_map = {}
+        total_qty = 0.0
+        for item in items_map.get(vente.id, []):
+            qty = float(item.get('quantity') or 0)
+            product_qty_map[item.get('product_id')] = qty
+            total_qty += qty
+        quantities.append(product_qty_map)
+        total_qtys.append(total_qty)
+    return items_map, search_index, quantities, total_qtys
+
+
+#------Current representation------
+def compact_build(ventes, rows, products):
+    store = VenteItemStore(rows)
+    try:
+        from table_models import SalesTableModel
+    except ImportError:  # PySide6 missing: the store only
+        return store, None
+    model = SalesTableModel(products)
+    model.set_ventes(ventes, store)
+    return store, model
+
+
+def measure(build, args):
+    """(kept bytes, build seconds, gc seconds)."""
+    build(*make_rows(10, 1, args.products, args.seed))  # first imports
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    ventes, rows = make_rows(args.items, args.per_vente, args.products, args.seed)
+    kept = build(ventes, rows)
+    # What stays once the query rows are gone: the ventes, the structure and
+    # whatever it keeps of the rows
+    del rows
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept, ventes
+
+    ventes, rows = make_rows(args.items, args.per_vente, args.products, args.seed)
+    gc.collect()
+    start = time.perf_counter()
+    kept = build(ventes, rows)
+    elapsed = time.perf_counter() - start
+    del rows
+    start = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - start
+    del kept
+    return size, elapsed, collect
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--per-vente", type=int, default=3, help="average items per vente")
+    parser.add_argument("--products", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    products = [(pid, f"Produit {pid:03d}", 1.0, 1) for pid in range(1, args.products + 1)]
+    product_ids = [prod[0] for prod in products]
+    if "QT_QPA_PLATFORM" not in os.environ:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+    print(f"{args.items} items, ~{args.per_vente} per vente, {args.products} products")
+    results = {}
+    for name, build in (("dicts (before)", lambda v, r: legacy_build(v, r, product_ids)),
+                        ("columns (now)", lambda v, r: compact_build(v, r, products))):
+        size, elapsed, collect = results[name] = measure(build, args)
+        print(f"  {name:<16} {size / 1e6:8.1f} MB  build {elapsed * 1000:7.1f} ms  "
+              f"gc.collect {collect * 1000:6.1f} ms", flush=True)
+    before, now = results.values()
+    print(f"  memory x{now[0] / before[0]:.2f}, build x{now[1] / before[1]:.2f}, gc x{now[2] / before[2]:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+SalesCube's two backends (NumPy, array.array fallback) on the same seeded
+vente items: each is checked against a plain dict computation, then timed.
+
+    python benchmarks/bench_sales_cube.py --items 100000
+    python benchmarks/bench_sales_cube.py --items 300000 --products 48
+
+The check covers what SalesTableModel reads (values, row totals, column
+totals of all rows and of a filtered subset), after the build and after
+the same row changes (set_row, insert_row, remove_row). The last product is
+left out of the columns, like a deleted product. A backend that disagrees
+with the reference makes the exit status 1; without NumPy only the
+fallback runs.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_memory import make_rows  # noqa: E402
+import sales_cube  # noqa: E402
+from data_controllers import VenteItemStore  # noqa: E402
+
+TOLERANCE = 1e-6
+
+
+#------Reference------
+def reference_rows(ventes, rows):
+    """{product_id: quantity} per vente, in the order of ventes."""
+    quantities = {vente.id: {} for vente in ventes}
+    for item in rows:
+        line = quantities[item.vente_id]
+        line[item.product_id] = line.get(item.product_id, 0.0) + item.quantity
+    return [quantities[vente.id] for vente in ventes]
+
+
+def reference_snapshot(lines, column_ids, subset):
+    values = [[line.get(cid, 0.0) for cid in column_ids] for line in lines]
+    return {
+        "values": values,
+        "row_totals": [sum(line.values()) for line in lines],
+        "column_totals": [sum(column) for column in zip(*values)] if values else [0.0] * len(column_ids),
+        "subset_totals": [sum(values[row][col] for row in subset) for col in range(len(column_ids))],
+    }
+
+
+def snapshot(cube, subset):
+    """Everything SalesTableModel reads from a cube, as lists."""
+    return {
+        "values": [cube.row_values(row) for row in range(len(cube))],
+        "row_totals": cube.row_totals(),
+        "column_totals": cube.column_totals(),
+        "subset_totals": cube.column_totals(subset),
+    }
+
+
+def differences(got, expected):
+    """Names of the snapshot parts that differ beyond TOLERANCE."""
+    def same(a, b):
+        if isinstance(a, list):
+            return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+        return abs(a - b) <= TOLERANCE * max(1.0, abs(b))
+    return [name for name in expected if not same(got[name], expected[name])]
+
+
+def changes(count, positions, product_ids, seed):
+    """The same (kind, position, pairs) row changes for every backend."""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        kind = rng.choice(("set", "insert", "remove"))
+        position = rng.randrange(positions + (kind == "insert")) if positions else 0
+        if kind == "remove" and not positions:
+            kind = "insert"
+        pairs = [(rng.choice(product_ids), float(rng.randint(1, 20))) for _ in range(rng.randint(1, 6))]
+        result.append((kind, position, pairs))
+        positions += {"set": 0, "insert": 1, "remove": -1}[kind]
+    return result
+
+
+def apply_changes(cube, lines, steps):
+    for kind, position, pairs in steps:
+        line = {}
+        for pid, qty in pairs:
+            line[pid] = line.get(pid, 0.0) + qty
+        if kind == "set":
+            cube.set_row(position, pairs)
+            lines[position] = line
+        elif kind == "insert":
+            cube.insert_row(position, pairs)
+            lines.insert(position, line)
+        else:
+            cube.remove_row(position)
+            del lines[position]
+
+
+#------Backends------
+def check_backend(name, ventes, rows, store, column_ids, product_ids, args):
+    """Check then time one backend; returns False when it disagrees with the reference."""
+    row_ids = [vente.id for vente in ventes]
+
+    def build():
+        return sales_cube.SalesCube(row_ids, column_ids, *store.quantity_columns())
+
+    cube = build()
+    lines = reference_rows(ventes, rows)
+    rng = random.Random(args.seed)
+    subset = sorted(rng.sample(range(len(cube)), len(cube) // 3))
+    failed = differences(snapshot(cube, subset), reference_snapshot(lines, column_ids, subset))
+
+    apply_changes(cube, lines, changes(args.changes, len(cube), product_ids, args.seed))
+    subset = [row for row in subset if row < len(cube)]
+    failed += [f"{part} after changes" for part in
+               differences(snapshot(cube, subset), reference_snapshot(lines, column_ids, subset))]
+
+    timings = {}
+    for label, call in (("build", build), ("row_totals", cube.row_totals),
+                        ("column_totals", cube.column_totals),
+                        ("subset column_totals", lambda: cube.column_totals(subset))):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+        timings[label] = statistics.median(times)
+
+    status = "OK" if not failed else "MISMATCH: " + ", ".join(failed)
+    print(f"  {name:<7} {status}")
+    print("          " + "  ".join(f"{label} {seconds * 1000:.1f} ms" for label, seconds in timings.items()),
+          flush=True)
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--per-vente", type=int, default=3, help="average items per vente")
+    parser.add_argument("--products", type=int, default=24)
+    parser.add_argument("--changes", type=int, default=200, help="row changes applied before the second check")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ventes, rows = make_rows(args.items, args.per_vente, args.products, args.seed)
+    store = VenteItemStore(rows)
+    product_ids = list(range(1, args.products + 1))
+    column_ids = product_ids[:-1]
+    print(f"{len(ventes)} ventes, {args.items} items, {args.products} products (one not a column)")
+
+    numpy = sales_cube.numpy
+    backends = [("array", None)] + ([("numpy", numpy)] if numpy is not None else [])
+    ok = True
+    try:
+        for name, module in backends:
+            sales_cube.numpy = module
+            ok = check_backend(name, ventes, rows, store, column_ids, product_ids, args) and ok
+    finally:
+        sales_cube.numpy = numpy
+    if numpy is None:
+        print("  numpy   not installed: not checked")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Startup time of mainv2: import time, Home construction, first paint and
+the moment the clients table is filled, each run in a fresh process.
+
+    python benchmarks/bench_startup.py --runs 5 --clients 2000
+    python benchmarks/bench_startup.py --db path/to/app.db --max-paint-ms 800
+
+--max-import-ms / --max-paint-ms make it fail (exit 1) when the median goes
+over budget, and it always fails if ReportLab or requests are imported
+before the first export / update check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import datagen  # noqa: E402
+
+# Must not be loaded by "import mainv2"
+LAZY_MODULES = ("reportlab", "requests", "resources_rc")
+
+
+def child():
+    # One startup, measured from before "import mainv2"; prints a JSON line
+    start = time.perf_counter()
+    import mainv2
+    marks = {"import": time.perf_counter() - start}
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    mainv2.init_db()
+    app = QApplication(sys.argv[:1])
+
+    class PaintWatch(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and "paint" not in marks:
+                marks["paint"] = time.perf_counter() - start
+            return False
+
+    def done():
+        if "paint" in marks and "clients" in marks:
+            app.quit()
+
+    loaded_clients = mainv2.Home.on_clients_loaded
+
+    def on_clients_loaded(self, data):
+        loaded_clients(self, data)
+        marks["clients"] = time.perf_counter() - start
+        marks["rows"] = self.model.rowCount()
+        QTimer.singleShot(0, done)
+
+    mainv2.Home.on_clients_loaded = on_clients_loaded
+    watch = PaintWatch()
+    app.installEventFilter(watch)
+
+    win = mainv2.Home()
+    marks["window"] = time.perf_counter() - start
+    win.show()
+    QTimer.singleShot(0, done)
+    QTimer.singleShot(60000, app.quit)
+    app.exec()
+
+    marks["lazy_loaded"] = loaded
+    print(json.dumps(marks), flush=True)
+    os._exit(0)  # skip Qt teardown, not part of the startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db", help="existing database (default: a generated one)")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--ventes", type=int, default=10, help="ventes per client")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-paint-ms", type=float)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    db = args.db
+    if db is None:
+        db = os.path.join(workdir, "app.db")
+        ventes = args.clients * args.ventes
+        datagen.generate(db, args.clients, ventes, ventes, ventes // 3)
+    env = dict(os.environ, CLIENTFLOW_DB=os.path.abspath(db), APPDATA=os.environ.get("APPDATA", workdir))
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    results = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"],
+                             env=env, capture_output=True, text=True, timeout=120)
+        line = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if not line:
+            print(out.stderr, file=sys.stderr)
+            return 1
+        results.append(json.loads(line[-1]))
+
+    def median_ms(key):
+        return statistics.median(r[key] for r in results) * 1000
+
+    print(f"{db}: {results[0]['rows']} clients, {args.runs} runs (median)")
+    for key, label in (("import", "import mainv2"), ("window", "Home built"),
+                       ("paint", "first paint"), ("clients", "clients loaded")):
+        print(f"  {label:<15} {median_ms(key):8.0f} ms")
+
+    failed = False
+    lazy = sorted({name for r in results for name in r["lazy_loaded"]})
+    if lazy:
+        print(f"FAIL: imported at startup: {', '.join(lazy)}")
+        failed = True
+    if args.max_import_ms and median_ms("import") > args.max_import_ms:
+        print(f"FAIL: import over budget ({args.max_import_ms:.0f} ms)")
+        failed = True
+    if args.max_paint_ms and median_ms("paint") > args.max_paint_ms:
+        print(f"FAIL: first paint over budget ({args.max_paint_ms:.0f} ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Timed scenarios over a generated database (see datagen.py), compared with
+a JSON baseline.
+
+    python benchmarks/bench_suite.py --scale small --save-baseline base.json
+    python benchmarks/bench_suite.py --scale small --baseline base.json
+
+Scenarios follow the application's code paths: the Home load and model,
+ClientDetail's load of the largest client, the category quantities,
+HistDialog's reads, the aged receivables, the client list PDF and the bon
+de vente of the vente with the most items. Write scenarios then run on a
+copy of the database: a sale recorded on the largest client, paid, updated
+and deleted, and the deletion of the largest client.
+Generated databases are kept in --data-dir and reused for the same
+parameters. With --baseline, a scenario whose median is more than
+--tolerance slower is reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import datagen  # noqa: E402
+
+# Below this difference (seconds) a slowdown is noise, whatever the ratio
+MIN_DELTA = 0.005
+
+
+def database_for(args):
+    counts = list(datagen.SCALES[args.scale])
+    for i, value in enumerate((args.clients, args.ventes, args.items, args.paiements)):
+        if value is not None:
+            counts[i] = value
+    name = "clientflow_bench_{}_{}_{}_{}_s{}.db".format(*counts, args.seed)
+    path = os.path.join(args.data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(args.data_dir, exist_ok=True)
+        print(f"Generating {name}...", flush=True)
+        partial = path + ".tmp"
+        for leftover in (partial, partial + "-wal", partial + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        elapsed = datagen.generate(partial, *counts, seed=args.seed)
+        os.replace(partial, path)
+        print(f"  done in {elapsed:.1f} s", flush=True)
+    return path, dict(zip(("clients", "ventes", "items", "paiements"), counts), seed=args.seed)
+
+
+#------Scenarios------
+def scenarios(workdir):
+    """(name, repeat factor, setup) list; setup() returns the callable to time."""
+    import database
+    import pdf_reports
+    from data_controllers import ClientSalesController, load_home_data
+    from export_data import clients_table
+
+    conn = database.get_connection()
+    busiest_client = conn.execute(
+        "SELECT client_id FROM ventes GROUP BY client_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    largest_vente = conn.execute(
+        "SELECT vente_id FROM vente_items GROUP BY vente_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    most_paid_vente = conn.execute(
+        "SELECT vente_id FROM paiements GROUP BY vente_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+
+    def client_detail():
+        controller = ClientSalesController(busiest_client)
+        controller.set_data(controller.fetch())
+        return controller
+
+    def clients_pdf():
+        table = clients_table(database.get_client_balances(), database.get_categories(),
+                              database.get_client_category_quantities())
+        pdf_reports.generate_table_report(os.path.join(workdir, "clients.pdf"), table, "Liste des Clients")
+
+    def payment_history():
+        # HistDialog: the payments, the vente summary and each payment's edit limit
+        vente_id = most_paid_vente[0] if most_paid_vente else 1
+        database.get_vente_summary(vente_id)
+        for paiement in database.get_paiements(vente_id):
+            database.get_paiement_limit(paiement.id)
+
+    def sale_pdf():
+        vente, items = database.get_bon_de_vente(largest_vente[0] if largest_vente else 1)
+        pdf_reports.generate_sale_pdf(os.path.join(workdir, "vente.pdf"), vente, items)
+
+    found = [
+        ("home_load", 1, lambda: load_home_data),
+        ("client_detail_load", 1, lambda: client_detail),
+        ("category_quantities", 1, lambda: database.get_client_category_quantities),
+        ("search", 1, lambda: lambda: database.search("ben ali", limit=500)),
+        ("payment_history", 1, lambda: payment_history),
+        # Fixed date: the same buckets on every run
+        ("aged_receivables", 1, lambda: lambda: database.get_aged_receivables("2026-01-01")),
+        ("clients_pdf", 0.4, lambda: clients_pdf),
+        ("sale_pdf", 1, lambda: sale_pdf),
+    ]
+
+    try:
+        from table_models import ClientsTableModel, SalesTableModel
+    except ImportError:  # PySide6 missing: data paths only
+        return found
+
+    def home_model():
+        rows, quantities, totals = load_home_data()
+        categories = database.get_categories()
+        return lambda: ClientsTableModel(categories).set_clients(rows, quantities)
+
+    def client_detail_model():
+        controller = client_detail()
+        products = database.get_products()
+        return lambda: SalesTableModel(products).set_ventes(controller.ventes, controller.items)
+
+    found[2:2] = [("home_model", 1, home_model), ("client_detail_model", 1, client_detail_model)]
+    return found
+
+
+def write_scenarios(db, workdir):
+    """
+    (name, repeat factor, setup, reset) list run on a copy of db; reset(),
+    when not None, restores the copy before each (untimed) run.
+    """
+    import database
+    from connection_manager import close_all, configure
+
+    pristine = os.path.join(workdir, "write_pristine.db")
+    copy = os.path.join(workdir, "write.db")
+    source, target = sqlite3.connect(db), sqlite3.connect(pristine)
+    source.backup(target)
+    source.close()
+    target.close()
+
+    def restore():
+        close_all()
+        for leftover in (copy + "-wal", copy + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        shutil.copyfile(pristine, copy)
+        configure(copy)
+
+    restore()
+    conn = database.get_connection()
+    busiest_client = conn.execute(
+        "SELECT client_id FROM ventes GROUP BY client_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    product_ids = [row[0] for row in conn.execute("SELECT id FROM products ORDER BY id")] or [None]
+    items = []
+    for i in range(30):
+        quantity = 1 + i % 5
+        items.append((product_ids[i % len(product_ids)], f"Article {i}", quantity, 2.5, quantity * 2.5))
+
+    def sale_write():
+        # The database is back to its state once the vente is deleted
+        vente_id = database.record_sale(busiest_client, "2026-01-01", "BENCH", items)
+        database.add_paiement(vente_id, "2026-01-02", 10.0, "Espèces")
+        database.update_sale(vente_id, "BENCH-2", 50.0, items[:20])
+        database.delete_vente(vente_id)
+
+    return [
+        ("sale_write", 1, lambda: sale_write, None),
+        ("client_delete", 1, lambda: lambda: database.delete_client(busiest_client), restore),
+    ]
+
+
+def run(repeat, found):
+    results = {}
+    for name, factor, setup, reset in found:
+        call = setup()
+        if reset:
+            reset()
+        call()  # warm-up: page cache, first imports
+        times = []
+        for _ in range(max(1, round(repeat * factor))):
+            if reset:
+                reset()
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+        results[name] = {"median": statistics.median(times), "min": min(times), "runs": len(times)}
+        print(f"  {name:<22} {results[name]['median'] * 1000:10.1f} ms  (min {results[name]['min'] * 1000:.1f}, "
+              f"{len(times)} runs)", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print the changes against baseline; returns the regressed scenario names."""
+    regressions = []
+    print(f"\nAgainst the baseline (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"  {name:<22} new")
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else 1.0
+        slower = result["median"] - before["median"]
+        flag = ""
+        if ratio > 1 + tolerance and slower > MIN_DELTA:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "faster"
+        print(f"  {name:<22} {before['median'] * 1000:10.1f} -> {result['median'] * 1000:10.1f} ms  "
+              f"x{ratio:.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", choices=datagen.SCALES, default="small")
+    parser.add_argument("--clients", type=int)
+    parser.add_argument("--ventes", type=int)
+    parser.add_argument("--items", type=int)
+    parser.add_argument("--paiements", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "clientflow_bench"))
+    parser.add_argument("--output", help="write the results (JSON) to this file")
+    parser.add_argument("--save-baseline", metavar="FILE", help="write the results as the new baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (default 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    for name in ("output", "save_baseline", "baseline", "data_dir"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    # Assets (the report logo) are found from the working directory
+    os.chdir(ROOT)
+
+    db, params = database_for(args)
+    # database reads CLIENTFLOW_DB when first imported
+    os.environ["CLIENTFLOW_DB"] = db
+    import database
+    database.connection_manager.configure(db)
+    # Databases cached by an older version get the current schema (indexes)
+    database.init_db()
+
+    print(f"{os.path.basename(db)}, median of {args.repeat} runs")
+    workdir = tempfile.mkdtemp(prefix="clientflow_bench_out_")
+    report = {
+        "params": params,
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": run(args.repeat, [scenario + (None,) for scenario in scenarios(workdir)]),
+    }
+    # Writes go to a copy: the cached database stays as generated
+    report["results"].update(run(args.repeat, write_scenarios(db, workdir)))
+    database.connection_manager.close_all()
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print(f"\nBaseline made with other parameters ({baseline.get('params')}): not compared")
+            return 1
+        if compare(report["results"], baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Seeded synthetic database for benchmarks: the same parameters and seed
+always give the same rows.
+
+    python benchmarks/datagen.py out.db --scale medium
+    python benchmarks/datagen.py out.db --clients 10000 --ventes 200000 --seed 7
+
+Rows go in with executemany, in batches, inside one transaction; the
+schema is the application's (migrations), so the triggers keep the
+balances, category quantities and search index current exactly as they
+do in the app.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (clients, ventes, vente items, paiements)
+SCALES = {
+    "tiny": (200, 2_000, 6_000, 2_000),
+    "small": (1_000, 10_000, 30_000, 10_000),
+    "medium": (10_000, 100_000, 300_000, 100_000),
+    "large": (100_000, 1_000_000, 1_000_000, 1_000_000),
+}
+
+BATCH = 20_000
+
+_FIRST_NAMES = ("Ahmed", "Fatma", "Mohamed", "Leila", "Karim", "Sonia", "Youssef", "Amira", "Sami", "Ines",
+                "Hichem", "Rania", "Walid", "Nour", "Slim", "Meriem", "Anis", "Olfa", "Bilel", "Hela")
+_LAST_NAMES = ("Ben Ali", "Trabelsi", "Salah", "Mansour", "Jaziri", "Gharbi", "Hammami", "Bouzid", "Chaabane",
+               "Mejri", "Ayari", "Khelifi", "Sassi", "Dridi", "Jlassi", "Ferchichi", "Baccouche", "Zouari")
+_CITIES = ("Tunis", "Sousse", "Sfax", "Monastir", "Bizerte", "Nabeul", "Gabès", "Kairouan", "Ariana", "Mahdia")
+_MODES = ("Espèces", "Chèque", "Virement", "Traite")
+_CATEGORIES = ("TA", "Coude", "Tube", "Raccord")
+_START = date(2020, 1, 1)
+_DAYS = 6 * 365
+
+
+def _per_row(rng, average):
+    """Whole count drawn so that its mean is average."""
+    count = int(average)
+    return count + (rng.random() < average - count)
+
+
+def generate(path, clients, ventes, items, paiements, seed=42, categories=4, products=24):
+    """
+    Create path (must not exist) with the given row counts. Returns the
+    elapsed seconds. Ventes are skewed towards the first clients, so some
+    clients have many ventes (the worst case of ClientDetail).
+    """
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    os.environ["CLIENTFLOW_DB"] = os.path.abspath(path)
+    sys.path.insert(0, ROOT)
+    import connection_manager
+    import migrations
+
+    connection_manager.configure(os.path.abspath(path))
+    migrations.migrate()
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with connection_manager.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO categories(id, name, description) VALUES (?,?,?)",
+            ((n + 1, _CATEGORIES[n % len(_CATEGORIES)] + ("" if n < len(_CATEGORIES) else f" {n}"), "")
+             for n in range(categories))
+        )
+        catalogue = [(n + 1, f"Produit {n + 1:03d}", round(rng.uniform(0.5, 120), 3), 1 + n % categories)
+                     for n in range(products)]
+        conn.executemany("INSERT INTO products(id, name, unit_price, category_id) VALUES (?,?,?,?)", catalogue)
+
+        def client_rows():
+            for n in range(1, clients + 1):
+                nom = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)} {n}"
+                yield (n, nom, f"+216 {rng.randrange(20, 99)} {rng.randrange(100, 999)} {rng.randrange(100, 999)}",
+                       f"{rng.choice(_CITIES)}, Rue {rng.randrange(1, 300)}", f"client{n}@example.tn")
+        conn.executemany("INSERT INTO clients(id, nom, telephone, adresse, email) VALUES (?,?,?,?,?)", client_rows())
+
+        items_per_vente = items / ventes if ventes else 0
+        paiements_per_vente = paiements / ventes if ventes else 0
+        vente_rows, item_rows, paiement_rows = [], [], []
+
+        def flush():
+            conn.executemany(
+                "INSERT INTO ventes(id, client_id, date, reference, montant_total, description) VALUES (?,?,?,?,?,?)",
+                vente_rows)
+            conn.executemany(
+                "INSERT INTO vente_items(vente_id, product_id, description, quantity, unit_price, total_price) "
+                "VALUES (?,?,?,?,?,?)", item_rows)
+            conn.executemany(
+                "INSERT INTO paiements(vente_id, date, montant, mode, note) VALUES (?,?,?,?,?)", paiement_rows)
+            vente_rows.clear()
+            item_rows.clear()
+            paiement_rows.clear()
+
+        for vid in range(1, ventes + 1):
+            client_id = 1 + int(clients * rng.random() ** 2)
+            day = _START + timedelta(days=rng.randrange(_DAYS))
+            total = 0.0
+            for _ in range(_per_row(rng, items_per_vente)):
+                pid, name, price, cat = rng.choice(catalogue)
+                quantity = rng.randrange(1, 20)
+                line = round(quantity * price, 3)
+                total += line
+                item_rows.append((vid, pid, name, quantity, price, line))
+            if total == 0.0:
+                total = round(rng.uniform(20, 2000), 3)
+            total = round(total, 3)
+            vente_rows.append((vid, client_id, day.isoformat(), f"V{day:%y%m%d}{vid:07d}", total, None))
+
+            count = _per_row(rng, paiements_per_vente)
+            if count:
+                # 70 % of the ventes with payments are settled, the rest partly paid
+                share = 1.0 if rng.random() < 0.7 else rng.uniform(0.2, 0.9)
+                part = round(total * share / count, 3)
+                for k in range(count):
+                    paid_on = day + timedelta(days=rng.randrange(0, 90))
+                    paiement_rows.append((vid, paid_on.isoformat(), part, rng.choice(_MODES), None))
+            if len(vente_rows) >= BATCH:
+                flush()
+        flush()
+    connection_manager.close_all()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="database file to create")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--clients", type=int)
+    parser.add_argument("--ventes", type=int)
+    parser.add_argument("--items", type=int)
+    parser.add_argument("--paiements", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = list(SCALES[args.scale])
+    for i, value in enumerate((args.clients, args.ventes, args.items, args.paiements)):
+        if value is not None:
+            counts[i] = value
+    elapsed = generate(args.output, *counts, seed=args.seed)
+    print(f"{args.output}: {counts[0]} clients, {counts[1]} ventes, {counts[2]} items, "
+          f"{counts[3]} paiements in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+ClientFlow from the command line: PDF exports and database maintenance,
+without starting the GUI (nothing here imports Qt), e.g. from a scheduled
+task.
+
+    python -m clientflow stats
+    python -m clientflow export-clients --unpaid
+    python -m clientflow export-batch statements_unpaid releves.zip
+    python -m clientflow --db D:\\ClientFlow\\app.db backup
+
+--db (or the CLIENTFLOW_DB environment variable) selects another database
+file than the application's one.
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+
+class CommandError(Exception):
+    """Invalid input: printed as is, exit status 1."""
+
+
+def _timestamp():
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def _safe(text):
+    return (text or "").replace(' ', '_').replace('/', '_').replace('\\', '_').replace(':', '')
+
+
+def _progress(done, total, text):
+    # Live progress on a terminal only, scheduled tasks get the final line
+    if sys.stderr.isatty():
+        sys.stderr.write(f"\r{text[:70]:<70}")
+        sys.stderr.flush()
+
+
+def _end_progress():
+    if sys.stderr.isatty():
+        sys.stderr.write("\r" + " " * 70 + "\r")
+
+
+#------Exports------
+def export_clients(args):
+    import database
+    import pdf_reports
+    from export_data import clients_table
+
+    balances = database.get_client_balances()
+    if args.unpaid:
+        balances = [row for row in balances if row[6] > 0.0005]
+    table = clients_table(balances, database.get_categories(), database.get_client_category_quantities())
+    output = args.output or f"liste_clients_{_timestamp()}.pdf"
+    pdf_reports.generate_table_report(output, table, "Liste des Clients", progress=_progress)
+    _end_progress()
+    print(f"{len(table.rows)} client(s) -> {output}")
+
+
+def _find_client(client):
+    import database
+
+    if client.isdigit():
+        balance = database.get_client_balance(int(client))
+        if balance is not None:
+            return balance
+    wanted = client.casefold()
+    matches = [row for row in database.get_client_balances() if (row[1] or "").casefold() == wanted]
+    if not matches:
+        raise CommandError(f"Client introuvable : {client}")
+    if len(matches) > 1:
+        ids = ", ".join(str(row[0]) for row in matches)
+        raise CommandError(f"Plusieurs clients s'appellent {client} (id {ids}) : précisez l'id")
+    return matches[0]
+
+
+def export_client_statement(args):
+    import batch_export
+    import pdf_reports
+
+    balance = _find_client(args.client)
+    table, title, client_info = batch_export.statement_args(balance)
+    output = args.output or f"releve_{_safe(balance[1])}_{_timestamp()}.pdf"
+    pdf_reports.generate_table_report(output, table, title, client_info, progress=_progress)
+    _end_progress()
+    print(f"{title} ({len(table.rows)} vente(s)) -> {output}")
+
+
+def export_sale(args):
+    import database
+    import pdf_reports
+
+    vente_id = database.find_vente(args.vente)
+    if vente_id is None and args.vente.isdigit():
+        vente_id = int(args.vente)
+    sale = database.get_bon_de_vente(vente_id) if vente_id is not None else None
+    if sale is None:
+        raise CommandError(f"Vente introuvable : {args.vente}")
+    vente, items = sale
+    output = args.output or f"bon_de_vente_{_safe(vente[4]) or 'client'}_{_safe(vente[1])}_{_timestamp()}.pdf"
+    pdf_reports.generate_sale_pdf(output, vente, items, progress=_progress)
+    _end_progress()
+    print(f"Bon de vente {vente[1] or ''} -> {output}")
+
+
+def export_aging(args):
+    import database
+    import pdf_reports
+    from export_data import aging_table
+
+    try:
+        as_of = datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else date.today()
+    except ValueError:
+        raise CommandError(f"Date invalide : {args.as_of} (format AAAA-MM-JJ)")
+    table = aging_table(database.get_aged_receivables(as_of))
+    output = args.output or f"balance_agee_{as_of:%Y%m%d}_{datetime.now():%H%M%S}.pdf"
+    title = f"Balance âgée au {as_of:%d/%m/%Y}"
+    pdf_reports.generate_table_report(output, table, title, progress=_progress)
+    _end_progress()
+    print(f"{len(table.rows)} client(s) -> {output}")
+
+
+def export_batch(args):
+    import batch_export
+
+    output = args.output or batch_export.default_archive_name(args.what)
+    try:
+        count = batch_export.export_batch(output, args.what, args.processes, progress=_progress)
+    except ValueError as e:
+        raise CommandError(str(e))
+    finally:
+        _end_progress()
+    print(f"{count} document(s) -> {output}")
+
+
+#------Maintenance------
+def backup(args):
+    import database
+
+    output = args.output or f"clientflow_backup_{_timestamp()}.db"
+    if os.path.abspath(output) == os.path.abspath(database.DB_NAME):
+        raise CommandError("La sauvegarde ne peut pas remplacer la base elle-même")
+    database.backup_db(output)
+    print(f"Sauvegarde -> {output}")
+
+
+def vacuum(args):
+    import database
+
+    before, after = database.vacuum_db()
+    print(f"VACUUM : {before / 1024:.0f} Ko -> {after / 1024:.0f} Ko")
+
+
+def reindex(args):
+    import database
+
+    database.reindex_db()
+    print("Index reconstruits, statistiques mises à jour")
+
+
+def stats(args):
+    import database
+
+    s = database.get_db_stats()
+    print(f"Base            : {s['path']}")
+    print(f"Schéma          : version {s['schema_version']}")
+    print(f"Taille          : {s['size'] / 1024:.0f} Ko ({s['free'] / 1024:.0f} Ko libres)")
+    print(f"Clients         : {s['clients']}")
+    print(f"Ventes          : {s['ventes']} ({s['unpaid_ventes']} non soldées)")
+    print(f"Articles vendus : {s['vente_items']}")
+    print(f"Paiements       : {s['paiements']}")
+    print(f"Produits        : {s['products']} ({s['categories']} catégories)")
+    print(f"Crédit total    : {s['credit']:.3f} DT")
+    print(f"Total payé      : {s['paid']:.3f} DT")
+    print(f"Reste à payer   : {s['reste']:.3f} DT")
+
+
+def seed(args):
+    from seed_data import seed_all
+
+    seed_all()
+
+
+def reset(args):
+    import database
+
+    if not args.yes:
+        raise CommandError("Toutes les données seront supprimées : relancez avec --yes pour confirmer")
+    database.reset_db()
+    print("Base de données réinitialisée")
+
+
+#------Command line------
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="clientflow",
+        description="ClientFlow en ligne de commande : exports PDF et maintenance de la base.",
+    )
+    parser.add_argument("--db", help="fichier de base de données (défaut : celui de l'application, ou CLIENTFLOW_DB)")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="commande")
+
+    p = commands.add_parser("export-clients", help="liste des clients en PDF")
+    p.add_argument("output", nargs="?", help="fichier PDF (défaut : liste_clients_<date>.pdf)")
+    p.add_argument("--unpaid", action="store_true", help="seulement les clients avec un reste à payer")
+    p.set_defaults(run=export_clients)
+
+    p = commands.add_parser("export-client-statement", help="relevé de compte d'un client en PDF")
+    p.add_argument("client", help="id ou nom exact du client")
+    p.add_argument("output", nargs="?", help="fichier PDF (défaut : releve_<client>_<date>.pdf)")
+    p.set_defaults(run=export_client_statement)
+
+    p = commands.add_parser("export-sale", help="bon de vente en PDF")
+    p.add_argument("vente", help="référence (ou id) de la vente")
+    p.add_argument("output", nargs="?", help="fichier PDF (défaut : bon_de_vente_<client>_<référence>_<date>.pdf)")
+    p.set_defaults(run=export_sale)
+
+    p = commands.add_parser("export-aging", help="balance âgée (reste à payer par ancienneté) en PDF")
+    p.add_argument("output", nargs="?", help="fichier PDF (défaut : balance_agee_<date>.pdf)")
+    p.add_argument("--as-of", help="date de calcul AAAA-MM-JJ (défaut : aujourd'hui)")
+    p.set_defaults(run=export_aging)
+
+    p = commands.add_parser("export-batch", help="un PDF par client ou par vente non soldée, dans un .zip ou un dossier")
+    # batch_export constants, spelled out: importing it would open the
+    # database before --db is applied
+    p.add_argument("what", choices=("statements_unpaid", "statements_all", "unpaid_sales"))
+    p.add_argument("output", nargs="?", help="fichier .zip ou dossier (défaut : .zip daté)")
+    p.add_argument("--processes", type=int, help="processus de rendu (défaut : un par cœur)")
+    p.set_defaults(run=export_batch)
+
+    p = commands.add_parser("backup", help="copie cohérente de la base, même application ouverte")
+    p.add_argument("output", nargs="?", help="fichier de sauvegarde (défaut : clientflow_backup_<date>.db)")
+    p.set_defaults(run=backup)
+
+    p = commands.add_parser("vacuum", help="compacte le fichier de la base")
+    p.set_defaults(run=vacuum)
+
+    p = commands.add_parser("reindex", help="reconstruit les index et met à jour les statistiques")
+    p.set_defaults(run=reindex)
+
+    p = commands.add_parser("stats", help="nombre de lignes, soldes et taille de la base")
+    p.set_defaults(run=stats)
+
+    p = commands.add_parser("seed", help="ajoute les données d'exemple")
+    p.set_defaults(run=seed)
+
+    p = commands.add_parser("reset", help="supprime toutes les données")
+    p.add_argument("--yes", action="store_true", help="confirme la suppression")
+    p.set_defaults(run=reset)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        os.environ["CLIENTFLOW_DB"] = args.db
+    # Every command but seed/reset needs an existing database: do not
+    # create an empty one for a mistyped path
+    db = os.getenv("CLIENTFLOW_DB")
+    if db and args.command not in ("seed", "reset") and not os.path.exists(db):
+        print(f"Erreur : base introuvable : {db}", file=sys.stderr)
+        return 1
+
+    # Imported once the database file is known (database opens it on import)
+    import database
+
+    try:
+        database.init_db()
+        args.run(args)
+    except CommandError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    finally:
+        database.connection_manager.close_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+# Pragmas applied once to every connection when it is opened
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache
+    "PRAGMA mmap_size=67108864",     # 64 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connection shared by every caller on the same thread.
+    close() only rolls back an unfinished transaction so the legacy
+    "connect / execute / commit / close" call sites keep their semantics
+    while the underlying connection stays warm. Inside a transaction()
+    block the block owns the transaction: commit() and close() leave it alone.
+    """
+
+    def commit(self):
+        if getattr(_local, "depth", 0) == 0:
+            super().commit()
+
+    def close(self):
+        if getattr(_local, "depth", 0) == 0 and self.in_transaction:
+            self.rollback()
+
+    def really_close(self):
+        super().close()
+
+
+_db_path = None
+_generation = 0
+_local = threading.local()
+_lock = threading.Lock()
+# Weak: the connection of a finished thread is closed when its thread-local
+# storage goes away, without waiting for close_all()
+_all_connections = weakref.WeakSet()
+
+
+def configure(db_path):
+    """Set the database file used by get_connection(). Closes any open connections."""
+    global _db_path
+    close_all()
+    _db_path = db_path
+
+
+def get_db_path():
+    return _db_path
+
+
+def _open():
+    if _db_path is None:
+        raise RuntimeError("connection_manager.configure() must be called first")
+    # Each connection is only ever used by the thread that opened it;
+    # check_same_thread is off so close_all() can close them from any thread.
+    conn = sqlite3.connect(_db_path, factory=PooledConnection, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    with _lock:
+        _all_connections.add(conn)
+    return conn
+
+
+def get_connection():
+    """Return the warm connection of the current thread (opened on first use)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        conn = _open()
+        _local.conn = conn
+        _local.generation = _generation
+        _local.depth = 0
+    return conn
+
+
+@contextmanager
+def transaction():
+    """
+    Run a block inside a single transaction on the thread's connection.
+    Commits on success, rolls back on error. Nested blocks join the outer one.
+
+        with transaction() as conn:
+            conn.execute(...)
+    """
+    conn = get_connection()
+    depth = getattr(_local, "depth", 0)
+    if depth == 0 and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    _local.depth = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth = depth
+        if depth == 0 and conn.in_transaction:
+            conn.rollback()
+        raise
+    else:
+        _local.depth = depth
+        if depth == 0:
+            conn.commit()
+
+
+def close_all():
+    """Close every connection opened by this module (all threads)."""
+    global _generation
+    with _lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+        # Threads holding an older generation reopen on their next call
+        _generation += 1
+    for conn in connections:
+        conn.really_close()
+    _local.__dict__.clear()
@@ -0,0 +1,195 @@
+from array import array
+from collections import Counter, namedtuple
+from itertools import accumulate
+from operator import itemgetter
+
+from database import (
+    VenteItem, get_client_ventes, get_client_vente_items, get_vente, get_vente_items,
+    get_client_balances, get_client_balance, get_client_category_quantities, get_balance_totals, search
+)
+
+# clients: ClientBalance rows; category_quantities: {client_id: {category_id: qty}};
+# totals: BalanceTotals
+HomeData = namedtuple("HomeData", "clients category_quantities totals")
+# row: ClientBalance, None when the client was deleted; quantities: {category_id: qty}
+ClientPatch = namedtuple("ClientPatch", "client_id row quantities")
+ClientSales = namedtuple("ClientSales", "ventes items")
+# row: Vente, None when the vente was deleted; items: its VenteItem rows
+VentePatch = namedtuple("VentePatch", "vente_id row items")
+
+
+def load_home_data():
+    """Everything Home shows, read in three set-based queries (no per-client query)."""
+    return HomeData(get_client_balances(), get_client_category_quantities(), get_balance_totals())
+
+
+def load_client_patch(client_id):
+    """One client's Home row after a write."""
+    return ClientPatch(client_id, get_client_balance(client_id),
+                       get_client_category_quantities(client_id).get(client_id, {}))
+
+
+def search_client_ids(text, limit=500):
+    """Ids of the clients with a full-text hit (client, sale reference or item description)."""
+    return {hit.client_id for hit in search(text, limit=limit)}
+
+
+
+class ClientSalesController:
+    """
+    Owns the ventes and vente items of one client for the ClientDetail dialog.
+    The database is read on first use and then only after invalidate(), which
+    callers invoke after a write (sale or payment added, edited or deleted).
+    Search and date filters are served from the loaded rows.
+    fetch() / set_data() and fetch_vente() / apply_vente() split a load or a
+one-vente patch so the read can run in the background.
+    """
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self.ventes = []        # database.Vente rows, load order
+        self.items = VenteItemStore()
+        self.total_credit = 0
+        self.total_paye = 0
+        self.total_reste = 0
+        self._stale = True
+
+    @property
+    def stale(self):
+        return self._stale
+
+    def invalidate(self):
+        """Mark the loaded data as outdated; the next ensure_loaded() reloads it."""
+        self._stale = True
+
+    def fetch(self):
+        """
+        Read the client's ventes and items. Touches no state, so it can run on
+        a worker thread; pass the result to set_data() on the GUI thread.
+        """
+        ventes = get_client_ventes(self.client_id)
+        return ClientSales(ventes, VenteItemStore(get_client_vente_items(self.client_id)))
+
+    def set_data(self, data):
+        self.ventes, self.items = data
+        self._compute_totals()
+        self._stale = False
+
+    def ensure_loaded(self):
+        """Reload from the database if invalidated. Returns True when data was reloaded."""
+        if not self._stale:
+            return False
+        self.set_data(self.fetch())
+        return True
+
+    @staticmethod
+    def fetch_vente(vente_id):
+        """
+        Read one vente and its items as a VentePatch (row None: deleted). Touches
+        no state; pass the result to apply_vente() on the GUI thread.
+        """
+        row = get_vente(vente_id)
+        return VentePatch(vente_id, row, get_vente_items(vente_id) if row else [])
+
+    def apply_vente(self, vente_id, row, items):
+        """Patch the loaded data and totals with a fetch_vente() result."""
+        position = next((i for i, r in enumerate(self.ventes) if r.id == vente_id), None)
+        if position is not None:
+            if row is None:
+                del self.ventes[position]
+            else:
+                self.ventes[position] = row
+        elif row is not None:
+            self.ventes.append(row)
+        if row is None:
+            self.items.remove(vente_id)
+        else:
+            self.items.replace(vente_id, items)
+        self._compute_totals()
+
+    def _compute_totals(self):
+        # Summed from the loaded rows (no query); avoids drift from +/- updates
+        ventes = self.ventes
+        self.total_credit = sum(row.montant_total or 0 for row in ventes)
+        self.total_paye = sum(row.paye for row in ventes)
+        self.total_reste = sum(row.reste for row in ventes)
+
+
+class VenteItemStore:
+    """
+    The vente items of one client, stored by column: ids and numbers in
+    array.array columns (8 bytes a value instead of an int or float object,
+    nothing for the garbage collector to walk), descriptions in a list.
+    The items of a vente are contiguous, _ranges maps vente_id -> (start, stop).
+    replace() appends the new items; the old slots get a zero quantity and are
+    dropped once they outnumber the live ones.
+    """
+    __slots__ = ("_ids", "_vente_ids", "_product_ids", "_descriptions", "_quantities", "_unit_prices", "_total_prices",
+                 "_ranges", "_live")
+
+    def __init__(self, items=()):
+        """items: VenteItem rows (or plain tuples in that order), grouped by vente."""
+        self._ids = array('q')
+        self._vente_ids = array('q')
+        self._product_ids = array('q')   # 0: no product (deleted)
+        self._descriptions = []
+        self._quantities = array('d')
+        self._unit_prices = array('d')
+        self._total_prices = array('d')
+        self._ranges = {}
+        self._live = 0
+        self._extend(items)
+
+    def _extend(self, items):
+        items = list(items)
+        start = len(self._ids)
+        self._ids.extend(map(itemgetter(0), items))
+        self._vente_ids.extend(map(itemgetter(1), items))
+        self._product_ids.extend([pid or 0 for pid in map(itemgetter(2), items)])
+        self._descriptions.extend(map(itemgetter(3), items))
+        self._quantities.extend([q or 0.0 for q in map(itemgetter(4), items)])
+        self._unit_prices.extend([p or 0.0 for p in map(itemgetter(5), items)])
+        self._total_prices.extend([t or 0.0 for t in map(itemgetter(6), items)])
+        # Counter keeps the first-seen order, the order of the groups
+        counts = Counter(map(itemgetter(1), items))
+        bounds = list(accumulate(counts.values(), initial=start))
+        self._ranges.update(zip(counts, zip(bounds, bounds[1:])))
+        self._live += len(items)
+
+    def __len__(self):
+        """Number of items."""
+        return self._live
+
+    def __contains__(self, vente_id):
+        return vente_id in self._ranges
+
+    def quantity_columns(self):
+        """
+        (vente_ids, product_ids, quantities) arrays, one value per slot, for
+        SalesCube; product_id 0 is a deleted product, unused slots have quantity 0.
+        """
+        return self._vente_ids, self._product_ids, self._quantities
+
+    def items(self, vente_id):
+        """The VenteItem rows of a vente, built on demand."""
+        start, stop = self._ranges.get(vente_id, (0, 0))
+        return [VenteItem(self._ids[i], vente_id, self._product_ids[i] or None, self._descriptions[i],
+                          self._quantities[i], self._unit_prices[i], self._total_prices[i])
+                for i in range(start, stop)]
+
+    def replace(self, vente_id, items):
+        """Set the items of a vente (after an edit); items are VenteItem rows."""
+        self.remove(vente_id)
+        self._extend(items)
+
+    def remove(self, vente_id):
+        start, stop = self._ranges.pop(vente_id, (0, 0))
+        self._live -= stop - start
+        self._quantities[start:stop] = array('d', bytes(8 * (stop - start)))
+        if len(self._ids) > 2 * self._live + 64:
+            self._compact()
+
+    def _compact(self):
+        ranges = sorted(self._ranges.items(), key=lambda entry: entry[1])
+        live = [item for vente_id, (start, stop) in ranges for item in self.items(vente_id)]
+        self.__init__(live)
@@ -0,0 +1,50 @@
+from PySide6.QtCore import QObject, Signal
+
+import database
+
+
+class DataEvents(QObject):
+    """
+    Qt side of the database change notifications (database.subscribe).
+    Re-emits every committed write as a typed signal so views can patch
+    the affected rows. Signals emitted from a worker thread are queued to
+    the receivers' thread.
+    """
+    client_changed = Signal(int)          # client_id (added, edited or deleted)
+    vente_changed = Signal(int, int)      # client_id, vente_id
+    paiement_changed = Signal(int, int)   # client_id, vente_id
+    products_changed = Signal()
+    categories_changed = Signal()
+    reset = Signal()                      # everything must be reloaded
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        database.subscribe(self._on_change)
+
+    def _on_change(self, change):
+        kind = change.kind
+        if kind == database.CHANGE_CLIENT:
+            self.client_changed.emit(change.client_id)
+        elif kind == database.CHANGE_VENTE:
+            if change.client_id is not None:
+                self.vente_changed.emit(change.client_id, change.vente_id)
+        elif kind == database.CHANGE_PAIEMENT:
+            if change.client_id is not None:
+                self.paiement_changed.emit(change.client_id, change.vente_id)
+        elif kind == database.CHANGE_PRODUCT:
+            self.products_changed.emit()
+        elif kind == database.CHANGE_CATEGORY:
+            self.categories_changed.emit()
+        elif kind == database.CHANGE_ALL:
+            self.reset.emit()
+
+
+_events = None
+
+
+def data_events():
+    """Return the application-wide DataEvents hub (created on first use)."""
+    global _events
+    if _events is None:
+        _events = DataEvents()
+    return _events
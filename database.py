@@ -1,14 +1,28 @@
 import os
+import re
 import sqlite3
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import partial
+
+import connection_manager
+import migrations
+from connection_manager import transaction
 
 
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """Return the thread's pooled connection (see connection_manager)."""
+    return connection_manager.get_connection()
 
 
 APP_NAME = "ClientFlow"
 
 def get_db_path():
+    # CLIENTFLOW_DB points at another database file (command line, scheduled tasks)
+    override = os.getenv("CLIENTFLOW_DB")
+    if override:
+        return os.path.abspath(override)
+
     appdata = os.getenv("APPDATA")
     if not appdata:
         raise RuntimeError("APPDATA environment variable not found")
@@ -19,249 +33,577 @@ def get_db_path():
     return os.path.join(app_dir, "app.db")
 
 DB_NAME = get_db_path()
+connection_manager.configure(DB_NAME)
 
 def init_db():
-    conn = get_connection()
-    c = conn.cursor()
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS clients (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom TEXT NOT NULL,
-        telephone TEXT,
-        adresse TEXT,
-        email TEXT
-    )
-    """)
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS ventes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        client_id INTEGER,
-        date TEXT,
-        reference TEXT,
-        montant_total REAL,
-        FOREIGN KEY(client_id) REFERENCES clients(id)
-    )
-    """)
-
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS paiements (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        vente_id INTEGER,
-        date TEXT,
-        montant REAL,
-        mode TEXT,
-        note TEXT,
-        FOREIGN KEY(vente_id) REFERENCES ventes(id)
-    )
-    """)
-
-    # Categories table: product categories
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        description TEXT
-    )
-    """)
-
-    # Products table: holds available products and their unit price
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        unit_price REAL NOT NULL,
-        category_id INTEGER,
-        FOREIGN KEY(category_id) REFERENCES categories(id)
-    )
-    """)
-
-    # Sale items: items belonging to a vente (sale)
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS vente_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        vente_id INTEGER NOT NULL,
-        product_id INTEGER,
-        description TEXT,
-        quantity REAL DEFAULT 1,
-        unit_price REAL,
-        total_price REAL,
-        FOREIGN KEY(vente_id) REFERENCES ventes(id),
-        FOREIGN KEY(product_id) REFERENCES products(id)
-    )
-    """)
-
-    # Add new columns if not exist
-    try:
-        c.execute("ALTER TABLE clients ADD COLUMN adresse TEXT")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        c.execute("ALTER TABLE clients ADD COLUMN email TEXT")
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute("ALTER TABLE ventes ADD COLUMN description TEXT")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        c.execute("ALTER TABLE products ADD COLUMN category_id INTEGER")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
+    """Create or upgrade the schema (see migrations.py)."""
+    migrations.migrate()
 
-    # older installations may not have new tables; ensure columns exist where applicable
-    # (product tables created above with IF NOT EXISTS are non-destructive)
 
-    conn.commit()
-    conn.close()
+#------Change notifications------
+# Write functions below call _notify() once their transaction is committed,
+# so views can patch the affected rows instead of reloading everything.
+# Listeners run on the writing thread and must not write to the database.
+CHANGE_CLIENT = "client"
+CHANGE_VENTE = "vente"
+CHANGE_PAIEMENT = "paiement"
+CHANGE_PRODUCT = "product"
+CHANGE_CATEGORY = "category"
+CHANGE_ALL = "all"  # reset: everything must be reloaded
 
+DataChange = namedtuple("DataChange", "kind client_id vente_id object_id")
 
-def add_product(name, unit_price, category_id=None):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO products (name, unit_price, category_id) VALUES (?, ?, ?)", (name, float(unit_price), category_id))
-    vid = c.lastrowid
-    conn.commit()
-    conn.close()
-    return vid
+_listeners = []
 
 
-def get_products():
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("SELECT id, name, unit_price, category_id FROM products ORDER BY name")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+def subscribe(listener):
+    """Call listener(DataChange) after every committed write."""
+    if listener not in _listeners:
+        _listeners.append(listener)
 
 
-def update_product(product_id, name, unit_price, category_id=None):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE products SET name=?, unit_price=?, category_id=? WHERE id=?", (name, float(unit_price), category_id, product_id))
-    conn.commit()
-    conn.close()
+def unsubscribe(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
 
 
-def delete_product(product_id):
-    conn = get_connection()
-    c = conn.cursor()
-    # Remove any orphan references in vente_items gracefully by setting product_id to NULL
-    c.execute("UPDATE vente_items SET product_id=NULL WHERE product_id=?", (product_id,))
-    c.execute("DELETE FROM products WHERE id=?", (product_id,))
-    conn.commit()
-    conn.close()
+def _notify(kind, client_id=None, vente_id=None, object_id=None):
+    change = DataChange(kind, client_id, vente_id, object_id)
+    for listener in list(_listeners):
+        listener(change)
 
 
-def add_category(name, description=""):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description))
-    cat_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return cat_id
+#------Row types------
+# Reads return these named tuples: fields by name for new code, while the
+# existing tuple unpacking keeps working.
+ClientBalance = namedtuple("ClientBalance", "id nom telephone adresse email credit reste")
+Client = namedtuple("Client", "nom telephone adresse email")
+VenteItem = namedtuple("VenteItem", "id vente_id product_id description quantity unit_price total_price")
+SaleHeader = namedtuple("SaleHeader", "date reference montant_total paye client_nom telephone adresse")
+SaleLine = namedtuple("SaleLine", "description quantity unit_price total_price")
+VenteSummary = namedtuple("VenteSummary", "reference client_nom description montant_total reste")
+Paiement = namedtuple("Paiement", "id date montant mode note")
+Product = namedtuple("Product", "id name unit_price category_id")
+Category = namedtuple("Category", "id name description")
+BalanceTotals = namedtuple("BalanceTotals", "credit paid reste")
+SearchHit = namedtuple("SearchHit", "kind client_id vente_id")
+AgingRow = namedtuple("AgingRow", "client_id nom telephone days_0_30 days_31_60 days_61_90 days_over_90 reste oldest_date")
 
 
-def get_categories():
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("SELECT id, name, description FROM categories ORDER BY name")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+class Vente(namedtuple("Vente", "id date reference description montant_total paye")):
+    __slots__ = ()
 
+    @property
+    def reste(self):
+        return (self.montant_total or 0) - (self.paye or 0)
 
-def update_category(category_id, name, description=""):
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE categories SET name=?, description=? WHERE id=?", (name, description, category_id))
-    conn.commit()
-    conn.close()
 
+def _fetch_all(row_type, sql, params=()):
+    # tuple.__new__ directly: a third cheaper than row_type._make per row
+    rows = get_connection().execute(sql, params).fetchall()
+    return list(map(partial(tuple.__new__, row_type), rows))
 
-def delete_category(category_id):
-    conn = get_connection()
-    c = conn.cursor()
-    # Set products' category_id to NULL when deleting a category
-    c.execute("UPDATE products SET category_id=NULL WHERE category_id=?", (category_id,))
-    c.execute("DELETE FROM categories WHERE id=?", (category_id,))
-    conn.commit()
-    conn.close()
 
+def _fetch_one(row_type, sql, params=()):
+    row = get_connection().execute(sql, params).fetchone()
+    return None if row is None else tuple.__new__(row_type, row)
 
-def add_vente(client_id, date, reference, montant_total, description=None):
+
+def _vente_client_id(conn, vente_id):
+    row = conn.execute("SELECT client_id FROM ventes WHERE id=?", (vente_id,)).fetchone()
+    return row[0] if row else None
+
+
+#------Clients------
+_CLIENT_BALANCE_SELECT = """
+    SELECT c.id, c.nom, c.telephone, c.adresse, c.email,
+        IFNULL(b.credit, 0), IFNULL(b.reste, 0)
+    FROM clients c
+    LEFT JOIN client_balances b ON b.client_id = c.id
+"""
+
+
+def get_client_balances():
+    """Return a ClientBalance (id, nom, telephone, adresse, email, credit, reste) for every client, ordered by name."""
+    return _fetch_all(ClientBalance, _CLIENT_BALANCE_SELECT + " ORDER BY c.nom")
+
+
+def get_client_balance(client_id):
+    """Same row as get_client_balances() for a single client, or None if it does not exist."""
+    return _fetch_one(ClientBalance, _CLIENT_BALANCE_SELECT + " WHERE c.id=?", (client_id,))
+
+
+def get_client(client_id):
+    """Return a Client (nom, telephone, adresse, email) or None."""
+    return _fetch_one(Client, "SELECT nom, telephone, adresse, email FROM clients WHERE id=?", (client_id,))
+
+
+def add_client(nom, telephone="", adresse="", email=""):
+    with transaction() as conn:
+        c = conn.execute(
+            "INSERT INTO clients(nom, telephone, adresse, email) VALUES (?,?,?,?)",
+            (nom, telephone, adresse, email)
+        )
+    _notify(CHANGE_CLIENT, client_id=c.lastrowid)
+    return c.lastrowid
+
+
+def update_client(client_id, nom, telephone="", adresse="", email=""):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE clients SET nom=?, telephone=?, adresse=?, email=? WHERE id=?",
+            (nom, telephone, adresse, email, client_id)
+        )
+    _notify(CHANGE_CLIENT, client_id=client_id)
+
+
+def delete_client(client_id):
+    """Delete a client with all its ventes, items and payments."""
+    with transaction() as conn:
+        conn.execute("DELETE FROM vente_items WHERE vente_id IN (SELECT id FROM ventes WHERE client_id=?)", (client_id,))
+        conn.execute("DELETE FROM paiements WHERE vente_id IN (SELECT id FROM ventes WHERE client_id=?)", (client_id,))
+        conn.execute("DELETE FROM ventes WHERE client_id=?", (client_id,))
+        conn.execute("DELETE FROM clients WHERE id=?", (client_id,))
+    _notify(CHANGE_CLIENT, client_id=client_id)
+
+
+#------Ventes------
+def get_client_ventes(client_id):
+    """Return a Vente (id, date, reference, description, montant_total, paye) for each of a client's ventes, newest first."""
+    return _fetch_all(Vente, """
+        SELECT id, date, reference, description, montant_total, paid_total
+        FROM ventes
+        WHERE client_id=?
+        ORDER BY date DESC
+    """, (client_id,))
+
+
+def get_vente(vente_id):
+    """Same Vente as get_client_ventes() for a single vente, or None if it does not exist."""
+    return _fetch_one(Vente, """
+        SELECT id, date, reference, description, montant_total, paid_total
+        FROM ventes
+        WHERE id=?
+    """, (vente_id,))
+
+
+def get_vente_items(vente_id):
+    """Return the VenteItem rows of one vente."""
+    return _fetch_all(VenteItem, """
+        SELECT id, vente_id, product_id, description, quantity, unit_price, total_price
+        FROM vente_items
+        WHERE vente_id=?
+        ORDER BY id
+    """, (vente_id,))
+
+
+def get_vente_summary(vente_id):
+    """Return a VenteSummary (reference, client_nom, description, montant_total, reste), or None."""
+    return _fetch_one(VenteSummary, """
+        SELECT v.reference, c.nom, v.description, v.montant_total, v.reste
+        FROM ventes v
+        JOIN clients c ON v.client_id = c.id
+        WHERE v.id=?
+    """, (vente_id,))
+
+
+def find_vente(reference):
+    """Return the id of the vente with this reference, or None."""
     conn = get_connection()
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO ventes (client_id, date, reference, montant_total, description) VALUES (?, ?, ?, ?, ?)",
-        (client_id, date, reference, montant_total, description)
-    )
-    vid = c.lastrowid
-    conn.commit()
-    conn.close()
-    return vid
+    row = conn.execute("SELECT id FROM ventes WHERE reference=? ORDER BY id DESC LIMIT 1", (reference,)).fetchone()
+    return row[0] if row else None
 
 
-def add_vente_item(vente_id, product_id, description, quantity, unit_price, total_price):
+def get_unpaid_ventes():
+    """Return the ids of the ventes with something left to pay, by client name then date."""
     conn = get_connection()
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO vente_items (vente_id, product_id, description, quantity, unit_price, total_price) VALUES (?, ?, ?, ?, ?, ?)",
-        (vente_id, product_id, description, quantity, unit_price, total_price)
-    )
-    iid = c.lastrowid
-    conn.commit()
-    conn.close()
-    return iid
+    return [row[0] for row in conn.execute("""
+        SELECT v.id
+        FROM ventes v
+        JOIN clients c ON v.client_id = c.id
+        WHERE v.reste > 0.0005
+        ORDER BY c.nom, v.date
+    """)]
+
+
+def get_bon_de_vente(vente_id):
+    """
+    Data printed on a bon de vente, or None if the vente does not exist:
+    (SaleHeader(date, reference, montant_total, paye, client_nom, telephone, adresse),
+     [SaleLine(description, quantity, unit_price, total_price), ...])
+    """
+    vente = _fetch_one(SaleHeader, """
+        SELECT v.date, v.reference, v.montant_total, v.paid_total,
+               c.nom, c.telephone, c.adresse
+        FROM ventes v
+        LEFT JOIN clients c ON v.client_id = c.id
+        WHERE v.id = ?
+    """, (vente_id,))
+    if vente is None:
+        return None
+    items = _fetch_all(SaleLine, """
+        SELECT description, quantity, unit_price, total_price
+        FROM vente_items
+        WHERE vente_id = ?
+        ORDER BY id
+    """, (vente_id,))
+    return vente, items
+
+
+def get_client_vente_items(client_id):
+    """Return the VenteItem rows of every vente of a client (one query), grouped by vente."""
+    return _fetch_all(VenteItem, """
+        SELECT vi.id, vi.vente_id, vi.product_id, vi.description, vi.quantity, vi.unit_price, vi.total_price
+        FROM vente_items vi
+        JOIN ventes v ON v.id = vi.vente_id
+        WHERE v.client_id=?
+        ORDER BY vi.vente_id, vi.id
+    """, (client_id,))
+
+
+def get_balance_totals():
+    """Return the global BalanceTotals (credit, paid, reste)."""
+    totals = _fetch_one(BalanceTotals, "SELECT credit, paid, reste FROM balance_totals WHERE id = 1")
+    return totals or BalanceTotals(0, 0, 0)
+
+
+# Full-text search (index maintained by triggers, see migrations.py)
+SEARCH_KIND_CLIENT = 1
+SEARCH_KIND_VENTE = 2
+SEARCH_KIND_ITEM = 3
+
+
+def search(query, limit=50):
+    """
+    Full-text search over clients, sale references/descriptions and item descriptions.
+    Every word of the query is matched as a prefix, ignoring case and accents.
+    Returns up to `limit` SearchHit (kind, client_id, vente_id), best matches first;
+    kind is SEARCH_KIND_CLIENT, SEARCH_KIND_VENTE or SEARCH_KIND_ITEM.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return []
+    match = " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+    try:
+        return _fetch_all(
+            SearchHit,
+            "SELECT kind, client_id, vente_id FROM search_fts WHERE search_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        )
+    except sqlite3.OperationalError:
+        return []
 
 
+#------Catalogue------
+def add_product(name, unit_price, category_id=None):
+    with transaction() as conn:
+        c = conn.execute("INSERT INTO products (name, unit_price, category_id) VALUES (?, ?, ?)", (name, float(unit_price), category_id))
+    _notify(CHANGE_PRODUCT, object_id=c.lastrowid)
+    return c.lastrowid
 
 
-def reset_db():
-    """Reset the database by dropping all tables and recreating them"""
-    conn = get_connection()
-    c = conn.cursor()
+def get_products():
+    """Return every Product (id, name, unit_price, category_id), ordered by name."""
+    return _fetch_all(Product, "SELECT id, name, unit_price, category_id FROM products ORDER BY name")
 
-    # Drop all tables
-    c.execute("DROP TABLE IF EXISTS paiements")
-    c.execute("DROP TABLE IF EXISTS ventes")
-    c.execute("DROP TABLE IF EXISTS clients")
 
-    conn.commit()
-    conn.close()
+def update_product(product_id, name, unit_price, category_id=None):
+    with transaction() as conn:
+        conn.execute("UPDATE products SET name=?, unit_price=?, category_id=? WHERE id=?", (name, float(unit_price), category_id, product_id))
+    _notify(CHANGE_PRODUCT, object_id=product_id)
 
-    # Reinitialize the database
-    init_db()
-    create_indexes()
-    print("Database reset successfully.")
 
+def delete_product(product_id):
+    with transaction() as conn:
+        # Remove any orphan references in vente_items gracefully by setting product_id to NULL
+        conn.execute("UPDATE vente_items SET product_id=NULL WHERE product_id=?", (product_id,))
+        conn.execute("DELETE FROM products WHERE id=?", (product_id,))
+    _notify(CHANGE_PRODUCT, object_id=product_id)
 
-def create_indexes():
-    conn = get_connection()
-    c = conn.cursor()
 
-    # Recherche rapide par nom
-    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_nom ON clients(nom)")
+def add_category(name, description=""):
+    with transaction() as conn:
+        c = conn.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description))
+    _notify(CHANGE_CATEGORY, object_id=c.lastrowid)
+    return c.lastrowid
+
+
+def get_categories():
+    """Return every Category (id, name, description), ordered by name."""
+    return _fetch_all(Category, "SELECT id, name, description FROM categories ORDER BY name")
 
-    # Recherche rapide par email
-    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_email ON clients(email)")
 
-    # Recherche rapide par téléphone si besoin
-    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_telephone ON clients(telephone)")
+def update_category(category_id, name, description=""):
+    with transaction() as conn:
+        conn.execute("UPDATE categories SET name=?, description=? WHERE id=?", (name, description, category_id))
+    _notify(CHANGE_CATEGORY, object_id=category_id)
 
-    # Pour les ventes liées à un client
-    c.execute("CREATE INDEX IF NOT EXISTS idx_ventes_client_id ON ventes(client_id)")
 
-    # Pour les paiements liés à une vente
-    c.execute("CREATE INDEX IF NOT EXISTS idx_paiements_vente_id ON paiements(vente_id)")
+def delete_category(category_id):
+    with transaction() as conn:
+        # Set products' category_id to NULL when deleting a category
+        conn.execute("UPDATE products SET category_id=NULL WHERE category_id=?", (category_id,))
+        conn.execute("DELETE FROM categories WHERE id=?", (category_id,))
+    _notify(CHANGE_CATEGORY, object_id=category_id)
+
+
+def get_client_category_quantities(client_id=None):
+    """
+    Return {client_id: {category_id: quantity}} for every client with sold items
+    (or only for client_id), read from the materialized client_category_quantities table.
+    """
+    conn = get_connection()
+    if client_id is None:
+        rows = conn.execute(
+            "SELECT client_id, category_id, quantity FROM client_category_quantities"
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT client_id, category_id, quantity FROM client_category_quantities WHERE client_id=?",
+            (client_id,)
+        ).fetchall()
+    quantities = {}
+    for client_id, category_id, qty in rows:
+        quantities.setdefault(client_id, {})[category_id] = qty or 0
+    return quantities
+
+
+#------Vente writes------
+def add_vente(client_id, date, reference, montant_total, description=None):
+    with transaction() as conn:
+        c = conn.execute(
+            "INSERT INTO ventes (client_id, date, reference, montant_total, description) VALUES (?, ?, ?, ?, ?)",
+            (client_id, date, reference, montant_total, description)
+        )
+    _notify(CHANGE_VENTE, client_id=client_id, vente_id=c.lastrowid)
+    return c.lastrowid
+
 
-    conn.commit()
-    conn.close()
-    print("Indexes created successfully.")
+def add_vente_item(vente_id, product_id, description, quantity, unit_price, total_price):
+    with transaction() as conn:
+        c = conn.execute(
+            "INSERT INTO vente_items (vente_id, product_id, description, quantity, unit_price, total_price) VALUES (?, ?, ?, ?, ?, ?)",
+            (vente_id, product_id, description, quantity, unit_price, total_price)
+        )
+        client_id = _vente_client_id(conn, vente_id)
+    _notify(CHANGE_VENTE, client_id=client_id, vente_id=vente_id)
+    return c.lastrowid
+
+
+
+
+def record_sale(client_id, date, reference, items, montant_total=None, description=None):
+    """
+    Insert a vente and its items in a single transaction and return the new id.
+    items: iterable of (product_id, description, quantity, unit_price, total_price).
+    Items with a zero quantity are not stored. montant_total defaults to the sum
+    of the item totals.
+    """
+    rows = [item for item in items if item[2]]
+    if montant_total is None:
+        montant_total = sum(item[4] for item in rows)
+
+    with transaction() as conn:
+        c = conn.execute(
+            "INSERT INTO ventes (client_id, date, reference, montant_total, description) VALUES (?, ?, ?, ?, ?)",
+            (client_id, date, reference, montant_total, description)
+        )
+        vente_id = c.lastrowid
+        conn.executemany(
+            "INSERT INTO vente_items (vente_id, product_id, description, quantity, unit_price, total_price) VALUES (?, ?, ?, ?, ?, ?)",
+            [(vente_id,) + tuple(item) for item in rows]
+        )
+    _notify(CHANGE_VENTE, client_id=client_id, vente_id=vente_id)
+    return vente_id
+
+
+def update_sale(vente_id, reference, montant_total, items):
+    """
+    Update a vente and replace its items in a single transaction.
+    items: same tuples as record_sale(); zero quantities are not stored.
+    """
+    rows = [item for item in items if item[2]]
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE ventes SET reference=?, montant_total=? WHERE id=?",
+            (reference, montant_total, vente_id)
+        )
+        conn.execute("DELETE FROM vente_items WHERE vente_id=?", (vente_id,))
+        conn.executemany(
+            "INSERT INTO vente_items (vente_id, product_id, description, quantity, unit_price, total_price) VALUES (?, ?, ?, ?, ?, ?)",
+            [(vente_id,) + tuple(item) for item in rows]
+        )
+        client_id = _vente_client_id(conn, vente_id)
+    _notify(CHANGE_VENTE, client_id=client_id, vente_id=vente_id)
+
+
+def delete_vente(vente_id):
+    """Delete a vente with its items and payments."""
+    with transaction() as conn:
+        client_id = _vente_client_id(conn, vente_id)
+        conn.execute("DELETE FROM vente_items WHERE vente_id=?", (vente_id,))
+        conn.execute("DELETE FROM paiements WHERE vente_id=?", (vente_id,))
+        conn.execute("DELETE FROM ventes WHERE id=?", (vente_id,))
+    _notify(CHANGE_VENTE, client_id=client_id, vente_id=vente_id)
+
+
+#------Paiements------
+def get_paiements(vente_id):
+    """Return the Paiement (id, date, montant, mode, note) rows of a vente, newest first."""
+    return _fetch_all(Paiement, """
+        SELECT id, date, montant, mode, note
+        FROM paiements
+        WHERE vente_id=?
+        ORDER BY date DESC
+    """, (vente_id,))
+
+
+def get_paiement_limit(paiement_id):
+    """Largest amount a payment can be changed to (the vente total minus its other payments), or None."""
+    row = get_connection().execute("""
+        SELECT IFNULL(v.montant_total, 0) - (v.paid_total - p.montant)
+        FROM ventes v
+        JOIN paiements p ON p.vente_id = v.id
+        WHERE p.id=?
+    """, (paiement_id,)).fetchone()
+    return None if row is None else max(row[0], 0)
+
+
+def add_paiement(vente_id, date, montant, mode, note=None):
+    with transaction() as conn:
+        c = conn.execute(
+            "INSERT INTO paiements(vente_id, date, montant, mode, note) VALUES (?,?,?,?,?)",
+            (vente_id, date, montant, mode, note)
+        )
+        client_id = _vente_client_id(conn, vente_id)
+    _notify(CHANGE_PAIEMENT, client_id=client_id, vente_id=vente_id, object_id=c.lastrowid)
+    return c.lastrowid
+
+
+def update_paiement(paiement_id, montant, mode):
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT p.vente_id, v.client_id FROM paiements p JOIN ventes v ON v.id = p.vente_id WHERE p.id=?",
+            (paiement_id,)
+        ).fetchone()
+        conn.execute("UPDATE paiements SET montant=?, mode=? WHERE id=?", (montant, mode, paiement_id))
+    vente_id, client_id = row if row else (None, None)
+    _notify(CHANGE_PAIEMENT, client_id=client_id, vente_id=vente_id, object_id=paiement_id)
+
+
+def delete_paiement(paiement_id):
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT p.vente_id, v.client_id FROM paiements p JOIN ventes v ON v.id = p.vente_id WHERE p.id=?",
+            (paiement_id,)
+        ).fetchone()
+        conn.execute("DELETE FROM paiements WHERE id=?", (paiement_id,))
+    vente_id, client_id = row if row else (None, None)
+    _notify(CHANGE_PAIEMENT, client_id=client_id, vente_id=vente_id, object_id=paiement_id)
 
 
+def reset_db():
+    """Reset the database by dropping all tables and recreating them"""
+    with transaction() as c:
+        # Drop all tables (children first, foreign keys are enforced)
+        c.execute("DROP TABLE IF EXISTS search_fts")
+        c.execute("DROP TABLE IF EXISTS client_category_quantities")
+        c.execute("DROP TABLE IF EXISTS client_balances")
+        c.execute("DROP TABLE IF EXISTS balance_totals")
+        c.execute("DROP TABLE IF EXISTS vente_items")
+        c.execute("DROP TABLE IF EXISTS paiements")
+        c.execute("DROP TABLE IF EXISTS ventes")
+        c.execute("DROP TABLE IF EXISTS clients")
+        c.execute("PRAGMA user_version = 0")
 
+    # Reinitialize the database
+    init_db()
+    _notify(CHANGE_ALL)
+
+
+#------Aged receivables------
+# Upper age (days) of each bucket but the last, as in AgingRow
+AGING_BUCKETS = (30, 60, 90)
+
+
+def get_aged_receivables(as_of=None):
+    """
+    AgingRow per client with something left to pay, by name: the materialized
+    reste of each unpaid vente, by the vente's age on as_of (date or ISO
+    string, default today). The balances are the current ones, as_of only
+    sets the ages: a vente dated after it counts in 0-30, one without a date
+    in +90. One pass over the partial index of the unpaid ventes.
+    """
+    if as_of is None:
+        as_of = date.today()
+    elif isinstance(as_of, str):
+        as_of = date.fromisoformat(as_of[:10])
+    # ISO dates compare as strings: no date arithmetic per row
+    d30, d60, d90 = ((as_of - timedelta(days=days)).isoformat() for days in AGING_BUCKETS)
+    return _fetch_all(AgingRow, """
+        SELECT c.id, c.nom, c.telephone, a.days_0_30, a.days_31_60, a.days_61_90, a.days_over_90, a.reste, a.oldest
+        FROM (
+            SELECT client_id,
+                   SUM(CASE WHEN date >= :d30 THEN reste ELSE 0 END) AS days_0_30,
+                   SUM(CASE WHEN date >= :d60 AND date < :d30 THEN reste ELSE 0 END) AS days_31_60,
+                   SUM(CASE WHEN date >= :d90 AND date < :d60 THEN reste ELSE 0 END) AS days_61_90,
+                   SUM(CASE WHEN date >= :d90 THEN 0 ELSE reste END) AS days_over_90,
+                   SUM(reste) AS reste,
+                   MIN(date) AS oldest
+            FROM ventes
+            WHERE reste > 0.0005
+            GROUP BY client_id
+        ) a
+        JOIN clients c ON c.id = a.client_id
+        ORDER BY c.nom
+    """, {"d30": d30, "d60": d60, "d90": d90})
+
+
+#------Maintenance------
+def backup_db(destination):
+    """
+    Copy the database to destination with SQLite's online backup: the copy is
+    consistent even while the application is writing (WAL included).
+    """
+    target = sqlite3.connect(destination)
+    try:
+        get_connection().backup(target)
+    finally:
+        target.close()
 
 
+def vacuum_db():
+    """Rebuild the database file to reclaim free pages. Returns (size before, size after) in bytes."""
+    conn = get_connection()
+    path = connection_manager.get_db_path()
+    before = os.path.getsize(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return before, os.path.getsize(path)
+
+
+def reindex_db():
+    """Rebuild every index, compact the full-text index and refresh the planner statistics."""
+    with transaction() as conn:
+        conn.execute("REINDEX")
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='search_fts'"
+        ).fetchone()
+        if exists:
+            conn.execute("INSERT INTO search_fts(search_fts) VALUES('optimize')")
+        conn.execute("ANALYZE")
+
+
+def get_db_stats():
+    """Row counts, balance totals and file figures of the database, as a dict."""
+    conn = get_connection()
+    stats = {"path": connection_manager.get_db_path(), "schema_version": migrations.get_schema_version()}
+    for table in ("clients", "ventes", "vente_items", "paiements", "products", "categories"):
+        stats[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    stats["unpaid_ventes"] = conn.execute("SELECT COUNT(*) FROM ventes WHERE reste > 0.0005").fetchone()[0]
+    stats["credit"], stats["paid"], stats["reste"] = get_balance_totals()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    stats["size"] = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    stats["free"] = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+    return stats
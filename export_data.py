@@ -0,0 +1,154 @@
+"""
+Typed tables for exports (PDF reports).
+
+Rows are built from the query results themselves, not from what a widget
+displays: amounts are Decimal, quantities int, and every column says what
+it holds. Totals are summed numerically, in one pass, and the display
+strings are only produced at the end.
+"""
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+# Column kinds
+TEXT = "text"
+QUANTITY = "quantity"  # int, summed
+MONEY = "money"        # Decimal (DT, 3 decimals), summed
+
+ExportColumn = namedtuple("ExportColumn", "title kind", defaults=(TEXT,))
+
+MILLIME = Decimal("0.001")
+
+
+def to_money(value):
+    """Amount read from SQLite (REAL) as a Decimal rounded to the millime."""
+    if value is None:
+        return Decimal(0)
+    if not isinstance(value, Decimal):
+        value = Decimal(repr(float(value)))
+    # + 0 turns the -0.000 left by float residue into 0.000
+    return value.quantize(MILLIME, rounding=ROUND_HALF_UP) + 0
+
+
+def to_quantity(value):
+    return int(value or 0)
+
+
+def format_cell(kind, value):
+    if value is None:
+        return ""
+    if kind == MONEY:
+        return f"{value:.3f} DT"
+    return str(value)
+
+
+class ExportTable:
+    """
+    columns: ExportColumn list; rows: tuples of typed values, one per column
+    (str for TEXT, int for QUANTITY, Decimal for MONEY).
+    known_totals: {column index: total} the caller already has (e.g. the
+    column totals of a SalesCube); those columns are not summed again.
+    """
+
+    def __init__(self, columns, rows=(), known_totals=None):
+        self.columns = list(columns)
+        self.rows = list(rows)
+        self.known_totals = dict(known_totals or {})
+
+    def totals(self):
+        """Sum of each QUANTITY/MONEY column, None for the TEXT columns."""
+        numeric = [i for i, col in enumerate(self.columns) if col.kind != TEXT and i not in self.known_totals]
+        sums = [None] * len(self.columns)
+        for i, total in self.known_totals.items():
+            sums[i] = total
+        for i in numeric:
+            sums[i] = Decimal(0) if self.columns[i].kind == MONEY else 0
+        for row in self.rows:
+            for i in numeric:
+                value = row[i]
+                if value is not None:
+                    sums[i] += value
+        return sums
+
+    def header(self):
+        return [col.title for col in self.columns]
+
+    def display_rows(self):
+        """Rows as display strings, formatted one at a time (a generator)."""
+        kinds = [col.kind for col in self.columns]
+        for row in self.rows:
+            yield [format_cell(kind, value) for kind, value in zip(kinds, row)]
+
+    def totals_row(self):
+        """The "Total" display row, or None (no rows, or nothing to sum)."""
+        kinds = [col.kind for col in self.columns]
+        if not self.rows or all(kind == TEXT for kind in kinds[1:]):
+            return None
+        totals = self.totals()
+        return ["Total"] + [format_cell(kind, value) for kind, value in zip(kinds[1:], totals[1:])]
+
+    def table_data(self, with_totals=True):
+        """Header row, display rows and the "Total" row, as lists of strings."""
+        data = [self.header()]
+        data.extend(self.display_rows())
+        totals = self.totals_row() if with_totals else None
+        if totals:
+            data.append(totals)
+        return data
+
+
+CLIENT_HEADERS = ["Client", "Téléphone", "Adresse", "Email"]
+
+
+def clients_table(balances, categories, category_quantities):
+    """
+    Client list, from database.get_client_balances() rows, get_categories()
+    and get_client_category_quantities().
+    """
+    columns = [ExportColumn(title) for title in CLIENT_HEADERS]
+    columns.extend(ExportColumn(cat_name, QUANTITY) for cat_id, cat_name, cat_desc in categories)
+    columns.extend([ExportColumn("Crédit", MONEY), ExportColumn("Reste à payer", MONEY)])
+    cat_ids = [cat[0] for cat in categories]
+    rows = []
+    for cid, nom, tel, adr, eml, credit, reste in balances:
+        quantities = category_quantities.get(cid, {})
+        values = [nom, tel or "", adr or "", eml or ""]
+        values.extend(to_quantity(quantities.get(cat_id, 0)) for cat_id in cat_ids)
+        values.extend([to_money(credit), to_money(reste)])
+        rows.append(tuple(values))
+    return ExportTable(columns, rows)
+
+
+def payments_table(paiements):
+    """Payment history of a vente, from database.get_paiements() rows."""
+    columns = [ExportColumn("Date"), ExportColumn("Montant", MONEY), ExportColumn("Mode")]
+    rows = [(str(date), to_money(montant), mode or "")
+            for pid, date, montant, mode, note in paiements]
+    return ExportTable(columns, rows)
+
+
+def statement_table(ventes):
+    """Account statement of a client, from database.get_client_ventes() rows."""
+    columns = [
+        ExportColumn("Date"), ExportColumn("Référence"), ExportColumn("Total DT", MONEY),
+        ExportColumn("Payé DT", MONEY), ExportColumn("Reste DT", MONEY),
+    ]
+    rows = []
+    for vid, date, reference, description, montant_total, paye in ventes:
+        total, paye = to_money(montant_total), to_money(paye)
+        rows.append((date or "", reference or "", total, paye, total - paye))
+    return ExportTable(columns, rows)
+
+
+AGING_HEADERS = ["Client", "Téléphone", "0-30 jours", "31-60 jours", "61-90 jours", "+90 jours",
+                 "Reste à payer", "Plus ancienne vente"]
+
+
+def aging_table(rows):
+    """Aged receivables (balance âgée), from database.get_aged_receivables() rows."""
+    columns = [ExportColumn(AGING_HEADERS[0]), ExportColumn(AGING_HEADERS[1])]
+    columns.extend(ExportColumn(title, MONEY) for title in AGING_HEADERS[2:7])
+    columns.append(ExportColumn(AGING_HEADERS[7]))
+    return ExportTable(columns, [
+        (nom, tel or "", to_money(d30), to_money(d60), to_money(d90), to_money(over), to_money(reste), oldest or "")
+        for cid, nom, tel, d30, d60, d90, over, reste, oldest in rows
+    ])
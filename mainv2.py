@@ -1,42 +1,39 @@
 import ctypes
-import os
-import tempfile
+import multiprocessing
 import sys
-import time
 from PySide6.QtWidgets import (
         QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-        QPushButton, QTableWidget, QTableWidgetItem,
+        QPushButton, QTableWidget, QTableWidgetItem, QTableView,
         QLineEdit, QMessageBox, QInputDialog, QDateEdit,
         QLabel, QFileDialog, QDialog, QFormLayout, QDialogButtonBox,
         QScrollArea, QComboBox, QProgressDialog
     )
 
 
-from PySide6.QtGui import QIcon, QImage
-from PySide6.QtCore import QDate, Qt
+from PySide6.QtGui import QIcon
+from PySide6.QtCore import QDate, Qt, QTimer
 from update_manager import UpdateChecker, AppUpdater, install_update
-from database import init_db, get_connection, reset_db, add_product, get_products, add_vente, add_vente_item, update_product, delete_product, add_category, get_categories, update_category, delete_category
+from database import init_db, reset_db, add_product, get_products, record_sale, get_bon_de_vente, get_client_category_quantities, get_client_balances, get_balance_totals, get_client, get_vente, get_aged_receivables, get_vente_summary, get_paiements, get_paiement_limit, add_client, update_client, delete_client, update_sale, delete_vente, add_paiement, update_paiement, delete_paiement, update_product, delete_product, add_category, get_categories, update_category, delete_category
 from datetime import date, datetime
 from PySide6.QtWidgets import QSplashScreen
 from PySide6.QtGui import QPixmap
-import resources_rc
 from PySide6.QtCore import Qt
-
-# ReportLab imports for PDF generation
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle,
-    Paragraph, Spacer
+from data_controllers import ClientSalesController, load_client_patch, load_home_data, search_client_ids
+from data_events import data_events
+from query_executor import query_executor
+from table_models import (
+    ClientsTableModel, SearchFilterProxyModel, ActionButtonsDelegate, ActionButton,
+    SalesTableModel, SalesFilterProxyModel, SalesActionsDelegate, AgingTableModel
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.lib.utils import ImageReader
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from datetime import datetime
-import os
+
+from app_paths import resource_path
+from export_data import AGING_HEADERS, payments_table
+# pdf_export / batch_export (ReportLab) are imported on the first export
 
 
+# Delay before a search box filters, so typing a word filters once
+SEARCH_DEBOUNCE_MS = 150
+
 #------Referenece generator for sales------
 def generate_reference():
         """Génère une référence automatique unique pour les ventes"""
@@ -46,456 +43,6 @@ def generate_reference():
         import random
         random_num = random.randint(1000, 9999)
         return f"V{timestamp}{random_num}"
-#-----pdf generation with ReportLab------
-def export_table_to_pdf(table, filename, title, client_info=None, exclude_columns=None):
-    """
-    Export table to PDF using ReportLab
-    exclude_columns: list of column indices to exclude from export
-    """
-    if exclude_columns is None:
-        exclude_columns = []
-
-    # Get ReportLab styles
-    styles = getSampleStyleSheet()
-
-    # Extract table data
-    rows = table.rowCount()
-    cols = table.columnCount()
-    export_cols = [col for col in range(cols) if col not in exclude_columns]
-
-    table_data = []
-
-    # Add headers
-    header_row = []
-    for col in export_cols:
-        header_item = table.horizontalHeaderItem(col)
-        if header_item:
-            header_row.append(header_item.text())
-        else:
-            header_row.append(f"Column {col+1}")
-    table_data.append(header_row)
-
-    # Add data rows
-    for row in range(rows):
-        data_row = []
-        for col in export_cols:
-            item = table.item(row, col)
-            if item:
-                text = item.text()
-                # Let generate_pdf_with_data handle text wrapping
-                data_row.append(text)
-            else:
-                # Handle widgets
-                widget = table.cellWidget(row, col)
-                if widget and isinstance(widget, QPushButton):
-                    data_row.append(widget.text())
-                else:
-                    data_row.append("")
-        table_data.append(data_row)
-
-    # Add totals row if there are numeric columns
-    if rows > 0:
-        totals_row = ["Total"]
-        has_totals = False
-        for col_idx, col in enumerate(export_cols):
-            if col_idx == 0:  # Skip first column (usually description/name)
-                continue
-            
-            # Skip phone number columns and address columns
-            header_item = table.horizontalHeaderItem(col)
-            if header_item:
-                header_text = header_item.text().lower()
-                if 'téléphone' in header_text or 'tel' in header_text or 'phone' in header_text or 'adresse' in header_text or 'address' in header_text or 'email' in header_text:
-                    totals_row.append("")
-                    continue
-            
-            total = 0
-            count = 0
-            for row in range(rows):
-                item = table.item(row, col)
-                if item:
-                    text = item.text()
-                    # Try to extract numeric value
-                    try:
-                        # Remove currency symbols and spaces
-                        clean_text = text.replace('DT', '').replace('DT', '').replace(' ', '').replace(',', '.')
-                        value = float(clean_text)
-                        total += value
-                        count += 1
-                    except (ValueError, AttributeError):
-                        pass
-            if count > 0:
-                # Determine column type from header
-                is_quantity = False
-                is_money_float = False  # Crédit, Reste à payer (float format)
-                is_money_int = False    # Total DT, Payé DT, etc. (integer format)
-                
-                if header_item:
-                    header_text = header_item.text().lower()
-                    
-                    # Quantity columns - no DT
-                    if 'qt' in header_text or 'qté' in header_text or 'quantity' in header_text or 'pcs' in header_text or 'pc' in header_text:
-                        is_quantity = True
-                    # Money columns with float format - float with DT
-                    elif 'crédit' in header_text or 'credit' in header_text or 'reste' in header_text:
-                        is_money_float = True
-                    # Money columns with integer format - integer with DT
-                    elif 'total dt' in header_text or 'payé dt' in header_text or 'paye dt' in header_text or 'total (dt)' in header_text:
-                        is_money_int = True
-                    # Category columns (like "TA", "TM", "2PCS", "3PCS") - treat as quantity, no DT
-                    elif len(header_text) <= 5 and not any(word in header_text for word in ['montant', 'amount', 'prix', 'price']):
-                        is_quantity = True
-                    else:
-                        # Default to integer money format
-                        is_money_int = True
-                
-                # Format accordingly
-                if is_quantity:
-                    # Quantity: integer without DT
-                    totals_row.append(str(int(total)))
-                elif is_money_float:
-                    # Crédit/Reste: float with 3 decimals and DT
-                    totals_row.append(f"{total:.3f} DT")
-                elif is_money_int:
-                    # Other amounts: integer with DT
-                    totals_row.append(f"{int(total)} DT")
-                else:
-                    # Default: integer without DT (safer)
-                    totals_row.append(str(int(total)))
-                has_totals = True
-            else:
-                totals_row.append("")
-
-        if has_totals:
-            table_data.append(totals_row)
-
-    # Generate PDF
-    generate_pdf_with_data(filename, table_data, title, client_info)
-#-------pdf styles and generation function------
-def generate_pdf_with_data(filename, table_data, title, client_info=None):
-    """
-    Generate a professional commercial report PDF with improved design
-    """
-    doc = SimpleDocTemplate(
-        filename,
-        pagesize=A4,
-        rightMargin=2 * cm,
-        leftMargin=2 * cm,
-        topMargin=6 * cm,  # Reduced from 7.5cm
-        bottomMargin=3 * cm
-    )
-
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # =============================================
-    # CUSTOM STYLES
-    # =============================================
-
-    # Professional title style
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Title'],
-        fontSize=18,  # Made smaller from 24
-        textColor=colors.HexColor("#1F2A44"),
-        spaceAfter=20,
-        alignment=TA_LEFT,  # Changed from TA_CENTER to TA_LEFT
-        fontName='Helvetica-Bold'
-    )
-
-    # Cell text style for wrapping
-    cell_style = ParagraphStyle(
-        'CellStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-        alignment=TA_LEFT
-    )
-
-    cell_style_center = ParagraphStyle(
-        'CellStyleCenter',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-        alignment=TA_CENTER
-    )
-
-    # =============================================
-    # TITLE SECTION WITH BULLET POINT
-    # =============================================
-    # Add bullet point to title
-    bullet_title = f"📄 {title}"
-    title_para = Paragraph(bullet_title, title_style)
-    elements.append(title_para)
-    elements.append(Spacer(1, 0.5 * cm))
-
-    # Client info with structured bullet points
-    if client_info:
-        # Parse client info and create structured display
-        info_parts = client_info.split(' | ')
-        if len(info_parts) >= 3:
-            client_name = info_parts[0].replace('Client: ', '')
-            total_amount = info_parts[1].replace('Montant Total: ', '')
-            remaining_amount = info_parts[2].replace('Reste à payer: ', '')
-
-            # Create a professional info box
-            # Info box data
-            info_data = [
-                ['👤 Client:', client_name],
-                ['💰 Montant Total:', total_amount],
-                ['💳 Reste a payer:', remaining_amount]
-            ]
-
-            # Create info table with box styling
-            info_table = Table(info_data, colWidths=[3.5 * cm, 12 * cm])
-
-            info_table.setStyle(TableStyle([
-                # Header styling (first column)
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor("#F7FAFC")),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (0, -1), 8),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor("#1F2A44")),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-
-                # Data styling (second column)
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (1, 0), (1, -1), 8),
-                ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor("#2D3748")),
-                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-                ('VALIGN', (1, 0), (1, -1), 'MIDDLE'),
-
-                # Box styling
-                ('BOX', (0, 0), (-1, -1), 1.5, colors.HexColor("#1F2A44")),
-                ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#E2E8F0")),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ]))
-
-            elements.append(info_table)
-            elements.append(Spacer(1, 0.5 * cm))
-        else:
-            # Fallback for other formats
-            client_style = ParagraphStyle(
-                'ClientStyle',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.HexColor("#1F2A44"),
-                spaceAfter=10,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            client_para = Paragraph(f"📋 {client_info}", client_style)
-            elements.append(client_para)
-            elements.append(Spacer(1, 0.3 * cm))
-
-    # =============================================
-    # PROFESSIONAL TABLE WITH TEXT WRAPPING
-    # =============================================
-
-    # Wrap text in cells to prevent overflow
-    wrapped_data = []
-    for row_idx, row in enumerate(table_data):
-        wrapped_row = []
-        for col_idx, cell in enumerate(row):
-            if row_idx == 0:  # Header row - keep as is
-                wrapped_row.append(cell)
-            else:  # Data rows - wrap text
-                # First column left-aligned, others centered
-                style = cell_style if col_idx == 0 else cell_style_center
-                wrapped_row.append(Paragraph(str(cell), style))
-        wrapped_data.append(wrapped_row)
-
-    # Calculate column widths based on number of columns and content type
-    num_cols = len(table_data[0]) if table_data else 4
-
-    # Determine column widths based on content type
-    if num_cols == 7:  # History format (Date, Amount, Mode, Note, Client, Description, Total)
-        col_widths = [2 * cm, 2 * cm, 1.8 * cm, 2.5 * cm, 2.5 * cm, 3 * cm, 2 * cm]
-    elif num_cols == 6:
-        # Client list format with "Téléphone" header
-        if any("Téléphone" in str(h) or "Tél" in str(h) for h in table_data[0]):
-            # Slightly narrower table for nicer left/right margins in PDF
-            col_widths = [3 * cm, 3 * cm, 3.5 * cm, 3.5 * cm, 3 * cm, 3 * cm]
-        else:  # Sales format with client info
-            col_widths = [2.5 * cm, 3 * cm, 3 * cm, 3 * cm, 3 * cm, 2.5 * cm]
-    elif num_cols == 5:  # Client list format (Name, Phone, Address, Email, Credit)
-        col_widths = [3.5 * cm, 3 * cm, 5 * cm, 4.5 * cm, 3 * cm]
-    elif num_cols == 4:  # Standard format or History (Date, Amount, Mode, Note)
-        col_widths = [3 * cm, 3 * cm, 3.5 * cm, 6 * cm]  # Optimized for history format
-    else:
-        # Auto-calculate for other formats
-        total_width = A4[0] - 4 * cm  # Account for margins
-        col_widths = [total_width / num_cols] * num_cols
-
-    table = Table(wrapped_data, repeatRows=1, colWidths=col_widths)
-    # Center the client list table to preserve margins
-    if num_cols == 6 and any("Téléphone" in str(h) or "Tél" in str(h) for h in table_data[0]):
-        table.hAlign = "CENTER"
-
-    # Enhanced table styling
-    table.setStyle(TableStyle([
-        # Header styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1F2A44")),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),  # Reduced from 11 to prevent overflow
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),  # Reduced from 12
-        ('TOPPADDING', (0, 0), (-1, 0), 8),  # Reduced from 12
-
-        # Data rows styling
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # First column left-aligned
-        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Other columns centered
-        ('VALIGN', (0, 1), (-1, -1), 'TOP'),  # Changed to TOP for wrapped text
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ('LEFTPADDING', (0, 1), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 1), (-1, -1), 10),
-
-        # Alternating row colors for readability
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#F5F7FA")]),
-
-        # Grid lines
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#E0E0E0")),
-        ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor("#1F2A44")),
-
-        # Total row (if exists)
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor("#E8EAF0")),
-    ]))
-
-    elements.append(table)
-
-    # =============================================
-    # HEADER & FOOTER FUNCTIONS
-    # =============================================
-
-    def header_footer(canvas, doc):
-        canvas.saveState()
-
-        # =============================================
-        # HEADER SECTION
-        # =============================================
-
-        # Header background (subtle gradient effect with rectangle)
-        canvas.setFillColor(colors.HexColor("#F8F9FA"))
-        canvas.rect(0, A4[1] - 5.2 * cm, A4[0], 5.2 * cm, fill=True, stroke=False)  # Reduced from 6.5cm
-
-        # Header dimensions
-        header_y_base = A4[1] - 2 * cm
-        left_margin = 2 * cm
-        right_margin = A4[0] - 2 * cm
-
-        # =============================================
-        # COMPANY NAME (LEFT - LARGER & BOLD)
-        # =============================================
-        canvas.setFillColor(colors.HexColor("#1F2A44"))
-        canvas.setFont("Helvetica-Bold", 22)
-        canvas.drawString(left_margin, header_y_base, "Tuniplast")
-
-        # =============================================
-        # COMPANY INFORMATION (LEFT - PROFESSIONAL SPACING)
-        # =============================================
-        info_y = header_y_base - 0.9 * cm
-        line_height = 0.45 * cm
-
-        canvas.setFillColor(colors.HexColor("#4A5568"))
-        canvas.setFont("Helvetica", 7)
-
-        info_lines = [
-            "KM 6 ROUTE DE TUNIS SOLIMAN NABEUL, NABEUL",
-            "Représentant commercial : Sami Nasraoui",
-            "Email : nasrauisami@gmail.com",
-            "Tél : 20 400 041",
-            "TVA: 1500874L/A/M/000"
-        ]
-        
-        for i, line in enumerate(info_lines):
-            canvas.drawString(left_margin + 0.1 * cm, info_y - (i * line_height), line)
-
-        # Calculate info box positions
-        info_box_height = len(info_lines) * line_height
-        info_box_top = info_y
-        info_box_bottom = info_y - info_box_height
-
-        # =============================================
-        # LOGO (RIGHT - LEVEL WITH FIRST INFO LINE)
-        # =============================================
-        logo_path = resource_path("assets/logo.png")
-        logo_size = 2.5 * cm  # Slightly smaller logo
-        logo_x = right_margin - logo_size
-        logo_y = info_y - (logo_size / 2) + 0.15 * cm  # Align center of logo with first info line
-
-        if logo_path and os.path.exists(logo_path):
-            try:
-                canvas.drawImage(
-                    ImageReader(logo_path),
-                    logo_x,
-                    logo_y,
-                    width=logo_size,
-                    height=logo_size,
-                    mask="auto",
-                    preserveAspectRatio=True
-                )
-            except Exception as e:
-                # Logo placeholder if image fails
-                canvas.setFillColor(colors.HexColor("#4A90E2"))
-                canvas.rect(logo_x, logo_y, logo_size, logo_size, fill=True, stroke=True)
-                canvas.setFillColor(colors.white)
-                canvas.setFont("Helvetica-Bold", 10)
-                canvas.drawCentredString(
-                    logo_x + logo_size/2,
-                    logo_y + logo_size/2,
-                    "LOGO"
-                )
-
-        # =============================================
-        # ELEGANT SEPARATOR LINE
-        # =============================================
-        separator_y = header_y_base - 3 * cm  # Adjusted for smaller header
-        canvas.setStrokeColor(colors.HexColor("#1F2A44"))
-        canvas.setLineWidth(1.5)
-        canvas.line(left_margin, separator_y, right_margin, separator_y)
-
-        # Accent line (thinner, below main line)
-        canvas.setStrokeColor(colors.HexColor("#4A90E2"))
-        canvas.setLineWidth(0.5)
-        canvas.line(left_margin, separator_y - 0.15 * cm, right_margin, separator_y - 0.15 * cm)
-
-        # =============================================
-        # FOOTER SECTION
-        # =============================================
-
-        footer_y = 2 * cm
-
-        # Footer separator line
-        canvas.setStrokeColor(colors.HexColor("#E0E0E0"))
-        canvas.setLineWidth(0.5)
-        canvas.line(left_margin, footer_y + 0.5 * cm, right_margin, footer_y + 0.5 * cm)
-
-        # Footer text
-        canvas.setFillColor(colors.HexColor("#718096"))
-        canvas.setFont("Helvetica", 8.5)
-
-        # Page number (left)
-        canvas.drawString(left_margin, footer_y, f"Page {doc.page}")
-
-        # Generated date (right)
-        date_str = datetime.now().strftime('%d/%m/%Y à %H:%M')
-        canvas.drawRightString(right_margin, footer_y, f"Généré le {date_str}")
-
-        canvas.restoreState()
-
-    # =============================================
-    # BUILD PDF
-    # =============================================
-    doc.build(elements, onFirstPage=header_footer, onLaterPages=header_footer)
 #-------Edit Client Dialog------
 class EditClientDialog(QDialog):
         def __init__(self, client_data, parent=None):
@@ -626,10 +173,19 @@ class CategoriesManagerDialog(QDialog):
         self.refresh_btn.clicked.connect(self.refresh)
 
         self.refresh()
+        self.finished.connect(lambda _: query_executor().cancel(f"categories.{id(self)}"))
 
     def refresh(self):
+        # Read in the background, fill in _fill()
+        self.refresh_btn.setEnabled(False)
+        self.refresh_btn.setText("Chargement...")
+        query_executor().submit(f"categories.{id(self)}", get_categories, on_result=self._fill)
+
+    def _fill(self, categories):
+        self.refresh_btn.setEnabled(True)
+        self.refresh_btn.setText("Actualiser")
         self.table.setRowCount(0)
-        for cat in get_categories():
+        for cat in categories:
             row = self.table.rowCount()
             self.table.insertRow(row)
             self.table.setItem(row, 0, QTableWidgetItem(str(cat[0])))
@@ -774,24 +330,31 @@ class ProductsManagerDialog(QDialog):
         self.refresh_btn.clicked.connect(self.refresh)
 
         self.refresh()
+        self.finished.connect(lambda _: query_executor().cancel(f"products.{id(self)}"))
 
     def refresh(self):
+        # Products and categories are read in the background, filled in _fill()
+        self.refresh_btn.setEnabled(False)
+        self.refresh_btn.setText("Chargement...")
+        query_executor().submit(
+            f"products.{id(self)}", lambda: (get_products(), get_categories()), on_result=self._fill
+        )
+
+    def _fill(self, data):
+        products, categories = data
+        category_names = {cat[0]: cat[1] for cat in categories}
+        self.refresh_btn.setEnabled(True)
+        self.refresh_btn.setText("Actualiser")
         self.table.setRowCount(0)
-        for p in get_products():
+        for p in products:
             row = self.table.rowCount()
             self.table.insertRow(row)
             self.table.setItem(row, 0, QTableWidgetItem(str(p[0])))
             self.table.setItem(row, 1, QTableWidgetItem(p[1]))
             self.table.setItem(row, 2, QTableWidgetItem(f"{p[2]:.3f}"))
             
-            # Get category name from category_id
-            category_name = "Aucune"
-            if p[3]:  # p[3] is category_id
-                categories = get_categories()
-                for cat in categories:
-                    if cat[0] == p[3]:
-                        category_name = cat[1]
-                        break
+            # Get category name from category_id (p[3])
+            category_name = category_names.get(p[3], "Aucune") if p[3] else "Aucune"
             self.table.setItem(row, 3, QTableWidgetItem(category_name))
 
             # Actions: Edit / Delete
@@ -954,7 +517,9 @@ class AddVenteDialog(QDialog):
                     else:
                         qty = 0
                     
-                    # Always add items, even with qty=0, to maintain consistent ordering
+                    # Products left at 0 are not part of the sale
+                    if qty == 0:
+                        continue
                     item_total = qty * float(unit_price)
                     self.items.append({
                         'product_id': prod_id,
@@ -1091,6 +656,7 @@ class HistDialog(QDialog):
         super().__init__(parent)
         self.vente_id = vente_id
         self._empty_label = None
+        self.paiements = []  # get_paiements() rows shown, also used for the PDF
         self.setWindowTitle("Historique des paiements")
         self.resize(1000, 400)
 
@@ -1129,6 +695,7 @@ class HistDialog(QDialog):
 
         # Fill data
         self.load_history()
+        self.finished.connect(lambda _: query_executor().cancel(f"history.{id(self)}"))
 
         # Add print button
         btn_pdf = QPushButton("Imprimer Historique")
@@ -1151,21 +718,19 @@ class HistDialog(QDialog):
 
     def load_history(self):
         if not self.vente_id:
+            self.paiements = []
             self.table.setRowCount(0)
             self._set_empty_state(True)
             return
+        # Read in the background, filled in _fill_history()
+        self.setWindowTitle("Historique des paiements (chargement...)")
+        query_executor().submit(
+            f"history.{id(self)}", get_paiements, self.vente_id, on_result=self._fill_history
+        )
 
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute("""
-            SELECT p.id, p.date, p.montant, p.mode, p.note
-            FROM paiements p
-            WHERE p.vente_id=?
-            ORDER BY p.date DESC
-        """, (self.vente_id,))
-        rows = c.fetchall()
-        conn.close()
-
+    def _fill_history(self, rows):
+        self.setWindowTitle("Historique des paiements")
+        self.paiements = rows
         self.table.setRowCount(0)
         if not rows:
             self._set_empty_state(True)
@@ -1229,19 +794,11 @@ class HistDialog(QDialog):
 
     def edit_payment(self, payment_id, current_amount, current_mode, current_note):
         try:
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("SELECT montant_total FROM ventes WHERE id=?", (self.vente_id,))
-            total_sale = c.fetchone()[0] or 0
-            c.execute("""
-                SELECT IFNULL(SUM(montant), 0)
-                FROM paiements
-                WHERE vente_id=? AND id<>?
-            """, (self.vente_id, payment_id))
-            others_sum = c.fetchone()[0] or 0
-            conn.close()
-
-            max_amount = max(total_sale - others_sum, 0)
+            # Vente total minus the other payments
+            max_amount = get_paiement_limit(payment_id)
+            if max_amount is None:
+                QMessageBox.warning(self, "Erreur", "Paiement introuvable.")
+                return
             montant, ok = QInputDialog.getDouble(
                 self, "Modifier Paiement",
                 f"Montant du paiement (max {max_amount:.3f} DT):",
@@ -1269,18 +826,10 @@ class HistDialog(QDialog):
             # if not ok_note:
             #     return
 
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("""
-                UPDATE paiements
-                SET montant=?, mode=?
-                WHERE id=?
-            """, (montant, mode, payment_id))
-            conn.commit()
-            conn.close()
+            # Open views are patched through the data change notifications
+            update_paiement(payment_id, montant, mode)
 
             self.load_history()
-            self._refresh_parent()
             QMessageBox.information(self, "Succes", "Paiement modifie avec succes!")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la modification:{str(e)}")
@@ -1298,51 +847,20 @@ class HistDialog(QDialog):
             return
 
         try:
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("DELETE FROM paiements WHERE id=?", (payment_id,))
-            conn.commit()
-            conn.close()
+            delete_paiement(payment_id)
 
             self.load_history()
-            self._refresh_parent()
             QMessageBox.information(self, "Succes", "Paiement supprime avec succes!")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la suppression:{str(e)}")
 
-    def _refresh_parent(self):
-        parent = self.parent()
-        if parent and hasattr(parent, "refresh_ventes"):
-            parent.refresh_ventes()
-        if parent and hasattr(parent, "update_credit"):
-            parent.update_credit()
-
     def print_history(self):
         from datetime import datetime
         # Get reference, client name, and description
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute("""
-            SELECT v.reference, c.nom, v.description, v.montant_total
-            FROM ventes v
-            JOIN clients c ON v.client_id = c.id
-            WHERE v.id=?
-        """, (self.vente_id,))
-        result = c.fetchone()
-
-        # Calculate total payments made for this sale
-        c.execute("""
-            SELECT COALESCE(SUM(montant), 0) as total_payments
-            FROM paiements
-            WHERE vente_id=?
-        """, (self.vente_id,))
-        payment_result = c.fetchone()
-        conn.close()
+        result = get_vente_summary(self.vente_id)
 
         if result:
-            ref, client_nom, description, montant_total = result
-            total_payments = payment_result[0] if payment_result else 0
-            reste_a_payer = montant_total - total_payments
+            ref, client_nom, description, montant_total, reste_a_payer = result
 
             title = f"Historique des Paiements - Vente: {ref}"
 
@@ -1352,8 +870,8 @@ class HistDialog(QDialog):
             default_filename = f"historique_paiements_{ref.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             filename, _ = QFileDialog.getSaveFileName(self, "Exporter en PDF", default_filename, "PDF Files (*.pdf)")
             if filename:
-                export_table_to_pdf(self.table, filename, title, client_info, exclude_columns=[3])
-                QMessageBox.information(self, "Succes", f"Le PDF a ete exporte avec succes :{filename}")
+                from pdf_export import export_to_pdf
+                export_to_pdf(payments_table(self.paiements), filename, title, client_info)
         else:
             QMessageBox.warning(self, "Erreur", "Impossible de recuperer les informations de la vente.")
 #-----Add Payment Dialog------
@@ -1400,6 +918,94 @@ class AddPaiementDialog(QDialog):
             'note': self.note_edit.text().strip()
         }
 
+#-----Aged Receivables Dialog------
+class AgingDialog(QDialog):
+    """Balance âgée : reste à payer de chaque client par ancienneté des ventes."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Balance âgée")
+        self.resize(1100, 600)
+        self._load_key = f"aging.{id(self)}"
+
+        layout = QVBoxLayout(self)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Ancienneté au :"))
+        self.as_of_edit = QDateEdit(QDate.currentDate())
+        self.as_of_edit.setToolTip("Date de calcul de l'ancienneté des ventes (les restes à payer sont ceux du jour)")
+        self.as_of_edit.setCalendarPopup(True)
+        self.as_of_edit.setDisplayFormat("dd/MM/yyyy")
+        top_layout.addWidget(self.as_of_edit)
+        btn_refresh = QPushButton("🔄 Actualiser")
+        btn_refresh.clicked.connect(self.load)
+        top_layout.addWidget(btn_refresh)
+        top_layout.addStretch()
+        btn_pdf = QPushButton("📄 PDF")
+        btn_pdf.setToolTip("Exporter la balance âgée en PDF")
+        btn_pdf.clicked.connect(self.export_pdf)
+        top_layout.addWidget(btn_pdf)
+        layout.addLayout(top_layout)
+
+        # Model/view: a row per client with something left to pay, sortable by column
+        self.model = AgingTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        layout.addWidget(self.table)
+
+        self.totals_label = QLabel()
+        self.totals_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.totals_label)
+
+        self.finished.connect(lambda _: query_executor().cancel(self._load_key))
+        self.load()
+
+    def as_of(self):
+        return self.as_of_edit.date().toString("yyyy-MM-dd")
+
+    def load(self):
+        """Read in the background (one query), shown by _fill()"""
+        self.setWindowTitle("Balance âgée (chargement...)")
+        query_executor().submit(
+            self._load_key, get_aged_receivables, self.as_of(),
+            on_result=self._fill, on_error=self._load_error
+        )
+
+    def _fill(self, rows):
+        self.setWindowTitle(f"Balance âgée au {self.as_of_edit.date().toString('dd/MM/yyyy')}")
+        self.model.set_rows(rows)
+        # Keep the order the user chose
+        header = self.table.horizontalHeader()
+        self.model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+        totals = [sum(row[i] for row in rows) for i in range(3, 8)]
+        self.totals_label.setText(
+            f"{len(rows)} client(s) | " + " | ".join(
+                f"{title} : {total:.3f} DT" for title, total in zip(AGING_HEADERS[2:7], totals)
+            )
+        )
+
+    def _load_error(self, error):
+        self.setWindowTitle("Balance âgée")
+        QMessageBox.critical(self, "Erreur", f"Erreur lors du calcul de la balance âgée:\n{str(error)}")
+
+    def export_pdf(self):
+        if not self.model.rows:
+            QMessageBox.information(self, "Balance âgée", "Aucun reste à payer à cette date.")
+            return
+        as_of = self.as_of_edit.date()
+        default_filename = f"balance_agee_{as_of.toString('yyyyMMdd')}_{datetime.now().strftime('%H%M%S')}.pdf"
+        filename, _ = QFileDialog.getSaveFileName(self, "Exporter en PDF", default_filename, "PDF Files (*.pdf)")
+        if filename:
+            from pdf_export import export_to_pdf
+            export_to_pdf(self.model.export_table(), filename, f"Balance âgée au {as_of.toString('dd/MM/yyyy')}")
+
 #------------------------ Main Window ------------------#   
 
 class Home(QWidget):
@@ -1428,12 +1034,12 @@ class Home(QWidget):
                 QPushButton:pressed {
                     background-color: #005A9E;
                 }
-                QTableWidget {
+                QTableView {
                     gridline-color: #CCCCCC;
                     selection-background-color: #E6F3FF;
                     font-size: 9pt;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 4px;
                     font-size: 9pt;
                 }
@@ -1454,7 +1060,12 @@ class Home(QWidget):
 
             self.search_edit = QLineEdit()
             self.search_edit.setPlaceholderText("Tapez pour rechercher...")
-            self.search_edit.textChanged.connect(self.filter_clients)
+            # Debounced: filter once typing pauses, not on every keystroke
+            self.search_timer = QTimer(self)
+            self.search_timer.setSingleShot(True)
+            self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+            self.search_timer.timeout.connect(self.filter_clients)
+            self.search_edit.textChanged.connect(lambda _: self.search_timer.start())
             search_layout.addWidget(self.search_edit)
 
             # Stretch pushes the button to the right
@@ -1514,6 +1125,14 @@ class Home(QWidget):
 
             btn_layout.addWidget(self.btn_add)
             btn_layout.addWidget(self.btn_pdf_clients)
+            self.btn_batch_pdf = QPushButton("🗂️ Export groupé")
+            self.btn_batch_pdf.setToolTip("Exporter un relevé PDF par client (ou les bons de vente impayés) dans une archive ZIP")
+            self.btn_batch_pdf.clicked.connect(self.batch_pdf)
+            btn_layout.addWidget(self.btn_batch_pdf)
+            self.btn_aging = QPushButton("⏳ Balance âgée")
+            self.btn_aging.setToolTip("Reste à payer par client, par ancienneté (0-30, 31-60, 61-90, +90 jours)")
+            self.btn_aging.clicked.connect(lambda: AgingDialog(self).exec())
+            btn_layout.addWidget(self.btn_aging)
             # Products manager button
             self.btn_products = QPushButton("📦 Produits")
             self.btn_products.setToolTip("Gérer les produits")
@@ -1533,18 +1152,27 @@ class Home(QWidget):
             # Get categories for dynamic columns
             self.categories = get_categories()  # List of (id, name, description) tuples
             num_categories = len(self.categories)
+            self.category_quantities = {}
             
             # Table columns: Client + Téléphone + Adresse + Email + [Categories] + Crédit + Reste à payer + Actions
-            num_cols = 6 + num_categories + 1  # 6 fixed + categories + 1 for Actions
-            self.table = QTableWidget(0, num_cols)
-            
-            # Build headers dynamically - Categories come after Email
-            headers = ["Client", "Téléphone", "Adresse", "Email"]
-            for cat_id, cat_name, cat_desc in self.categories:
-                headers.append(cat_name)
-            headers.extend(["Crédit", "Reste à payer", "Actions"])
-            
-            self.table.setHorizontalHeaderLabels(headers)
+            # Model/view: only visible rows are painted, the actions are drawn by a delegate
+            self.model = ClientsTableModel(self.categories, self)
+            self.proxy = SearchFilterProxyModel(self)
+            self.proxy.setSourceModel(self.model)
+            self.table = QTableView()
+            self.table.setModel(self.proxy)
+            self.table.setMouseTracking(True)
+            self.table.setEditTriggers(QTableView.NoEditTriggers)
+            self.table.setSelectionBehavior(QTableView.SelectRows)
+            self.table.verticalHeader().setDefaultSectionSize(30)
+
+            self.actions_delegate = ActionButtonsDelegate([
+                ActionButton("details", "👁️ Détails", "#28A745", "#218838"),
+                ActionButton("edit", "✏️ Modifier", "#0078D4", "#106EBE"),
+                ActionButton("delete", "🗑️ Suppr", "#D13438", "#B91C1C"),
+            ], self.table)
+            self.actions_delegate.clicked.connect(self.on_client_action)
+            self.table.setItemDelegateForColumn(self.model.actions_column, self.actions_delegate)
             # Configuration de l'espacement des colonnes (plus compact)
             self.table.setColumnWidth(0, 160)  # Client
             self.table.setColumnWidth(1, 100)  # Téléphone
@@ -1580,6 +1208,9 @@ class Home(QWidget):
 
             # Totals section
             totals_layout = QHBoxLayout()
+            self.loading_label = QLabel("⏳ Chargement...")
+            self.loading_label.setVisible(False)
+            totals_layout.addWidget(self.loading_label)
             self.total_credit_label = QLabel("Total Crédit: 0.000 DT")
             self.total_paye_label = QLabel("Total Payé: 0.000 DT")
             self.total_reste_label = QLabel("Total Reste: 0.000 DT")
@@ -1591,6 +1222,15 @@ class Home(QWidget):
 
             self.load_clients()
 
+            # Writes anywhere in the app patch the affected client row
+            events = data_events()
+            events.client_changed.connect(self.on_client_changed)
+            events.vente_changed.connect(self.on_client_sales_changed)
+            events.paiement_changed.connect(self.on_client_sales_changed)
+            events.products_changed.connect(self.refresh_category_quantities)
+            events.categories_changed.connect(self.refresh_category_quantities)
+            events.reset.connect(self.load_clients)
+
         def top_button(self, text):
             btn = QPushButton(text)
             btn.setFixedHeight(30)
@@ -1682,185 +1322,92 @@ class Home(QWidget):
                  # ---------------- DATA ----------------
         
         def load_clients(self):
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("""
-                SELECT c.id, c.nom, c.telephone, c.adresse, c.email,
-                    IFNULL(SUM(v.montant_total), 0) AS total_credit,
-                    IFNULL(SUM(v.montant_total - IFNULL(v.paye, 0)), 0) AS total_reste
-                FROM clients c
-                LEFT JOIN (
-                    SELECT v.id, v.client_id, v.montant_total,
-                        IFNULL(SUM(p.montant), 0) AS paye
-                    FROM ventes v
-                    LEFT JOIN paiements p ON v.id = p.vente_id
-                    GROUP BY v.id, v.client_id, v.montant_total
-                ) v ON c.id = v.client_id
-                GROUP BY c.id, c.nom, c.telephone, c.adresse, c.email
-                ORDER BY c.nom
-            """)
-            rows = c.fetchall()
-            conn.close()
+            """Read clients, quantities and totals in the background (see on_clients_loaded)"""
+            self.loading_label.setVisible(True)
+            query_executor().submit(
+                "home.clients", load_home_data,
+                on_result=self.on_clients_loaded, on_error=self.on_load_error
+            )
 
-            self.clients_cache = rows
+        def on_clients_loaded(self, data):
+            rows, self.category_quantities, totals = data
+            self.loading_label.setVisible(False)
             self.populate_table(rows)
-            print(self.clients_cache)
+            self.show_totals(*totals)
 
-            # Calculate totals
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("""
-                SELECT SUM(montant_total) FROM ventes
-            """)
-            total_credit = c.fetchone()[0] or 0
-            c.execute("""
-                SELECT IFNULL(SUM(paye), 0), IFNULL(SUM(montant_total - paye), 0) FROM (
-                    SELECT v.id, v.montant_total, IFNULL(SUM(p.montant), 0) as paye
-                    FROM ventes v
-                    LEFT JOIN paiements p ON v.id = p.vente_id
-                    GROUP BY v.id, v.montant_total
-                ) as summary
-            """)
-            result = c.fetchone()
-            total_paye = result[0] if result and result[0] else 0
-            total_reste = result[1] if result and result[1] else 0
-            conn.close()
+        def on_load_error(self, error):
+            self.loading_label.setVisible(False)
+            QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des clients:\n{str(error)}")
+
+        def update_totals(self):
+            query_executor().submit(
+                "home.totals", get_balance_totals,
+                on_result=lambda totals: self.show_totals(*totals), on_error=self.on_load_error
+            )
+
+        def show_totals(self, total_credit, total_paye, total_reste):
             self.total_credit_label.setText(f"Total Crédit: {total_credit:.3f} DT")
             self.total_paye_label.setText(f"Total Payé: {total_paye:.3f} DT")
             self.total_reste_label.setText(f"Total Reste: {total_reste:.3f} DT")
 
         def populate_table(self, rows):
-            self.table.setUpdatesEnabled(False)
-            self.table.setRowCount(0)
-            num_categories = len(self.categories)
+            self.model.set_clients(rows, self.category_quantities)
 
-            for r, (cid, nom, tel, adr, eml, credit, reste) in enumerate(rows):
-                self.table.insertRow(r)
-                self.table.setItem(r, 0, QTableWidgetItem(nom))
-                self.table.setItem(r, 1, QTableWidgetItem(tel or ""))
-                self.table.setItem(r, 2, QTableWidgetItem(adr or ""))
-                self.table.setItem(r, 3, QTableWidgetItem(eml or ""))
-                
-                # Calculate quantities for each category
-                conn = get_connection()
-                c = conn.cursor()
-                for cat_idx, (cat_id, cat_name, cat_desc) in enumerate(self.categories):
-                    c.execute("""
-                        SELECT IFNULL(SUM(vi.quantity), 0)
-                        FROM vente_items vi
-                        JOIN ventes v ON vi.vente_id = v.id
-                        JOIN products p ON vi.product_id = p.id
-                        WHERE v.client_id = ? AND p.category_id = ?
-                    """, (cid, cat_id))
-                    qty_result = c.fetchone()
-                    total_qty = qty_result[0] if qty_result else 0
-                    self.table.setItem(r, 4 + cat_idx, QTableWidgetItem(str(int(total_qty))))
-                
-                # Add Crédit and Reste columns after categories
-                self.table.setItem(r, 4 + num_categories, QTableWidgetItem(f"{credit:.3f} DT"))
-                self.table.setItem(r, 5 + num_categories, QTableWidgetItem(f"{reste:.3f} DT"))
-                conn.close()
-
-                action_widget = QWidget()
-                action_layout = QHBoxLayout(action_widget)
-                action_layout.setContentsMargins(2, 2, 2, 2)
-
-                btn_del = QPushButton("🗑️")
-                btn_del.clicked.connect(lambda _, x=cid, n=nom: self.delete_client(x, n))
-                action_layout.addWidget(btn_del)
-
-
-
-                actions_widget = QWidget()
-                actions_layout = QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(1, 1, 1, 1)
-                actions_layout.setSpacing(1)
-
-                # Bouton Détails
-                btn_view = QPushButton("👁️ Détails")
-                btn_view.setStyleSheet("""
-                    QPushButton {
-                        background-color: #28A745;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #218838;
-                    }
-                """)
-                btn_view.clicked.connect(lambda _, x=cid: self.client_detail(x))
-                actions_layout.addWidget(btn_view)
-
-                # Bouton Modifier
-                btn_edit = QPushButton("✏️ Modifier")
-                btn_edit.setStyleSheet("""
-                    QPushButton {
-                        background-color: #0078D4;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #106EBE;
-                    }
-                """)
-                btn_edit.clicked.connect(lambda _, x=cid: self.edit_client(x))
-                actions_layout.addWidget(btn_edit)
-
-                # Bouton de suppression
-                btn_delete = QPushButton("🗑️ Suppr")
-                btn_delete.setStyleSheet("""
-                    QPushButton {
-                        background-color: #D13438;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #B91C1C;
-                    }
-                """)
-                btn_delete.clicked.connect(lambda _, x=cid, n=nom: self.delete_client(x, n))
-                actions_layout.addWidget(btn_delete)
-
-                self.table.setCellWidget(r, 6 + num_categories, actions_widget)
+        def on_client_changed(self, client_id):
+            """Patch one client row and the totals instead of reloading the list"""
+            if query_executor().is_pending("home.clients"):
+                # The load in flight may predate this write: load again
+                self.load_clients()
+                return
+            # One key per client: only the last change of a client is applied
+            query_executor().submit(
+                f"home.client.{client_id}", load_client_patch, client_id,
+                on_result=self.on_client_patch_loaded, on_error=self.on_load_error
+            )
+            self.update_totals()
 
+        def on_client_patch_loaded(self, patch):
+            self.model.patch_client(*patch)
 
-            
+        def on_client_sales_changed(self, client_id, vente_id):
+            self.on_client_changed(client_id)
+
+        def refresh_category_quantities(self):
+            query_executor().submit(
+                "home.category_quantities", get_client_category_quantities,
+                on_result=self.on_category_quantities_loaded, on_error=self.on_load_error
+            )
 
-            self.table.setUpdatesEnabled(True)
+        def on_category_quantities_loaded(self, category_quantities):
+            self.category_quantities = category_quantities
+            self.model.set_category_quantities(category_quantities)
+
+        def on_client_action(self, action, index):
+            source_row = self.proxy.mapToSource(index).row()
+            cid = self.model.client_id(source_row)
+            if action == "details":
+                self.client_detail(cid)
+            elif action == "edit":
+                self.edit_client(cid)
+            elif action == "delete":
+                self.delete_client(cid, self.model.client_name(source_row))
 
         def filter_clients(self):
-            text = self.search_edit.text().lower().strip()
-            if not text:
-                self.populate_table(self.clients_cache)
+            text = self.search_edit.text()
+            self.proxy.set_search_text(text)
+            if not text.strip():
+                query_executor().cancel("home.search")
                 return
+            # Clients found by sale reference or item description join the
+            # matches when the full-text search returns; a newer text cancels it
+            query_executor().submit(
+                "home.search", search_client_ids, text,
+                on_result=lambda client_ids: self.on_search_hits(text, client_ids)
+            )
 
-            filtered = [
-                r for r in self.clients_cache
-                if text in (r[1] or "").lower()
-                or text in (r[2] or "").lower()
-                or text in (r[3] or "").lower()
-                or text in (r[4] or "").lower()
-            ]
-            self.populate_table(filtered)
-            print(filtered)
+        def on_search_hits(self, text, client_ids):
+            self.model.set_full_text_hits(text, client_ids)
+            self.proxy.refilter()
 
         def delete_client(self, client_id, client_name):
             """Supprime un client après confirmation"""
@@ -1881,33 +1428,11 @@ class Home(QWidget):
             
             if msg_box.clickedButton() == btn_oui:
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    
-                    # Get all vente_ids for this client first
-                    c.execute("SELECT id FROM ventes WHERE client_id=?", (client_id,))
-                    vente_ids = [row[0] for row in c.fetchall()]
-                    
-                    # Delete vente_items for all ventes of this client
-                    for vente_id in vente_ids:
-                        c.execute("DELETE FROM vente_items WHERE vente_id=?", (vente_id,))
-                    
-                    # Supprimer les paiements associés aux ventes du client
-                    c.execute("DELETE FROM paiements WHERE vente_id IN (SELECT id FROM ventes WHERE client_id=?)", (client_id,))
-                    
-                    # Supprimer les ventes du client
-                    c.execute("DELETE FROM ventes WHERE client_id=?", (client_id,))
-                    
-                    # Supprimer le client
-                    c.execute("DELETE FROM clients WHERE id=?", (client_id,))
-                    
-                    conn.commit()
-                    conn.close()
-                    
+                    # Ventes, items and payments are deleted with the client
+                    delete_client(client_id)
+
                     QMessageBox.information(self, "Succès", f"Client '{client_name}' supprimé avec succès.")
                     
-                    self.load_clients()  # Recharger la liste
-                    
                 except Exception as e:
                     QMessageBox.critical(self, "Erreur", f"Erreur lors de la suppression:\n{str(e)}")
 
@@ -1915,11 +1440,7 @@ class Home(QWidget):
             """Modifie un client existant"""
             try:
                 # Récupérer les données actuelles du client
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("SELECT nom, telephone, adresse, email FROM clients WHERE id=?", (client_id,))
-                client_data = c.fetchone()
-                conn.close()
+                client_data = get_client(client_id)
 
                 if not client_data:
                     QMessageBox.warning(self, "Erreur", "Client introuvable.")
@@ -1942,18 +1463,9 @@ class Home(QWidget):
                         return
 
                     # Mettre à jour le client
-                    conn = get_connection()
-                    c = conn.cursor()
-                    c.execute("""
-                        UPDATE clients 
-                        SET nom=?, telephone=?, adresse=?, email=?
-                        WHERE id=?
-                    """, (data['nom'].strip(), data['telephone'].strip(), 
-                        data['adresse'].strip(), data['email'].strip(), client_id))
-                    conn.commit()
-                    conn.close()
+                    update_client(client_id, data['nom'].strip(), data['telephone'].strip(),
+                                  data['adresse'].strip(), data['email'].strip())
 
-                    self.load_clients()
                     QMessageBox.information(self, "Succès", "Client modifié avec succès!")
 
             except Exception as e:
@@ -1965,11 +1477,35 @@ class Home(QWidget):
             default_filename = f"liste_clients_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             filename, _ = QFileDialog.getSaveFileName(self, "Exporter en PDF", default_filename, "PDF Files (*.pdf)")
             if filename:
-                # Exclure la colonne "Actions" which is at position 6 + num_categories
-                num_categories = len(self.categories)
-                actions_col = 6 + num_categories
-                export_table_to_pdf(self.table, filename, "Liste des Clients", exclude_columns=[actions_col])
-                QMessageBox.information(self, "Succès", f"Le PDF a été exporté avec succès :\n{filename}")
+                from pdf_export import export_to_pdf
+                # Lignes affichées (filtre de recherche), sans la colonne "Actions"
+                export_to_pdf(self.model.export_table(self.proxy.source_rows()), filename, "Liste des Clients")
+
+        def batch_pdf(self):
+            """Relevés de tous les clients (ou bons de vente impayés) dans une archive ZIP."""
+            import batch_export
+            from pdf_export import export_queue, PdfExportJob
+            choices = {
+                "Relevés des clients avec un reste à payer": batch_export.STATEMENTS_UNPAID,
+                "Relevés de tous les clients": batch_export.STATEMENTS_ALL,
+                "Bons de vente impayés": batch_export.UNPAID_SALES,
+            }
+            choice, ok = QInputDialog.getItem(self, "Export groupé", "Documents à exporter :", list(choices), 0, False)
+            if not ok:
+                return
+            what = choices[choice]
+            filename, _ = QFileDialog.getSaveFileName(
+                self, "Exporter en ZIP", batch_export.default_archive_name(what), "Archive ZIP (*.zip)"
+            )
+            if not filename:
+                return
+            if not filename.lower().endswith(".zip"):
+                filename += ".zip"
+            # Rendered by a pool of processes, queued like the other exports
+            export_queue().enqueue(PdfExportJob(
+                filename, batch_export.export_batch, (what,), f"Export groupé : {choice}",
+                f"L'export groupé a été enregistré :\n{filename}"
+            ))
 
         def reset_database(self):
             # Show confirmation dialog
@@ -1984,9 +1520,8 @@ class Home(QWidget):
 
             if reply == QMessageBox.StandardButton.Yes:
                 try:
+                    # Views reload through the reset notification
                     reset_db()
-                    # Refresh the table to show empty data
-                    self.load_clients()
                     QMessageBox.information(self, "Succès", "La base de données a été réinitialisée avec succès.")
                 except Exception as e:
                     QMessageBox.critical(self, "Erreur", f"Erreur lors de la réinitialisation: {str(e)}")
@@ -2024,55 +1559,36 @@ class Home(QWidget):
                     return
 
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    c.execute("INSERT INTO clients(nom, telephone, adresse, email) VALUES (?,?,?,?)",
-                            (data['nom'].strip(), data['telephone'].strip(), data['adresse'].strip(), data['email'].strip()))
-                    conn.commit()
-                    conn.close()
-
-                    self.load_clients()
+                    add_client(data['nom'].strip(), data['telephone'].strip(), data['adresse'].strip(), data['email'].strip())
                     QMessageBox.information(self, "Succès", "Client ajouté avec succès!")
 
                 except Exception as e:
                     QMessageBox.critical(self, "Erreur", f"Erreur lors de l'ajout du client:\n{str(e)}")
 
         def client_detail(self, client_id):
+            # Changes made in the dialog are patched in as they happen
             dlg = ClientDetail(client_id)
             dlg.exec()
-            self.load_clients()
 
 #---------------- Détail Client ----------------
 
 class ClientDetail(QDialog):
         def __init__(self, client_id):
             super().__init__()
-            self.ventes_cache = []  # <-- cache all ventes here
             self.client_id = client_id
+            # Loaded ventes/items; reloaded only after a write invalidates them
+            self.data = ClientSalesController(client_id)
+            self._load_key = f"client_detail.{id(self)}"
+            self._read_keys = set()  # keys of the _submit() reads
             self.use_date_filter = False  # Don't filter by date initially
 
-            #fetch client info
+            #fetch client info (the credit comes with the ventes, see load_ventes)
+            self.client_total_ventes = 0
             try:
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                    SELECT c.nom,
-                        IFNULL(SUM(v.montant_total),0) as total_ventes
-                    FROM clients c
-                    LEFT JOIN ventes v ON c.id=v.client_id
-                    WHERE c.id=?
-                """, (client_id,))
-                client = c.fetchone()
-                conn.close()
-                if client:
-                    client_name = client[0]
-                    self.client_total_ventes = client[1] or 0
-                else:
-                    client_name = "Client Inconnu"
-                    self.client_total_ventes = 0
+                client = get_client(client_id)
+                client_name = client[0] if client else "Client Inconnu"
             except Exception as e:
                 client_name = "Client Inconnu"
-                self.client_total_ventes = 0
                 print(f"Erreur lors de la récupération des informations du client: {str(e)}")
 
             
@@ -2097,11 +1613,11 @@ class ClientDetail(QDialog):
                 QPushButton:hover {
                     background-color: #106EBE;
                 }
-                QTableWidget {
+                QTableView {
                     gridline-color: #CCCCCC;
                     selection-background-color: #E6F3FF;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 5px;
                 }
                 QDateEdit {
@@ -2118,7 +1634,6 @@ class ClientDetail(QDialog):
             search_layout.addWidget(QLabel("🔍 Rechercher vente:"))
             self.search_vente_edit = QLineEdit()
             self.search_vente_edit.setPlaceholderText("Référence ou description...")
-            self.search_vente_edit.textChanged.connect(self.load_ventes)
             search_layout.addWidget(self.search_vente_edit)
 
             search_layout.addWidget(QLabel("De:"))
@@ -2160,16 +1675,20 @@ class ClientDetail(QDialog):
             num_products = len(self.products)
             
             # Create table with dynamic columns: Date + Référence + products + Total Qty + Total DT + Payé DT + Reste DT + Actions
-            num_cols = 2 + num_products + 5  # Date + Ref + products + Total Qty + Total DT + Payé DT + Reste DT + Actions
-            self.table = QTableWidget(0, num_cols)
-            
-            # Build headers dynamically
-            headers = ["Date", "Référence"]
-            for prod_id, prod_name, prod_price, cat_id in self.products:
-                headers.append(prod_name)
-            headers.extend(["Qt total", "Total DT", "Payé DT", "Reste DT", "Actions"])
-            
-            self.table.setHorizontalHeaderLabels(headers)
+            # Model/view: filtering goes through the proxy, no widget is rebuilt
+            self.model = SalesTableModel(self.products, self)
+            self.proxy = SalesFilterProxyModel(self)
+            self.proxy.setSourceModel(self.model)
+            self.table = QTableView()
+            self.table.setModel(self.proxy)
+            self.table.setMouseTracking(True)
+            self.table.setEditTriggers(QTableView.NoEditTriggers)
+            self.table.setSelectionBehavior(QTableView.SelectRows)
+            self.table.verticalHeader().setDefaultSectionSize(30)
+
+            self.actions_delegate = SalesActionsDelegate(self.table)
+            self.actions_delegate.clicked.connect(self.on_vente_action)
+            self.table.setItemDelegateForColumn(self.model.actions_column, self.actions_delegate)
             
             # Configuration de l'espacement des colonnes
             self.table.setColumnWidth(0, 100)  # Date
@@ -2211,6 +1730,9 @@ class ClientDetail(QDialog):
             self.total_paye_client_label.setStyleSheet("font-weight: bold;")
             self.total_reste_client_label.setStyleSheet("font-weight: bold;")
 
+            self.loading_label = QLabel("⏳ Chargement...")
+            self.loading_label.setVisible(False)
+            totals_layout.addWidget(self.loading_label)
             totals_layout.addStretch()
             totals_layout.addWidget(self.client_credit_label)
             totals_layout.addWidget(self.total_paye_client_label)
@@ -2218,290 +1740,134 @@ class ClientDetail(QDialog):
 
             self.layout.addLayout(totals_layout)
 
-            self.load_ventes()  # load once
+            self.load_ventes()  # load once (in the background)
             self.apply_filters()      # show filtered view
 
-            self.search_vente_edit.textChanged.connect(self.apply_filters)
-            self.btn_filter.clicked.connect(self.enable_date_filter)
-            self.btn_refresh.clicked.connect(self.refresh_ventes)
+            # Debounced: filter once typing pauses, not on every keystroke
+            self.search_timer = QTimer(self)
+            self.search_timer.setSingleShot(True)
+            self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+            self.search_timer.timeout.connect(self.apply_filters)
+            self.search_vente_edit.textChanged.connect(lambda _: self.search_timer.start())
+
+            # Patch single ventes when they (or their payments) change
+            events = data_events()
+            events.vente_changed.connect(self.on_vente_changed)
+            events.paiement_changed.connect(self.on_vente_changed)
+            events.reset.connect(self.refresh_ventes)
+            self.finished.connect(self._disconnect_events)
 
         def load_ventes(self):
-            """Load all ventes once and cache them"""
-            try:
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                    SELECT v.id, v.date, v.reference, v.description, v.montant_total,
-                        IFNULL(SUM(p.montant), 0) as paye
-                    FROM ventes v
-                    LEFT JOIN paiements p ON v.id = p.vente_id
-                    WHERE v.client_id=?
-                    GROUP BY v.id, v.date, v.reference, v.description, v.montant_total
-                    ORDER BY v.date DESC
-                """, (self.client_id,))
-                self.ventes_cache = c.fetchall()
-                # Preload items for ventes to avoid many queries later
-                # build a dict: vente_id -> list of items
-                c.execute("SELECT id, vente_id, product_id, description, quantity, unit_price, total_price FROM vente_items WHERE vente_id IN (SELECT id FROM ventes WHERE client_id=?)", (self.client_id,))
-                items_rows = c.fetchall()
-                self.vente_items_map = {}
-                for iid, vente_id, product_id, description, quantity, unit_price, total_price in items_rows:
-                    self.vente_items_map.setdefault(vente_id, []).append({
-                        'id': iid,
-                        'product_id': product_id,
-                        'description': description,
-                        'quantity': quantity,
-                        'unit_price': unit_price,
-                        'total_price': total_price
-                    })
-                conn.close()
+            """Show the client's ventes, reading them in the background only if the data was invalidated"""
+            if not self.data.stale:
+                return
+            self.loading_label.setVisible(True)
+            query_executor().submit(
+                self._load_key, self.data.fetch,
+                on_result=self.on_ventes_loaded, on_error=self.on_load_error
+            )
 
-                # Calculate totals for this client
-                total_paye = sum(row[5] for row in self.ventes_cache)
-                total_reste = sum(row[4] - row[5] for row in self.ventes_cache)
-                self.total_paye_client_label.setText(f"Total Payé: {total_paye:.3f} DT")
-                self.total_reste_client_label.setText(f"Total Reste: {total_reste:.3f} DT")
+        def on_ventes_loaded(self, data):
+            self.loading_label.setVisible(False)
+            self.data.set_data(data)
+            self.update_totals()
+            self.populate_table(self.data.ventes)
 
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des ventes:\n{str(e)}")
-            print(self.ventes_cache)
+        def on_load_error(self, error):
+            self.loading_label.setVisible(False)
+            QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des ventes:\n{str(error)}")
 
         def apply_filters(self):
-            """Filter ventes from cache instead of querying DB each time"""
-            search_text = self.search_vente_edit.text().lower().strip()
-            from_date = self.date_from.date().toPython()
-            to_date = self.date_to.date().toPython()
-
-            filtered = []
-
-            for vid, d, ref, desc, total, paye in self.ventes_cache:
-                date_obj = QDate.fromString(d, "yyyy-MM-dd").toPython() if isinstance(d, str) else d
-
-                # Date filter
-                if self.use_date_filter:
-                    if date_obj < from_date or date_obj > to_date:
-                        continue
-
-                # Search filter
-                if search_text:
-                    if search_text not in (ref or "").lower() and search_text not in (desc or "").lower():
-                        continue
+            """Filter ventes in the proxy instead of rebuilding the table"""
+            date_range = None
+            if self.use_date_filter:
+                # Dates are stored as ISO strings, compare them as such
+                date_range = (
+                    self.date_from.date().toString("yyyy-MM-dd"),
+                    self.date_to.date().toString("yyyy-MM-dd"),
+                )
+            self.proxy.set_filters(self.search_vente_edit.text(), date_range)
 
-                filtered.append((vid, d, ref, desc, total, paye))
+        def on_vente_changed(self, client_id, vente_id):
+            if client_id != self.client_id:
+                return
+            if self.data.stale:
+                # The load in flight may predate this write: load again
+                if query_executor().is_pending(self._load_key):
+                    self.load_ventes()
+                return
+            # One key per vente: only the last change of a vente is applied
+            self._submit(f"vente.{vente_id}", self.data.fetch_vente, vente_id, on_result=self.on_vente_patch_loaded)
 
-            self.populate_table(filtered)
-            print(filtered)
+        def on_vente_patch_loaded(self, patch):
+            if self.data.stale:
+                # A full load is in flight and includes this change
+                return
+            self.data.apply_vente(*patch)
+            self.model.patch_vente(*patch)
+            self.update_totals()
+
+        def _submit(self, name, fn, *args, on_result):
+            """Background read owned by this dialog (cancelled when it closes)."""
+            key = f"detail.{id(self)}.{name}"
+            self._read_keys.add(key)
+            query_executor().submit(key, fn, *args, on_result=on_result, on_error=self.on_read_error)
+
+        def on_read_error(self, error):
+            QMessageBox.critical(self, "Erreur", f"Erreur de lecture de la vente:\n{str(error)}")
+
+        def _disconnect_events(self):
+            query_executor().cancel(self._load_key)
+            for key in self._read_keys:
+                query_executor().cancel(key)
+            events = data_events()
+            events.vente_changed.disconnect(self.on_vente_changed)
+            events.paiement_changed.disconnect(self.on_vente_changed)
+            events.reset.disconnect(self.refresh_ventes)
+
+        def update_totals(self):
+            self.update_credit()
+            self.total_paye_client_label.setText(f"Total Payé: {self.data.total_paye:.3f} DT")
+            self.total_reste_client_label.setText(f"Total Reste: {self.data.total_reste:.3f} DT")
 
         def update_credit(self):
-            try:
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                    SELECT IFNULL(SUM(v.montant_total),0) as total_ventes
-                    FROM clients c
-                    LEFT JOIN ventes v ON c.id=v.client_id
-                    WHERE c.id=?
-                """, (self.client_id,))
-                total_ventes = c.fetchone()[0] or 0
-                conn.close()
-                self.client_total_ventes = total_ventes
-                self.client_credit_label.setText(f"Crédit Client: {self.client_total_ventes:.3f} DT")
-            except Exception as e:
-                print(f"Erreur lors de la mise à jour du crédit: {str(e)}")
+            self.client_total_ventes = self.data.total_credit
+            self.client_credit_label.setText(f"Crédit Client: {self.client_total_ventes:.3f} DT")
 
         def populate_table(self, rows):
-            """Populate table with given rows (from cache)"""
-            self.table.setUpdatesEnabled(False)
-            self.table.setRowCount(0)
-
-            num_products = len(self.products)
-
-            for row_idx, (vid, d, ref, desc, total, paye) in enumerate(rows):
-                reste = total - paye
-
-                self.table.insertRow(row_idx)
-                self.table.setItem(row_idx, 0, QTableWidgetItem(d))
-                self.table.setItem(row_idx, 1, QTableWidgetItem(ref or ""))
-                
-                # Get items for this vente
-                items = getattr(self, 'vente_items_map', {}).get(vid, [])
-                
-                # Map items by product_id to get quantities
-                product_qty_map = {}  # {product_id: quantity}
-                total_qty = 0.0
-                
-                if items:
-                    for item in items:
-                        prod_id = item.get('product_id')
-                        qty = float(item.get('quantity') or 0)
-                        product_qty_map[prod_id] = qty
-                        total_qty += qty
-                
-                # Fill product quantity columns with actual product ids
-                for col_idx, (prod_id, prod_name, prod_price, cat_id) in enumerate(self.products):
-                    qty = product_qty_map.get(prod_id, 0.0)
-                    display_text = str(int(qty))
-                    self.table.setItem(row_idx, 2 + col_idx, QTableWidgetItem(display_text))
-                
-                # Fill Total Qty column
-                total_qty_col = 2 + num_products
-                self.table.setItem(row_idx, total_qty_col, QTableWidgetItem(str(int(total_qty))))
-                
-                # Fill Total, Payé, Reste columns
-                self.table.setItem(row_idx, total_qty_col + 1, QTableWidgetItem(f"{total:.3f} DT"))
-                self.table.setItem(row_idx, total_qty_col + 2, QTableWidgetItem(f"{paye:.3f} DT"))
-                self.table.setItem(row_idx, total_qty_col + 3, QTableWidgetItem(f"{reste:.3f} DT"))
-
-                # Conteneur pour tous les boutons d'action (horizontal)
-                actions_widget = QWidget()
-                actions_layout = QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(1, 1, 1, 1)
-                actions_layout.setSpacing(1)
-                btn_hist=QPushButton("📜 Historique")
-                btn_hist.setStyleSheet("""
-                    QPushButton {
-                        background-color: #6C757D;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #5A6268;
-                    }
-                """)
-                
-                btn_hist.clicked.connect(lambda _, x=vid: self.show_hist(x))
-                actions_layout.addWidget(btn_hist)
-
-                # Bouton Imprimer
-                btn_print = QPushButton("🖨️ Imprimer")
-                btn_print.setStyleSheet("""
-                    QPushButton {
-                        background-color: #17A2B8;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #138496;
-                    }
-                """)
-                btn_print.clicked.connect(lambda _, x=vid: self.print_single_vente(x))
-                actions_layout.addWidget(btn_print)
-
-                # Bouton Payer ou Status
-                if reste > 0:
-                    btn_action = QPushButton("💰 Payer")
-                    btn_action.setStyleSheet("""
-                        QPushButton {
-                            background-color: #FF8C00;
-                            color: white;
-                            border: none;
-                            padding: 2px 3px;
-                            border-radius: 3px;
-                            font-size: 7pt;
-                            text-align: center;
-                            min-width: 40px;
-                            max-width: 80px;
-                        }
-                        QPushButton:hover {
-                            background-color: #E67E00;
-                        }
-                    """)
-                    btn_action.clicked.connect(lambda _, x=vid: self.add_paiement(x))
-                else:
-                    btn_action = QPushButton("✅ Payé")
-                    btn_action.setStyleSheet("""
-                        QPushButton {
-                            background-color: #28A745;
-                            color: white;
-                            border: none;
-                            padding: 2px 3px;
-                            border-radius: 3px;
-                            font-size: 7pt;
-                            text-align: center;
-                            min-width: 40px;
-                            max-width: 80px;
-                        }
-                    """)
-                    btn_action.setEnabled(False)
-                actions_layout.addWidget(btn_action)
-
-
-                 # Bouton Modifier
-                btn_edit = QPushButton("✏️ Modifier")
-                btn_edit.setStyleSheet("""
-                    QPushButton {
-                        background-color: #0078D4;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                                       
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                        
-                            
-                    }
-                    QPushButton:hover {
-                        background-color: #106EBE;
-                    }
-                """)
-                btn_edit.clicked.connect(lambda _, x=vid: self.edit_vente(x))
-                actions_layout.addWidget(btn_edit)
-
-
-                # Bouton Supprimer
-                btn_delete = QPushButton("🗑️ Suppr")
-                btn_delete.setStyleSheet("""
-                    QPushButton {
-                        background-color: #D13438;
-                        color: white;
-                        border: none;
-                        padding: 2px 3px;
-                        border-radius: 3px;
-                        font-size: 7pt;
-                        text-align: center;
-                        min-width: 40px;
-                        max-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #B91C1C;
-                    }
-                """)
-                btn_delete.clicked.connect(lambda _, x=vid, r=ref or f"Vente #{vid}": self.delete_vente(x, r))
-                actions_layout.addWidget(btn_delete)
-
-                # Set actions widget in the last column (Actions)
-                actions_col = 2 + num_products + 4  # After Date, Ref, Products, Total Qty, Total DT, Payé DT, Reste DT
-                self.table.setCellWidget(row_idx, actions_col, actions_widget)
-
-            self.table.setUpdatesEnabled(True)
+            """Load the given rows (from cache) into the sales model"""
+            self.model.set_ventes(rows, self.data.items)
+
+        def on_vente_action(self, action, index):
+            source_row = self.proxy.mapToSource(index).row()
+            vid = self.model.vente_id(source_row)
+            if action == "history":
+                self.show_hist(vid)
+            elif action == "print":
+                self.print_single_vente(vid)
+            elif action == "pay":
+                self.add_paiement(vid)
+            elif action == "edit":
+                self.edit_vente(vid)
+            elif action == "delete":
+                self.delete_vente(vid, self.model.vente_reference(source_row))
             
         def enable_date_filter(self):
             self.use_date_filter = True
             self.apply_filters()
 
         def refresh_ventes(self):
+            """Reload after a write (or on demand) and reset the filters"""
+            self.data.invalidate()
             self.load_ventes()
-            self.apply_filters()
-            self.update_credit()
             self.use_date_filter = False
+            self.search_timer.stop()
+            self.search_vente_edit.blockSignals(True)
             self.search_vente_edit.clear()
+            self.search_vente_edit.blockSignals(False)
             self.date_from.setDate(QDate.currentDate().addDays(-7))
             self.date_to.setDate(QDate.currentDate())
+            self.apply_filters()
             
         def delete_vente(self, vente_id, vente_ref):
             """Supprime une vente après confirmation"""
@@ -2522,62 +1888,26 @@ class ClientDetail(QDialog):
             
             if msg_box.clickedButton() == btn_oui:
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    
-                    # Supprimer les items de la vente d'abord
-                    c.execute("DELETE FROM vente_items WHERE vente_id=?", (vente_id,))
-                    
-                    # Supprimer les paiements associés à la vente
-                    c.execute("DELETE FROM paiements WHERE vente_id=?", (vente_id,))
-                    
-                    # Supprimer la vente
-                    c.execute("DELETE FROM ventes WHERE id=?", (vente_id,))
-                    
-                    conn.commit()
-                    conn.close()
-                    
+                    # Items and payments are deleted with the vente
+                    delete_vente(vente_id)
+
                     QMessageBox.information(self, "Succès", f"Vente '{vente_ref}' supprimée avec succès.")
-                    self.refresh_ventes()  # Recharger la liste
-                    self.update_credit()
                     
                 except Exception as e:
                     QMessageBox.critical(self, "Erreur", f"Erreur lors de la suppression:\n{str(e)}")
 
         def edit_vente(self, vente_id):
             """Modifie une vente existante - avec édition des items"""
-            try:
-                # Récupérer les données actuelles de la vente
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                    SELECT v.reference, v.description, v.montant_total, IFNULL(SUM(p.montant), 0) as paye
-                    FROM ventes v
-                    LEFT JOIN paiements p ON v.id = p.vente_id
-                    WHERE v.id=?
-                    GROUP BY v.id
-                """, (vente_id,))
-                vente_data = c.fetchone()
-                
-                # Récupérer les items de la vente
-                c.execute("""
-                    SELECT product_id, description, quantity, unit_price, total_price
-                    FROM vente_items
-                    WHERE vente_id=?
-                    ORDER BY id
-                """, (vente_id,))
-                items = c.fetchall()
-                
-                # Close connection immediately after fetching data to prevent locks
-                c.close()
-                conn.close()
+            # The vente and its items are read in the background (see on_edit_vente_loaded)
+            self._submit("edit", self.data.fetch_vente, vente_id, on_result=self.on_edit_vente_loaded)
 
-                if not vente_data:
+        def on_edit_vente_loaded(self, patch):
+            vente_id, vente, items = patch
+            try:
+                if not vente:
                     QMessageBox.warning(self, "Erreur", "Vente introuvable.")
                     return
-
-                reference, description, total, paye = vente_data
-                current_reste = total - paye
+                reference, total = vente.reference, vente.montant_total
 
                 # Open AddVenteDialog for editing (reuse the same dialog)
                 dialog = AddVenteDialog(self)
@@ -2586,9 +1916,7 @@ class ClientDetail(QDialog):
                 dialog.ref_edit.setText(reference or '')
                 
                 # Pre-fill product quantities from existing items
-                product_qty_map = {}
-                for prod_id, item_desc, qty, unit_price, total_price in items:
-                    product_qty_map[prod_id] = qty
+                product_qty_map = {item.product_id: item.quantity for item in items}
                 
                 # Set quantities in the dialog
                 for i, (qty_input, product) in enumerate(dialog.qty_inputs):
@@ -2616,35 +1944,13 @@ class ClientDetail(QDialog):
                         QMessageBox.warning(self, "Erreur", "Le montant doit être un nombre valide.")
                         return
 
-                    # Mettre à jour la vente et ses items
-                    conn = get_connection()
-                    c = conn.cursor()
-                    
-                    try:
-                        # Update vente
-                        c.execute("""
-                            UPDATE ventes 
-                            SET reference=?, montant_total=?
-                            WHERE id=?
-                        """, (data['reference'], montant, vente_id))
-                        
-                        # Delete old items
-                        c.execute("DELETE FROM vente_items WHERE vente_id=?", (vente_id,))
-                        
-                        # Insert new items directly (avoid nested connections)
-                        for item in data.get('items', []):
-                            c.execute("""
-                                INSERT INTO vente_items (vente_id, product_id, description, quantity, unit_price, total_price) 
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            """, (vente_id, item.get('product_id'), item.get('name'), 
-                                  item.get('quantity'), item.get('unit_price'), item.get('total')))
-                        
-                        conn.commit()
-                    finally:
-                        c.close()
-                        conn.close()
-
-                    self.refresh_ventes()
+                    # Mettre à jour la vente et ses items (une transaction)
+                    items = [
+                        (it.get('product_id'), it.get('name'), it.get('quantity'), it.get('unit_price'), it.get('total'))
+                        for it in data.get('items', [])
+                    ]
+                    update_sale(vente_id, data['reference'], montant, items)
+
                     QMessageBox.information(self, "Succès", "Vente modifiée avec succès!")
 
             except Exception as e:
@@ -2652,11 +1958,7 @@ class ClientDetail(QDialog):
 
         def pdf_table(self):
             # Obtenir le nom du client pour le titre
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("SELECT nom FROM clients WHERE id=?", (self.client_id,))
-            client_nom = c.fetchone()[0]
-            conn.close()
+            client_nom = get_client(self.client_id).nom
 
             title = f"Ventes - Client: {client_nom}"
             # Générer un nom de fichier avec le nom du client (sanitize special characters)
@@ -2665,386 +1967,37 @@ class ClientDetail(QDialog):
             default_filename = f"ventes_{safe_client_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             filename, _ = QFileDialog.getSaveFileName(self, "Exporter en PDF", default_filename, "PDF Files (*.pdf)")
             if filename:
-                # Exclure la colonne "Actions" (last column) qui contient les boutons
-                num_products = len(self.products)
-                actions_col = 2 + num_products + 4
-                export_table_to_pdf(self.table, filename, title, exclude_columns=[actions_col])
-                QMessageBox.information(self, "Succès", f"Le PDF a été exporté avec succès :\n{filename}")
+                from pdf_export import export_to_pdf
+                # Lignes affichées (filtres), sans la colonne "Actions"
+                export_to_pdf(self.model.export_table(self.proxy.source_rows()), filename, title)
 
         def print_single_vente(self, vente_id):
             """Print a single vente to PDF with professional design"""
             try:
-                conn = get_connection()
-                c = conn.cursor()
-                
-                # Get vente details
-                c.execute("""
-                    SELECT v.date, v.reference, v.montant_total, 
-                        IFNULL(SUM(p.montant), 0) as paye,
-                        c.nom as client_nom, c.telephone, c.adresse
-                    FROM ventes v
-                    LEFT JOIN paiements p ON v.id = p.vente_id
-                    LEFT JOIN clients c ON v.client_id = c.id
-                    WHERE v.id = ?
-                    GROUP BY v.id, v.date, v.reference, v.montant_total
-                """, (vente_id,))
-                
-                vente = c.fetchone()
-                if not vente:
+                sale = get_bon_de_vente(vente_id)
+                if sale is None:
                     QMessageBox.warning(self, "Erreur", "Vente non trouvée")
                     return
-                
-                date, reference, montant_total, paye, client_nom, telephone, adresse = vente
-                reste = montant_total - paye
-                
-                # Get vente items
-                c.execute("""
-                    SELECT description, quantity, unit_price, total_price
-                    FROM vente_items
-                    WHERE vente_id = ?
-                    ORDER BY id
-                """, (vente_id,))
-                items = c.fetchall()
-                
-                conn.close()
-                
-                # Generate PDF
-                from reportlab.lib.pagesizes import A4
-                from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-                from reportlab.lib.units import cm
-                from reportlab.lib import colors
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-                from datetime import datetime
-                
+                vente, items = sale
+                client_nom, reference = vente[4], vente[1]
+
                 # Create more descriptive filename with client name and reference
                 safe_client_name = client_nom.replace(' ', '_').replace('/', '_') if client_nom else "client"
                 safe_reference = reference.replace(' ', '_').replace('/', '_') if reference else "unknown"
                 default_filename = f"bon_de_vente_{safe_client_name}_{safe_reference}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                filename, _ = QFileDialog.getSaveFileName(self, "Exporter Bon de Vente en PDF", 
+                filename, _ = QFileDialog.getSaveFileName(self, "Exporter Bon de Vente en PDF",
                                                         default_filename, "PDF Files (*.pdf)")
-                
+
                 if not filename:
                     return
-                
-                doc = SimpleDocTemplate(
-                    filename,
-                    pagesize=A4,
-                    rightMargin=2 * cm,
-                    leftMargin=2 * cm,
-                    topMargin=6 * cm,
-                    bottomMargin=3 * cm
-                )
-                
-                story = []
-                styles = getSampleStyleSheet()
-                
-                # Header and Footer function
-                def header_footer(canvas, doc):
-                    canvas.saveState()
-                    
-                    # ============================================= 
-                    # HEADER SECTION
-                    # ============================================= 
-                    # Header background
-                    canvas.setFillColor(colors.HexColor("#F8F9FA"))
-                    canvas.rect(0, A4[1] - 5.2 * cm, A4[0], 5.2 * cm, fill=True, stroke=False)
-                    
-                    # Header dimensions
-                    header_y_base = A4[1] - 2 * cm
-                    left_margin = 2 * cm
-                    right_margin = A4[0] - 2 * cm
-                    
-                    # ============================================= 
-                    # COMPANY NAME (LEFT - LARGER & BOLD)
-                    # ============================================= 
-                    canvas.setFillColor(colors.HexColor("#1F2A44"))
-                    canvas.setFont("Helvetica-Bold", 22)
-                    canvas.drawString(left_margin, header_y_base, "Tuniplast")
-                    
-                    # ============================================= 
-                    # COMPANY INFORMATION (LEFT)
-                    # ============================================= 
-                    info_y = header_y_base - 0.9 * cm
-                    line_height = 0.45 * cm
-                    canvas.setFillColor(colors.HexColor("#4A5568"))
-                    canvas.setFont("Helvetica", 7)
-                    
-                    info_lines = [
-                        "KM 6 ROUTE DE TUNIS SOLIMAN NABEUL, NABEUL",
-                        "Représentant commercial : Sami Nasraoui",
-                        "Email : nasrauisami@gmail.com",
-                        "Tél : 20 400 041",
-                        "TVA: 1500874L/A/M/000"
-                    ]
-                    
-                    for i, line in enumerate(info_lines):
-                        canvas.drawString(left_margin + 0.1 * cm, info_y - (i * line_height), line)
-                    
-                    # ============================================= 
-                    # LOGO (RIGHT)
-                    # ============================================= 
-                    logo_path = resource_path("assets/logo.png")
-                    logo_size = 2.5 * cm
-                    logo_x = right_margin - logo_size
-                    logo_y = info_y - (logo_size / 2) + 0.15 * cm
-                    
-                    if logo_path and os.path.exists(logo_path):
-                        try:
-                            canvas.drawImage(
-                                ImageReader(logo_path),
-                                logo_x, logo_y,
-                                width=logo_size,
-                                height=logo_size,
-                                mask="auto",
-                                preserveAspectRatio=True
-                            )
-                        except Exception:
-                            # Logo placeholder if image fails
-                            canvas.setFillColor(colors.HexColor("#4A90E2"))
-                            canvas.rect(logo_x, logo_y, logo_size, logo_size, fill=True, stroke=True)
-                            canvas.setFillColor(colors.white)
-                            canvas.setFont("Helvetica-Bold", 10)
-                            canvas.drawCentredString(
-                                logo_x + logo_size/2,
-                                logo_y + logo_size/2,
-                                "LOGO"
-                            )
-                    
-                    # ============================================= 
-                    # ELEGANT SEPARATOR LINE
-                    # ============================================= 
-                    separator_y = header_y_base - 3 * cm
-                    canvas.setStrokeColor(colors.HexColor("#1F2A44"))
-                    canvas.setLineWidth(1.5)
-                    canvas.line(left_margin, separator_y, right_margin, separator_y)
-                    
-                    # Accent line
-                    canvas.setStrokeColor(colors.HexColor("#4A90E2"))
-                    canvas.setLineWidth(0.5)
-                    canvas.line(left_margin, separator_y - 0.15 * cm, right_margin, separator_y - 0.15 * cm)
-                    
-                    # ============================================= 
-                    # FOOTER SECTION
-                    # ============================================= 
-                    footer_y = 2 * cm
-                    
-                    # Footer separator line
-                    canvas.setStrokeColor(colors.HexColor("#E0E0E0"))
-                    canvas.setLineWidth(0.5)
-                    canvas.line(left_margin, footer_y + 0.5 * cm, right_margin, footer_y + 0.5 * cm)
-                    
-                    # Footer text
-                    canvas.setFillColor(colors.HexColor("#718096"))
-                    canvas.setFont("Helvetica", 8.5)
-                    
-                    # Page number (left)
-                    canvas.drawString(left_margin, footer_y, f"Page {doc.page}")
-                    
-                    # Generated date (right)
-                    date_str = datetime.now().strftime('%d/%m/%Y à %H:%M')
-                    canvas.drawRightString(right_margin, footer_y, f"Généré le {date_str}")
-                    
-                    canvas.restoreState()
-                
-                # ============================================= 
-                # DOCUMENT TITLE
-                # ============================================= 
-                title_style = ParagraphStyle(
-                    'CustomTitle',
-                    parent=styles['Title'],
-                    fontSize=20,
-                    textColor=colors.HexColor("#1F2A44"),
-                    spaceAfter=8,
-                    alignment=TA_CENTER,
-                    fontName='Helvetica-Bold'
-                )
-                
-                title_para = Paragraph("BON DE VENTE", title_style)
-                story.append(title_para)
-                story.append(Spacer(1, 0.5 * cm))
-                
-                # ============================================= 
-                # VENTE & CLIENT INFO - SIDE BY SIDE
-                # ============================================= 
-                section_style = ParagraphStyle(
-                    'SectionHeader',
-                    parent=styles['Heading2'],
-                    fontSize=11,
-                    textColor=colors.HexColor("#1F2A44"),
-                    spaceAfter=6,
-                    fontName='Helvetica-Bold',
-                    leftIndent=0
-                )
-                
-                # Create two-column layout for vente info and client info
-                left_col_data = [
-                    [Paragraph("<b>INFORMATIONS DE VENTE</b>", section_style)],
-                    [''],
-                    ['Référence:', reference],
-                    ['Date:', date],
-                ]
-                
-                right_col_data = [
-                    [Paragraph("<b>INFORMATIONS CLIENT</b>", section_style)],
-                    [''],
-                    ['Client:', client_nom if client_nom else "N/A"],
-                    ['Téléphone:', telephone if telephone else "N/A"],
-                    ['Adresse:', adresse if adresse else "N/A"],
-                ]
-                
-                # Style for info boxes
-                info_box_style = TableStyle([
-                    ('FONTNAME', (0, 2), (0, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 2), (0, -1), 9),
-                    ('TEXTCOLOR', (0, 2), (0, -1), colors.HexColor("#4A5568")),
-                    ('ALIGN', (0, 2), (0, -1), 'LEFT'),
-                    ('FONTNAME', (1, 2), (1, -1), 'Helvetica'),
-                    ('FONTSIZE', (1, 2), (1, -1), 9),
-                    ('TEXTCOLOR', (1, 2), (1, -1), colors.HexColor("#2D3748")),
-                    ('ALIGN', (1, 2), (1, -1), 'LEFT'),
-                    ('TOPPADDING', (0, 0), (-1, -1), 4),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#E8F4F8")),
-                    ('SPAN', (0, 0), (1, 0)),
-                ])
-                
-                left_table = Table(left_col_data, colWidths=[3*cm, 5*cm])
-                left_table.setStyle(info_box_style)
-                
-                right_table = Table(right_col_data, colWidths=[3*cm, 5*cm])
-                right_table.setStyle(info_box_style)
-                
-                # Container for side-by-side layout
-                container_data = [[left_table, right_table]]
-                container_table = Table(container_data, colWidths=[8.5*cm, 8.5*cm])
-                container_table.setStyle(TableStyle([
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                    ('TOPPADDING', (0, 0), (-1, -1), 0),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                ]))
-                
-                story.append(container_table)
-                story.append(Spacer(1, 0.8 * cm))
-                
-                # ============================================= 
-                # ITEMS SECTION
-                # ============================================= 
-                items_header = Paragraph("<b>DÉTAILS DES ARTICLES</b>", section_style)
-                story.append(items_header)
-                story.append(Spacer(1, 0.3 * cm))
-                
-                # Items Table
-                items_table_data = [["Désignation du Produit", "Qté", "Prix Unit. (DT)", "Total (DT)"]]
-                
-                if items:
-                    for desc, qty, unit_price, total_price in items:
-                        # Skip items with quantity 0
-                        if float(qty) > 0:
-                            items_table_data.append([
-                                str(desc or "-"),
-                                str(int(qty)),
-                                str(int(float(unit_price))),
-                                str(int(float(total_price)))
-                            ])
-                
-                items_table = Table(items_table_data, colWidths=[8*cm, 2*cm, 3.5*cm, 3.5*cm])
-                items_table.setStyle(TableStyle([
-                    # Header styling
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1F2A44")),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-                    ('ALIGN', (1, 0), (-1, 0), 'CENTER'),
-                    ('TOPPADDING', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                    
-                    # Body styling
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor("#2D3748")),
-                    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    
-                    # Grid and alternating rows
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#CBD5E0")),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#F7FAFC")]),
-                    ('TOPPADDING', (0, 1), (-1, -1), 8),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ]))
-                
-                story.append(items_table)
-                story.append(Spacer(1, 0.6 * cm))
-                
-                # ============================================= 
-                # FINANCIAL SUMMARY - RIGHT ALIGNED
-                # ============================================= 
-                summary_header = Paragraph("<b>RÉCAPITULATIF FINANCIER</b>", section_style)
-                story.append(summary_header)
-                story.append(Spacer(1, 0.3 * cm))
-                
-                # Financial summary table
-                totals_data = [
-                    ['Montant Total:', f"{int(montant_total)} DT"],
-                    ['Montant Payé:', f"{int(paye)} DT"],
-                    ['', ''],  # Separator row
-                    ['Reste à Payer:', f"{int(reste)} DT"],
-                ]
-                
-                # Determine rest color based on amount
-                reste_color = colors.HexColor("#E53E3E") if reste > 0 else colors.HexColor("#38A169")
-                
-                totals_table = Table(totals_data, colWidths=[10*cm, 4*cm], hAlign='RIGHT')
-                totals_table.setStyle(TableStyle([
-                    # Labels
-                    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (0, -1), 10),
-                    ('TEXTCOLOR', (0, 0), (0, 1), colors.HexColor("#4A5568")),
-                    ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-                    
-                    # Values
-                    ('FONTNAME', (1, 0), (1, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (1, 0), (1, -1), 10),
-                    ('TEXTCOLOR', (1, 0), (1, 1), colors.HexColor("#2D3748")),
-                    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                    
-                    # Padding
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                    
-                    # Lines
-                    ('LINEBELOW', (0, 1), (-1, 1), 0.5, colors.HexColor("#E2E8F0")),
-                    ('LINEABOVE', (0, 3), (-1, 3), 1.5, colors.HexColor("#1F2A44")),
-                    ('LINEBELOW', (0, 3), (-1, 3), 1.5, colors.HexColor("#1F2A44")),
-                    
-                    # Highlight reste à payer
-                    ('FONTSIZE', (0, 3), (-1, 3), 12),
-                    ('TEXTCOLOR', (0, 3), (-1, 3), reste_color),
-                    ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor("#F7FAFC")),
-                ]))
-                
-                story.append(totals_table)
-                
-                # Build PDF with header and footer
-                doc.build(story, onFirstPage=header_footer, onLaterPages=header_footer)
-                
-                QMessageBox.information(self, "Succès", 
-                                    f"La vente a été imprimée avec succès :\n{filename}")
-                
+
+                # Built in the background, the success message comes from the export queue
+                from pdf_export import export_sale_to_pdf
+                export_sale_to_pdf(filename, vente, items)
+
             except Exception as e:
                 QMessageBox.critical(self, "Erreur", f"Erreur lors de l'impression :\n{str(e)}")
-                
+
         def add_vente(self):
             dialog = AddVenteDialog(self)
             if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -3063,31 +2016,28 @@ class ClientDetail(QDialog):
                     return
 
                 try:
-                    # Use DB helper to insert vente and its items so items persist (no description)
-                    vente_id = add_vente(self.client_id, date.today().isoformat(), data['reference'], montant, None)
-                    for it in data.get('items', []):
-                        add_vente_item(vente_id, it.get('product_id'), it.get('name'), it.get('quantity'), it.get('unit_price'), it.get('total'))
+                    # Vente and items are written in one transaction (no description)
+                    items = [
+                        (it.get('product_id'), it.get('name'), it.get('quantity'), it.get('unit_price'), it.get('total'))
+                        for it in data.get('items', [])
+                    ]
+                    record_sale(self.client_id, date.today().isoformat(), data['reference'], items, montant)
 
-                    self.refresh_ventes()
                     QMessageBox.information(self, "Succès", "Vente ajoutée avec succès!")
-                    self.update_credit()
 
                 except Exception as e:
                     QMessageBox.critical(self, "Erreur", f"Erreur lors de l'ajout de la vente:\n{str(e)}")
 
         def add_paiement(self, vente_id):
-            # Récupérer le montant restant
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("""
-                SELECT v.montant_total - IFNULL(SUM(p.montant), 0)
-                FROM ventes v
-                LEFT JOIN paiements p ON v.id = p.vente_id
-                WHERE v.id = ?
-                GROUP BY v.id, v.montant_total
-            """, (vente_id,))
-            reste = c.fetchone()[0]
-            conn.close()
+            # Récupérer le montant restant en arrière-plan
+            self._submit("pay", get_vente, vente_id,
+                         on_result=lambda vente: self.on_paiement_vente_loaded(vente_id, vente))
+
+        def on_paiement_vente_loaded(self, vente_id, vente):
+            if vente is None:
+                QMessageBox.warning(self, "Erreur", "Vente introuvable.")
+                return
+            reste = vente.reste
 
             if reste <= 0:
                 QMessageBox.information(self, "Info", "Cette vente est déjà entièrement payée.")
@@ -3118,78 +2068,18 @@ class ClientDetail(QDialog):
                 return
 
             try:
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                INSERT INTO paiements(vente_id, date, montant, mode, note)
-                VALUES (?,?,?,?,?)
-                """, (vente_id, date.today().isoformat(), montant, mode, note))
-                conn.commit()
-                conn.close()
-
-                self.refresh_ventes()
+                add_paiement(vente_id, date.today().isoformat(), montant, mode, note)
+
                 QMessageBox.information(self, "Succès", "Paiement enregistré avec succès!")
-                self.update_credit()
 
             except Exception as e:
                 QMessageBox.critical(self, "Erreur", f"Erreur lors de l'enregistrement du paiement:\n{str(e)}")
 
         def show_hist(self, vente_id):
-            # Récupérer l'historique des paiements pour la vente donnée
-            try:
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                    SELECT p.date, p.montant, p.mode, p.note, 
-                           c.nom as client_nom, v.description, v.montant_total
-                    FROM paiements p
-                    JOIN ventes v ON p.vente_id = v.id
-                    JOIN clients c ON v.client_id = c.id
-                    WHERE p.vente_id=?
-                    ORDER BY p.date DESC
-                """, (vente_id,))
-                hist = c.fetchall()
-                conn.close()
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement de l'historique des paiements:\n{str(e)}")
-                return
-            histDialog = HistDialog(hist, vente_id, self)
+            # HistDialog loads the payments of the vente itself
+            histDialog = HistDialog(None, vente_id, self)
             histDialog.exec()
 
-#---------Helpers for resources and about dialog---------
-       
-def resource_path(relative):
-    try:
-        base = sys._MEIPASS
-    except Exception:
-        base = os.path.abspath(".")
-    return os.path.join(base, relative)
-
-def get_reportlab_logo_path():
-    """
-    Return a logo path that ReportLab can render in packaged builds.
-    ReportLab can draw JPEGs without Pillow, but PNG often requires Pillow.
-    We convert the PNG to a cached JPEG via Qt to avoid missing-image issues.
-    """
-    logo_png = resource_path("assets/logo.png")
-    if not os.path.exists(logo_png):
-        return None
-
-    try:
-        temp_dir = tempfile.gettempdir()
-        logo_jpg = os.path.join(temp_dir, "clientflow_logo.jpg")
-
-        if (not os.path.exists(logo_jpg)) or (os.path.getmtime(logo_jpg) < os.path.getmtime(logo_png)):
-            img = QImage(logo_png)
-            if img.isNull():
-                return logo_png
-            img.save(logo_jpg, "JPG")
-
-        return logo_jpg
-    except Exception:
-        return logo_png
-
-
 #-------- About Dialog ---------
 class AboutDialog(QDialog):
     def __init__(self, parent=None):
@@ -3211,6 +2101,8 @@ class AboutDialog(QDialog):
 
 #-------- Main Application ---------
 if __name__ == "__main__":
+    # Batch exports render in worker processes (required by the packaged exe)
+    multiprocessing.freeze_support()
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(
         "clientflow.app.1.0"
     )
@@ -3227,8 +2119,7 @@ if __name__ == "__main__":
     splash.show()
     app.processEvents()
 
-    time.sleep(1)  # splash duration
-
+    # No fixed splash delay: Home shows at once, the clients load in the background
     win = Home()
     win.show()
     splash.finish(win)
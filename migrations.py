@@ -0,0 +1,563 @@
+"""
+Schema migrations keyed on PRAGMA user_version.
+
+Each step brings the schema from version N-1 to N and runs in its own
+transaction together with the user_version bump, so an interrupted upgrade
+resumes at the failed step on the next start. Steps are idempotent: they
+also run on databases created before versioning (user_version 0) whose
+tables may already exist.
+
+To change the schema, append a new step to MIGRATIONS; never edit a
+released one.
+"""
+import sqlite3
+
+from connection_manager import get_connection, transaction
+
+
+def _execute_script(c, script):
+    """Execute trigger definitions one by one (executescript would commit)."""
+    for statement in script.split(";\nEND;"):
+        if statement.strip():
+            c.execute(statement + ";\nEND;")
+
+
+def _columns(c, table):
+    return {row[1] for row in c.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column(c, table, column, definition):
+    if column not in _columns(c, table):
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+#------Version 1: base tables------
+def create_base_tables(c):
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom TEXT NOT NULL,
+        telephone TEXT,
+        adresse TEXT,
+        email TEXT
+    )
+    """)
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS ventes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        date TEXT,
+        reference TEXT,
+        montant_total REAL,
+        FOREIGN KEY(client_id) REFERENCES clients(id)
+    )
+    """)
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS paiements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vente_id INTEGER,
+        date TEXT,
+        montant REAL,
+        mode TEXT,
+        note TEXT,
+        FOREIGN KEY(vente_id) REFERENCES ventes(id)
+    )
+    """)
+
+    # Categories table: product categories
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT
+    )
+    """)
+
+    # Products table: holds available products and their unit price
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        unit_price REAL NOT NULL,
+        category_id INTEGER,
+        FOREIGN KEY(category_id) REFERENCES categories(id)
+    )
+    """)
+
+    # Sale items: items belonging to a vente (sale)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS vente_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vente_id INTEGER NOT NULL,
+        product_id INTEGER,
+        description TEXT,
+        quantity REAL DEFAULT 1,
+        unit_price REAL,
+        total_price REAL,
+        FOREIGN KEY(vente_id) REFERENCES ventes(id),
+        FOREIGN KEY(product_id) REFERENCES products(id)
+    )
+    """)
+
+    # Columns added after the first releases
+    _add_column(c, "clients", "adresse", "TEXT")
+    _add_column(c, "clients", "email", "TEXT")
+    _add_column(c, "ventes", "description", "TEXT")
+    _add_column(c, "products", "category_id", "INTEGER")
+
+
+#------Version 2: indexes------
+def create_indexes(c):
+    # Recherche rapide par nom
+    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_nom ON clients(nom)")
+
+    # Recherche rapide par email
+    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_email ON clients(email)")
+
+    # Recherche rapide par téléphone si besoin
+    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_telephone ON clients(telephone)")
+
+    # Pour les ventes liées à un client
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ventes_client_id ON ventes(client_id)")
+
+    # Pour les paiements liés à une vente
+    c.execute("CREATE INDEX IF NOT EXISTS idx_paiements_vente_id ON paiements(vente_id)")
+
+    # Pour les articles d'une vente et les produits d'une catégorie
+    c.execute("CREATE INDEX IF NOT EXISTS idx_vente_items_vente_id ON vente_items(vente_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category_id)")
+
+
+#------Version 3: full-text search------
+# Full-text search: one FTS5 row per client, vente and vente item.
+# rowid = source id * 4 + kind (database.SEARCH_KIND_*), so triggers can
+# replace a row by rowid.
+_SEARCH_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS search_clients_ai AFTER INSERT ON clients BEGIN
+    INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+    VALUES (new.id * 4 + 1, IFNULL(new.nom, '') || ' ' || IFNULL(new.telephone, '') || ' ' || IFNULL(new.adresse, '') || ' ' || IFNULL(new.email, ''), 1, new.id, NULL);
+END;
+CREATE TRIGGER IF NOT EXISTS search_clients_au AFTER UPDATE ON clients BEGIN
+    DELETE FROM search_fts WHERE rowid = old.id * 4 + 1;
+    INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+    VALUES (new.id * 4 + 1, IFNULL(new.nom, '') || ' ' || IFNULL(new.telephone, '') || ' ' || IFNULL(new.adresse, '') || ' ' || IFNULL(new.email, ''), 1, new.id, NULL);
+END;
+CREATE TRIGGER IF NOT EXISTS search_clients_ad AFTER DELETE ON clients BEGIN
+    DELETE FROM search_fts WHERE rowid = old.id * 4 + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_ventes_ai AFTER INSERT ON ventes BEGIN
+    INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+    VALUES (new.id * 4 + 2, IFNULL(new.reference, '') || ' ' || IFNULL(new.description, ''), 2, new.client_id, new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS search_ventes_au AFTER UPDATE OF reference, description, client_id ON ventes BEGIN
+    DELETE FROM search_fts WHERE rowid = old.id * 4 + 2;
+    INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+    VALUES (new.id * 4 + 2, IFNULL(new.reference, '') || ' ' || IFNULL(new.description, ''), 2, new.client_id, new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS search_ventes_ad AFTER DELETE ON ventes BEGIN
+    DELETE FROM search_fts WHERE rowid = old.id * 4 + 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS search_items_ai AFTER INSERT ON vente_items BEGIN
+    INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+    SELECT new.id * 4 + 3, new.description, 3, v.client_id, new.vente_id
+    FROM ventes v WHERE v.id = new.vente_id;
+END;
+CREATE TRIGGER IF NOT EXISTS search_items_au AFTER UPDATE OF description, vente_id ON vente_items BEGIN
+    DELETE FROM search_fts WHERE rowid = old.id * 4 + 3;
+    INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+    SELECT new.id * 4 + 3, new.description, 3, v.client_id, new.vente_id
+    FROM ventes v WHERE v.id = new.vente_id;
+END;
+CREATE TRIGGER IF NOT EXISTS search_items_ad AFTER DELETE ON vente_items BEGIN
+    DELETE FROM search_fts WHERE rowid = old.id * 4 + 3;
+END;
+"""
+
+
+def create_search_index(c):
+    """Create the FTS5 index and its triggers, filling it from existing rows when new."""
+    exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='search_fts'"
+    ).fetchone()
+    if exists:
+        return
+    try:
+        c.execute("""
+            CREATE VIRTUAL TABLE search_fts USING fts5(
+                body,
+                kind UNINDEXED,
+                client_id UNINDEXED,
+                vente_id UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search() falls back to no results
+        return
+    c.execute("""
+        INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+        SELECT id * 4 + 1, IFNULL(nom, '') || ' ' || IFNULL(telephone, '') || ' ' || IFNULL(adresse, '') || ' ' || IFNULL(email, ''), 1, id, NULL FROM clients
+    """)
+    c.execute("""
+        INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+        SELECT id * 4 + 2, IFNULL(reference, '') || ' ' || IFNULL(description, ''), 2, client_id, id FROM ventes
+    """)
+    c.execute("""
+        INSERT INTO search_fts(rowid, body, kind, client_id, vente_id)
+        SELECT vi.id * 4 + 3, vi.description, 3, v.client_id, vi.vente_id
+        FROM vente_items vi JOIN ventes v ON v.id = vi.vente_id
+    """)
+    _execute_script(c, _SEARCH_TRIGGERS)
+
+
+#------Versions 4-5: materialized balances------
+# Materialized balance of each vente: paid_total = SUM(paiements.montant),
+# reste = montant_total - paid_total, kept current by triggers.
+_BALANCE_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS ventes_balance_ai AFTER INSERT ON ventes BEGIN
+    UPDATE ventes SET paid_total = 0, reste = IFNULL(new.montant_total, 0) WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_balance_au AFTER UPDATE OF montant_total ON ventes BEGIN
+    UPDATE ventes SET reste = IFNULL(new.montant_total, 0) - paid_total WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS paiements_balance_ai AFTER INSERT ON paiements BEGIN
+    UPDATE ventes SET
+        paid_total = (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = new.vente_id),
+        reste = IFNULL(montant_total, 0) - (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = new.vente_id)
+    WHERE id = new.vente_id;
+END;
+CREATE TRIGGER IF NOT EXISTS paiements_balance_au AFTER UPDATE OF montant, vente_id ON paiements BEGIN
+    UPDATE ventes SET
+        paid_total = (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = ventes.id),
+        reste = IFNULL(montant_total, 0) - (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = ventes.id)
+    WHERE id IN (old.vente_id, new.vente_id);
+END;
+CREATE TRIGGER IF NOT EXISTS paiements_balance_ad AFTER DELETE ON paiements BEGIN
+    UPDATE ventes SET
+        paid_total = (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = old.vente_id),
+        reste = IFNULL(montant_total, 0) - (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = old.vente_id)
+    WHERE id = old.vente_id;
+END;
+"""
+
+
+def create_balance_columns(c):
+    """Add ventes.paid_total / ventes.reste with their triggers, backfilling when new."""
+    columns = {row[1] for row in c.execute("PRAGMA table_info(ventes)")}
+    if "paid_total" not in columns:
+        c.execute("ALTER TABLE ventes ADD COLUMN paid_total REAL NOT NULL DEFAULT 0")
+    if "reste" not in columns:
+        c.execute("ALTER TABLE ventes ADD COLUMN reste REAL NOT NULL DEFAULT 0")
+    if "paid_total" not in columns or "reste" not in columns:
+        c.execute("""
+            UPDATE ventes SET
+                paid_total = (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = ventes.id),
+                reste = IFNULL(montant_total, 0) - (SELECT IFNULL(SUM(montant), 0) FROM paiements WHERE vente_id = ventes.id)
+        """)
+    _execute_script(c, _BALANCE_TRIGGERS)
+
+
+# Materialized per-client aggregates for the home screen:
+#   client_balances             one row per client (credit, paid, reste, last_sale_date)
+#   client_category_quantities  quantity sold per (client, category)
+#   balance_totals              single row (id = 1) with the global totals
+# Triggers refresh only the client / (client, category) touched by a write;
+# balance_totals is adjusted by the difference of each client_balances change.
+def _refresh_client_balance(client):
+    return f"""
+    INSERT INTO client_balances(client_id, credit, paid, reste, last_sale_date)
+    SELECT c.id, IFNULL(SUM(v.montant_total), 0), IFNULL(SUM(v.paid_total), 0), IFNULL(SUM(v.reste), 0), MAX(v.date)
+    FROM clients c LEFT JOIN ventes v ON v.client_id = c.id
+    WHERE c.id = {client}
+    GROUP BY c.id
+    ON CONFLICT(client_id) DO UPDATE SET
+        credit = excluded.credit, paid = excluded.paid,
+        reste = excluded.reste, last_sale_date = excluded.last_sale_date;"""
+
+
+def _refresh_category_quantity(client, category):
+    return f"""
+    DELETE FROM client_category_quantities WHERE client_id = {client} AND category_id = {category};
+    INSERT INTO client_category_quantities(client_id, category_id, quantity)
+    SELECT v.client_id, p.category_id, SUM(vi.quantity)
+    FROM ventes v
+    JOIN vente_items vi ON vi.vente_id = v.id
+    JOIN products p ON p.id = vi.product_id
+    WHERE v.client_id = {client} AND p.category_id = {category}
+    GROUP BY v.client_id, p.category_id;"""
+
+
+_ITEM_CLIENT = "(SELECT client_id FROM ventes WHERE id = {row}.vente_id)"
+_ITEM_CATEGORY = "(SELECT category_id FROM products WHERE id = {row}.product_id)"
+
+_CLIENT_BALANCE_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS clients_balances_ai AFTER INSERT ON clients BEGIN
+    INSERT INTO client_balances(client_id) VALUES (new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS clients_balances_ad AFTER DELETE ON clients BEGIN
+    DELETE FROM client_balances WHERE client_id = old.id;
+    DELETE FROM client_category_quantities WHERE client_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ventes_client_balances_ai AFTER INSERT ON ventes BEGIN{_refresh_client_balance("new.client_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_client_balances_au AFTER UPDATE OF client_id, date, montant_total, paid_total, reste ON ventes BEGIN{_refresh_client_balance("old.client_id")}{_refresh_client_balance("new.client_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_client_balances_ad AFTER DELETE ON ventes BEGIN{_refresh_client_balance("old.client_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_category_quantities_au AFTER UPDATE OF client_id ON ventes BEGIN
+    DELETE FROM client_category_quantities WHERE client_id IN (old.client_id, new.client_id);
+    INSERT INTO client_category_quantities(client_id, category_id, quantity)
+    SELECT v.client_id, p.category_id, SUM(vi.quantity)
+    FROM ventes v
+    JOIN vente_items vi ON vi.vente_id = v.id
+    JOIN products p ON p.id = vi.product_id
+    WHERE v.client_id IN (old.client_id, new.client_id) AND p.category_id IS NOT NULL
+    GROUP BY v.client_id, p.category_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS vente_items_quantities_ai AFTER INSERT ON vente_items BEGIN{_refresh_category_quantity(_ITEM_CLIENT.format(row="new"), _ITEM_CATEGORY.format(row="new"))}
+END;
+CREATE TRIGGER IF NOT EXISTS vente_items_quantities_au AFTER UPDATE OF vente_id, product_id, quantity ON vente_items BEGIN{_refresh_category_quantity(_ITEM_CLIENT.format(row="old"), _ITEM_CATEGORY.format(row="old"))}{_refresh_category_quantity(_ITEM_CLIENT.format(row="new"), _ITEM_CATEGORY.format(row="new"))}
+END;
+CREATE TRIGGER IF NOT EXISTS vente_items_quantities_ad AFTER DELETE ON vente_items BEGIN{_refresh_category_quantity(_ITEM_CLIENT.format(row="old"), _ITEM_CATEGORY.format(row="old"))}
+END;
+CREATE TRIGGER IF NOT EXISTS products_quantities_au AFTER UPDATE OF category_id ON products BEGIN
+    DELETE FROM client_category_quantities WHERE category_id IN (old.category_id, new.category_id);
+    INSERT INTO client_category_quantities(client_id, category_id, quantity)
+    SELECT v.client_id, p.category_id, SUM(vi.quantity)
+    FROM ventes v
+    JOIN vente_items vi ON vi.vente_id = v.id
+    JOIN products p ON p.id = vi.product_id
+    WHERE p.category_id IN (old.category_id, new.category_id)
+    GROUP BY v.client_id, p.category_id;
+END;
+
+-- Totals are rounded to the millime-safe 6 decimals so repeated deltas do not drift
+CREATE TRIGGER IF NOT EXISTS client_balances_totals_ai AFTER INSERT ON client_balances BEGIN
+    UPDATE balance_totals SET
+        credit = ROUND(credit + new.credit, 6),
+        paid = ROUND(paid + new.paid, 6),
+        reste = ROUND(reste + new.reste, 6)
+    WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS client_balances_totals_au AFTER UPDATE ON client_balances BEGIN
+    UPDATE balance_totals SET
+        credit = ROUND(credit + new.credit - old.credit, 6),
+        paid = ROUND(paid + new.paid - old.paid, 6),
+        reste = ROUND(reste + new.reste - old.reste, 6)
+    WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS client_balances_totals_ad AFTER DELETE ON client_balances BEGIN
+    UPDATE balance_totals SET
+        credit = ROUND(credit - old.credit, 6),
+        paid = ROUND(paid - old.paid, 6),
+        reste = ROUND(reste - old.reste, 6)
+    WHERE id = 1;
+END;
+"""
+
+
+def create_client_balances(c):
+    """Create the per-client aggregate tables and their triggers, filling them when new."""
+    exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='client_balances'"
+    ).fetchone()
+    if not exists:
+        c.execute("""
+            CREATE TABLE client_balances (
+                client_id INTEGER PRIMARY KEY,
+                credit REAL NOT NULL DEFAULT 0,
+                paid REAL NOT NULL DEFAULT 0,
+                reste REAL NOT NULL DEFAULT 0,
+                last_sale_date TEXT
+            )
+        """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS client_category_quantities (
+                client_id INTEGER NOT NULL,
+                category_id INTEGER NOT NULL,
+                quantity REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (client_id, category_id)
+            ) WITHOUT ROWID
+        """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS balance_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                credit REAL NOT NULL DEFAULT 0,
+                paid REAL NOT NULL DEFAULT 0,
+                reste REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Backfill before the triggers exist
+        c.execute("DELETE FROM client_category_quantities")
+        c.execute("DELETE FROM balance_totals")
+        c.execute("""
+            INSERT INTO client_balances(client_id, credit, paid, reste, last_sale_date)
+            SELECT c.id, IFNULL(SUM(v.montant_total), 0), IFNULL(SUM(v.paid_total), 0), IFNULL(SUM(v.reste), 0), MAX(v.date)
+            FROM clients c LEFT JOIN ventes v ON v.client_id = c.id
+            GROUP BY c.id
+        """)
+        c.execute("""
+            INSERT INTO client_category_quantities(client_id, category_id, quantity)
+            SELECT v.client_id, p.category_id, SUM(vi.quantity)
+            FROM vente_items vi
+            JOIN ventes v ON vi.vente_id = v.id
+            JOIN products p ON vi.product_id = p.id
+            WHERE p.category_id IS NOT NULL
+            GROUP BY v.client_id, p.category_id
+        """)
+        c.execute("""
+            INSERT INTO balance_totals(id, credit, paid, reste)
+            SELECT 1, IFNULL(ROUND(SUM(credit), 6), 0), IFNULL(ROUND(SUM(paid), 6), 0), IFNULL(ROUND(SUM(reste), 6), 0)
+            FROM client_balances
+        """)
+    _execute_script(c, _CLIENT_BALANCE_TRIGGERS)
+
+
+#------Version 6: unpaid ventes------
+def create_unpaid_index(c):
+    """Covering index of the ventes with something left to pay (aged receivables, unpaid lists)."""
+    # SQLite uses it only for queries with this same "reste > 0.0005" term
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ventes_unpaid ON ventes(client_id, date, reste) WHERE reste > 0.0005")
+
+
+#------Version 7: incremental client aggregates------
+# The version 5 triggers recompute the whole client (SUM over all its ventes
+# or items) for every row written, which makes deleting a client or a bulk
+# insert quadratic. These add the difference of each write to the client /
+# (client, category) it touches instead, rounded to 6 decimals like
+# balance_totals so repeated deltas do not drift.
+def _add_vente_balance(row, sign):
+    return f"""
+    UPDATE client_balances SET
+        credit = ROUND(credit {sign} IFNULL({row}.montant_total, 0), 6),
+        paid = ROUND(paid {sign} {row}.paid_total, 6),
+        reste = ROUND(reste {sign} {row}.reste, 6)
+    WHERE client_id = {row}.client_id;"""
+
+
+def _refresh_last_sale_date(client):
+    # One lookup in idx_ventes_client_date
+    return f"""
+    UPDATE client_balances SET last_sale_date = (SELECT MAX(date) FROM ventes WHERE client_id = {client})
+    WHERE client_id = {client};"""
+
+
+def _add_item_quantity(row, sign):
+    return f"""
+    INSERT INTO client_category_quantities(client_id, category_id, quantity)
+    SELECT v.client_id, p.category_id, {sign}IFNULL({row}.quantity, 0)
+    FROM ventes v, products p
+    WHERE v.id = {row}.vente_id AND p.id = {row}.product_id AND p.category_id IS NOT NULL
+    ON CONFLICT(client_id, category_id) DO UPDATE SET quantity = ROUND(quantity + excluded.quantity, 6);"""
+
+
+def _add_vente_quantities(client, sign):
+    # Every item of the updated vente, per category
+    return f"""
+    INSERT INTO client_category_quantities(client_id, category_id, quantity)
+    SELECT {client}, p.category_id, {sign}SUM(IFNULL(vi.quantity, 0))
+    FROM vente_items vi JOIN products p ON p.id = vi.product_id
+    WHERE vi.vente_id = new.id AND p.category_id IS NOT NULL
+    GROUP BY p.category_id
+    ON CONFLICT(client_id, category_id) DO UPDATE SET quantity = ROUND(quantity + excluded.quantity, 6);"""
+
+
+_DELTA_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS ventes_client_balances_ai AFTER INSERT ON ventes BEGIN
+    UPDATE client_balances SET
+        credit = ROUND(credit + IFNULL(new.montant_total, 0), 6),
+        paid = ROUND(paid + new.paid_total, 6),
+        reste = ROUND(reste + new.reste, 6),
+        last_sale_date = CASE WHEN new.date > IFNULL(last_sale_date, '') THEN new.date ELSE last_sale_date END
+    WHERE client_id = new.client_id;
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_client_balances_au AFTER UPDATE OF client_id, montant_total, paid_total, reste ON ventes BEGIN{_add_vente_balance("old", "-")}{_add_vente_balance("new", "+")}
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_client_balances_ad AFTER DELETE ON ventes BEGIN{_add_vente_balance("old", "-")}{_refresh_last_sale_date("old.client_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_last_sale_date_au AFTER UPDATE OF client_id, date ON ventes
+WHEN old.client_id IS NOT new.client_id OR old.date IS NOT new.date BEGIN{_refresh_last_sale_date("old.client_id")}{_refresh_last_sale_date("new.client_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS ventes_category_quantities_au AFTER UPDATE OF client_id ON ventes
+WHEN old.client_id IS NOT new.client_id BEGIN{_add_vente_quantities("old.client_id", "-")}{_add_vente_quantities("new.client_id", "")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS vente_items_quantities_ai AFTER INSERT ON vente_items BEGIN{_add_item_quantity("new", "+")}
+END;
+CREATE TRIGGER IF NOT EXISTS vente_items_quantities_au AFTER UPDATE OF vente_id, product_id, quantity ON vente_items BEGIN{_add_item_quantity("old", "-")}{_add_item_quantity("new", "+")}
+END;
+CREATE TRIGGER IF NOT EXISTS vente_items_quantities_ad AFTER DELETE ON vente_items BEGIN{_add_item_quantity("old", "-")}
+END;
+
+-- update_product() writes every column: only a real category change moves quantities
+CREATE TRIGGER IF NOT EXISTS products_quantities_au AFTER UPDATE OF category_id ON products
+WHEN old.category_id IS NOT new.category_id BEGIN
+    DELETE FROM client_category_quantities WHERE category_id IN (old.category_id, new.category_id);
+    INSERT INTO client_category_quantities(client_id, category_id, quantity)
+    SELECT v.client_id, p.category_id, SUM(vi.quantity)
+    FROM ventes v
+    JOIN vente_items vi ON vi.vente_id = v.id
+    JOIN products p ON p.id = vi.product_id
+    WHERE p.category_id IN (old.category_id, new.category_id)
+    GROUP BY v.client_id, p.category_id;
+END;
+"""
+
+# Version 5 triggers replaced by _DELTA_TRIGGERS
+_RECOMPUTE_TRIGGERS = (
+    "ventes_client_balances_ai", "ventes_client_balances_au", "ventes_client_balances_ad",
+    "ventes_category_quantities_au",
+    "vente_items_quantities_ai", "vente_items_quantities_au", "vente_items_quantities_ad",
+    "products_quantities_au",
+)
+
+
+def use_delta_triggers(c):
+    """Replace the recomputing client aggregate triggers by the delta ones."""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ventes_client_date ON ventes(client_id, date)")
+    for name in _RECOMPUTE_TRIGGERS:
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+    _execute_script(c, _DELTA_TRIGGERS)
+
+
+# (version, description, step); versions are consecutive starting at 1
+MIGRATIONS = (
+    (1, "base tables", create_base_tables),
+    (2, "indexes", create_indexes),
+    (3, "full-text search index", create_search_index),
+    (4, "ventes.paid_total / ventes.reste", create_balance_columns),
+    (5, "client balances and totals", create_client_balances),
+    (6, "index of the unpaid ventes", create_unpaid_index),
+    (7, "incremental client aggregates", use_delta_triggers),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version():
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate():
+    """Apply every pending migration. Returns the number of steps applied."""
+    current = get_schema_version()
+    if current >= SCHEMA_VERSION:
+        return 0
+
+    applied = 0
+    for version, _description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with transaction() as conn:
+            step(conn)
+            # user_version lives in the database header, so it is
+            # committed (or rolled back) together with the step
+            conn.execute(f"PRAGMA user_version = {version}")
+        applied += 1
+    return applied
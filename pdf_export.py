@@ -0,0 +1,189 @@
+import threading
+from collections import deque
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtWidgets import QMessageBox, QProgressDialog
+
+import pdf_reports
+from pdf_reports import ExportCancelled
+
+
+class _JobSignals(QObject):
+    progress = Signal(object, int, int, str)  # job, done, total (0 = unknown), text
+    done = Signal(object, object)             # job, error (None on success)
+
+
+class PdfExportJob(QRunnable):
+    """
+    Builds one PDF on a pool thread: build(filename, *args, progress=...),
+    build being one of the pdf_reports builders. args must be plain data
+    (never widgets or models), they are read from another thread.
+    """
+
+    def __init__(self, filename, build, args, label, success_message=None):
+        super().__init__()
+        self.setAutoDelete(False)  # the queue keeps (and drops) the reference
+        self.filename = filename
+        self.build = build
+        self.args = args
+        self.label = label
+        self.success_message = success_message or f"Le PDF a été exporté avec succès :\n{filename}"
+        self.signals = _JobSignals()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stop at the next row/page boundary; the partial file is removed."""
+        self._cancelled.set()
+
+    def _progress(self, done, total, text):
+        if self._cancelled.is_set():
+            raise ExportCancelled()
+        self.signals.progress.emit(self, done, total, text)
+
+    def run(self):
+        error = None
+        try:
+            if self._cancelled.is_set():
+                raise ExportCancelled()
+            self.build(self.filename, *self.args, progress=self._progress)
+        except Exception as e:
+            error = e
+            pdf_reports.remove_partial(self.filename)
+        self.signals.done.emit(self, error)
+
+
+class PdfExportQueue(QObject):
+    """
+    Runs PDF exports one after the other on a background thread, with a
+    (non modal) progress dialog: the application stays usable, and further
+    exports requested meanwhile wait their turn. "Annuler" stops the export
+    in progress; the queued ones still run.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._waiting = deque()
+        self._current = None
+        self._dialog = None
+        self._status = ""
+
+    def enqueue(self, job):
+        job.signals.progress.connect(self._on_progress)
+        job.signals.done.connect(self._on_done)
+        self._waiting.append(job)
+        if self._current is None:
+            self._start_next()
+        else:
+            self._update_label()
+
+    def pending_count(self):
+        """Exports not finished yet, including the running one."""
+        return len(self._waiting) + (self._current is not None)
+
+    def cancel_current(self):
+        if self._current is not None:
+            self._current.cancel()
+
+    def cancel_all(self):
+        for job in self._waiting:
+            job.cancel()
+        self.cancel_current()
+
+    def wait_for_done(self, msecs=-1):
+        return self._pool.waitForDone(msecs)
+
+    def _progress_dialog(self):
+        if self._dialog is None:
+            dialog = QProgressDialog()
+            dialog.setWindowTitle("Export PDF")
+            dialog.setCancelButtonText("Annuler")
+            dialog.setWindowModality(Qt.WindowModality.NonModal)
+            dialog.setMinimumDuration(300)
+            dialog.setAutoClose(False)
+            dialog.setAutoReset(False)
+            dialog.canceled.connect(self.cancel_current)
+            self._dialog = dialog
+        return self._dialog
+
+    def _start_next(self):
+        if not self._waiting:
+            self._current = None
+            if self._dialog is not None:
+                self._dialog.reset()
+            return
+        self._current = self._waiting.popleft()
+        dialog = self._progress_dialog()
+        dialog.reset()
+        dialog.setRange(0, 0)
+        dialog.setValue(0)  # shown after minimumDuration if still running
+        self._update_label(self._current.label)
+        self._pool.start(self._current)
+
+    def _update_label(self, text=None):
+        if self._dialog is None:
+            return
+        if text is not None:
+            self._status = text
+        label = self._status
+        if self._waiting:
+            label = f"{label}\n{len(self._waiting)} export(s) en attente"
+        self._dialog.setLabelText(label)
+
+    def _on_progress(self, job, done, total, text):
+        if job is not self._current or job.cancelled:
+            return
+        dialog = self._progress_dialog()
+        if total > 0:
+            dialog.setRange(0, total)
+            dialog.setValue(done)
+        else:
+            dialog.setRange(0, 0)  # busy indicator while pages are laid out
+        self._update_label(f"{job.label}\n{text}")
+
+    def _on_done(self, job, error):
+        if job is self._current:
+            self._start_next()
+        if isinstance(error, ExportCancelled):
+            return
+        if error is not None:
+            QMessageBox.critical(None, "Erreur", f"Erreur lors de l'export PDF :\n{error}")
+        else:
+            QMessageBox.information(None, "Succès", job.success_message)
+
+
+_queue = None
+
+
+def export_queue():
+    """Return the application-wide PdfExportQueue (created on first use)."""
+    global _queue
+    if _queue is None:
+        _queue = PdfExportQueue()
+    return _queue
+
+
+def export_to_pdf(table, filename, title, client_info=None):
+    """
+    Queue a table report of an export_data.ExportTable; the PDF (totals
+    included) is built in the background. Returns the job.
+    """
+    job = PdfExportJob(filename, pdf_reports.generate_table_report,
+                       (table, title, client_info), title)
+    export_queue().enqueue(job)
+    return job
+
+
+def export_sale_to_pdf(filename, vente, items):
+    """Queue a bon de vente (data from database.get_bon_de_vente). Returns the job."""
+    reference = vente[1] or ""
+    job = PdfExportJob(filename, pdf_reports.generate_sale_pdf, (vente, items),
+                       f"Bon de vente {reference}",
+                       f"La vente a été imprimée avec succès :\n{filename}")
+    export_queue().enqueue(job)
+    return job
@@ -0,0 +1,518 @@
+"""
+PDF reports built with ReportLab from plain data (export_data tables, rows
+read from the database). Nothing here touches Qt, so reports can be built
+on a worker thread (see pdf_export.py).
+
+Builders accept an optional progress(done, total, text) callable; total is
+0 while the page count is unknown (layout phase). The callable may raise
+ExportCancelled to abort: the builder stops and the output file is removed.
+"""
+import itertools
+import os
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.units import cm
+from reportlab.lib.pagesizes import A4
+
+from report_template import draw_page, new_document, paragraph_styles
+
+
+# Data cells of the table reports
+CELL_FONT = "Helvetica"
+CELL_FONT_SIZE = 8
+CELL_LEADING = 10
+HEADER_LEADING = 12
+CELL_PADDING_V = 8
+CELL_PADDING_H = 10
+
+
+class ExportCancelled(Exception):
+    """Raised by a progress callback to abort the report being built."""
+
+
+def _report(progress, done, total, text):
+    if progress is not None:
+        progress(done, total, text)
+
+
+def _page_progress(progress):
+    # ReportLab's own callback: one "PAGE" event per laid out page
+    def on_progress(kind, value):
+        if kind == "PAGE":
+            progress(0, 0, f"Mise en page : page {value}")
+    return on_progress
+
+
+def remove_partial(filename):
+    """Delete what a cancelled or failed build left behind."""
+    try:
+        if os.path.exists(filename):
+            os.remove(filename)
+    except OSError:
+        pass
+
+
+#------Table report (client list, sales, payment history)------
+_ROW_COLORS = [colors.white, colors.HexColor("#F5F7FA")]
+
+# Enhanced table styling
+_TABLE_STYLE = [
+    # Header styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1F2A44")),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),  # Reduced from 11 to prevent overflow
+    ('LEADING', (0, 0), (-1, 0), HEADER_LEADING),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),  # Reduced from 12
+    ('TOPPADDING', (0, 0), (-1, 0), 8),  # Reduced from 12
+
+    # Data rows styling
+    ('FONTNAME', (0, 1), (-1, -1), CELL_FONT),
+    ('FONTSIZE', (0, 1), (-1, -1), CELL_FONT_SIZE),
+    ('LEADING', (0, 1), (-1, -1), CELL_LEADING),
+    ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # First column left-aligned
+    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Other columns centered
+    ('VALIGN', (0, 1), (-1, -1), 'TOP'),  # Changed to TOP for wrapped text
+    ('TOPPADDING', (0, 1), (-1, -1), CELL_PADDING_V),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), CELL_PADDING_V),
+    ('LEFTPADDING', (0, 1), (-1, -1), CELL_PADDING_H),
+    ('RIGHTPADDING', (0, 1), (-1, -1), CELL_PADDING_H),
+
+    # Alternating row colors for readability
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), _ROW_COLORS),
+
+    # Grid lines
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#E0E0E0")),
+    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor("#1F2A44")),
+]
+
+_TOTAL_ROW_STYLE = [
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor("#E8EAF0")),
+]
+
+
+class _FlowableStream(list):
+    """
+    Flowables list for doc.build() that pulls the next flowable from a
+    generator whenever it runs empty, so the table chunks are created as
+    the layout reaches them instead of all upfront.
+    """
+
+    def __init__(self, flowables, more):
+        super().__init__(flowables)
+        self._more = more
+
+    def _fill(self):
+        if not list.__len__(self):
+            flowable = next(self._more, None)
+            if flowable is not None:
+                self.append(flowable)
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def _column_widths(header):
+    # Calculate column widths based on number of columns and content type
+    num_cols = len(header) or 4
+
+    # Determine column widths based on content type
+    if num_cols == 7:  # History format (Date, Amount, Mode, Note, Client, Description, Total)
+        return [2 * cm, 2 * cm, 1.8 * cm, 2.5 * cm, 2.5 * cm, 3 * cm, 2 * cm]
+    if num_cols == 6:
+        # Client list format with "Téléphone" header
+        if any("Téléphone" in str(h) or "Tél" in str(h) for h in header):
+            # Slightly narrower table for nicer left/right margins in PDF
+            return [3 * cm, 3 * cm, 3.5 * cm, 3.5 * cm, 3 * cm, 3 * cm]
+        # Sales format with client info
+        return [2.5 * cm, 3 * cm, 3 * cm, 3 * cm, 3 * cm, 2.5 * cm]
+    if num_cols == 5:  # Client list format (Name, Phone, Address, Email, Credit)
+        return [3.5 * cm, 3 * cm, 5 * cm, 4.5 * cm, 3 * cm]
+    if num_cols == 4:  # Standard format or History (Date, Amount, Mode, Note)
+        return [3 * cm, 3 * cm, 3.5 * cm, 6 * cm]  # Optimized for history format
+    # Auto-calculate for other formats
+    total_width = A4[0] - 4 * cm  # Account for margins
+    return [total_width / num_cols] * num_cols
+
+
+# Heights of a single-line data row and of the header row
+ROW_HEIGHT = CELL_LEADING + 2 * CELL_PADDING_V
+HEADER_HEIGHT = HEADER_LEADING + 16
+
+
+def _space_left(doc):
+    # Height still free in the current frame, or a whole frame if the next
+    # table cannot start here (it will be moved to the next page)
+    frame = doc.frame
+    space = frame._y - frame._y1p
+    if space < HEADER_HEIGHT + ROW_HEIGHT:
+        space = frame._y2 - frame._topPadding - frame._y1p
+    return space - 1  # rounding margin
+
+
+def _row_height(values, col_widths):
+    height = CELL_LEADING
+    for value, width in zip(values, col_widths):
+        if isinstance(value, Paragraph):
+            height = max(height, value.wrap(width - 2 * CELL_PADDING_H, 1e6)[1])
+    return height + 2 * CELL_PADDING_V
+
+
+def _cell_values(row, col_widths, cell_style, cell_style_center):
+    # Plain strings for cells that fit on one line (cheap to lay out),
+    # Paragraphs only for the ones that must wrap
+    values = []
+    for col_idx, (cell, width) in enumerate(zip(row, col_widths)):
+        text = "" if cell is None else str(cell)
+        if "\n" not in text and stringWidth(text, CELL_FONT, CELL_FONT_SIZE) <= width - 2 * CELL_PADDING_H:
+            values.append(text)
+        else:
+            # First column left-aligned, others centered
+            style = cell_style if col_idx == 0 else cell_style_center
+            values.append(Paragraph(escape(text).replace("\n", "<br/>"), style))
+    return values
+
+
+def generate_pdf_with_data(filename, header, rows, title, client_info=None, totals=None, progress=None):
+    """
+    Generate a professional commercial report PDF with improved design
+    header: column titles; rows: any iterable of display rows (list, cursor,
+    generator), consumed chunk by chunk while the pages are laid out
+    totals: optional "Total" row printed in bold at the end
+    progress: optional callable(done, total, text), see module docstring
+    """
+    doc = new_document(filename)
+    elements = []
+
+    styles = paragraph_styles()
+    title_style = styles["title"]
+    cell_style = styles["cell"]
+    cell_style_center = styles["cell_center"]
+
+    # =============================================
+    # TITLE SECTION WITH BULLET POINT
+    # =============================================
+    # Add bullet point to title
+    bullet_title = f"📄 {title}"
+    title_para = Paragraph(bullet_title, title_style)
+    elements.append(title_para)
+    elements.append(Spacer(1, 0.5 * cm))
+
+    # Client info with structured bullet points
+    if client_info:
+        # Parse client info and create structured display
+        info_parts = client_info.split(' | ')
+        if len(info_parts) >= 3:
+            client_name = info_parts[0].replace('Client: ', '')
+            total_amount = info_parts[1].replace('Montant Total: ', '')
+            remaining_amount = info_parts[2].replace('Reste à payer: ', '')
+
+            # Create a professional info box
+            # Info box data
+            info_data = [
+                ['👤 Client:', client_name],
+                ['💰 Montant Total:', total_amount],
+                ['💳 Reste a payer:', remaining_amount]
+            ]
+
+            # Create info table with box styling
+            info_table = Table(info_data, colWidths=[3.5 * cm, 12 * cm])
+
+            info_table.setStyle(TableStyle([
+                # Header styling (first column)
+                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor("#F7FAFC")),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (0, -1), 8),
+                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor("#1F2A44")),
+                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+                # Data styling (second column)
+                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+                ('FONTSIZE', (1, 0), (1, -1), 8),
+                ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor("#2D3748")),
+                ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+                ('VALIGN', (1, 0), (1, -1), 'MIDDLE'),
+
+                # Box styling
+                ('BOX', (0, 0), (-1, -1), 1.5, colors.HexColor("#1F2A44")),
+                ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#E2E8F0")),
+                ('TOPPADDING', (0, 0), (-1, -1), 8),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('LEFTPADDING', (0, 0), (-1, -1), 12),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+            ]))
+
+            elements.append(info_table)
+            elements.append(Spacer(1, 0.5 * cm))
+        else:
+            # Fallback for other formats
+            client_style = styles["client"]
+            client_para = Paragraph(f"📋 {client_info}", client_style)
+            elements.append(client_para)
+            elements.append(Spacer(1, 0.3 * cm))
+
+    # =============================================
+    # PROFESSIONAL TABLE, STREAMED IN CHUNKS
+    # =============================================
+    col_widths = _column_widths(header)
+    try:
+        row_count = len(rows)
+    except TypeError:
+        row_count = 0  # cursor or generator: unknown
+
+    table_style = TableStyle(_TABLE_STYLE)
+    total_style = TableStyle(_TABLE_STYLE + _TOTAL_ROW_STYLE)
+    # Center the client list table to preserve margins
+    centered = len(header) == 6 and any("Téléphone" in str(h) or "Tél" in str(h) for h in header)
+
+    def chunks():
+        # One Table per page (header repeated), built only when the layout
+        # reaches it and sized to the space left: memory stays bounded and
+        # time linear in rows. The last row of the last table is "Total".
+        pending = (_cell_values(row, col_widths, cell_style, cell_style_center) for row in rows)
+        if totals:
+            pending = itertools.chain(pending, [list(totals)])
+        next_row = next(pending, None)
+        done = 0
+        while True:
+            space = _space_left(doc) - HEADER_HEIGHT
+            chunk = []
+            while next_row is not None:
+                height = _row_height(next_row, col_widths)
+                if chunk and height > space:
+                    break
+                chunk.append(next_row)
+                space -= height
+                next_row = next(pending, None)
+            last = next_row is None
+
+            shown = min(done, row_count) if row_count else done
+            _report(progress, shown, row_count,
+                    f"Page {doc.page} : {shown}/{row_count} lignes" if row_count else f"Page {doc.page} : {shown} lignes")
+            table = Table([list(header)] + chunk, repeatRows=1, colWidths=col_widths)
+            table.setStyle(total_style if last and totals else table_style)
+            if done % 2:
+                # Keep the alternating row colors continuous across tables
+                table.setStyle([('ROWBACKGROUNDS', (0, 1), (-1, -1), _ROW_COLORS[::-1])])
+            if centered:
+                table.hAlign = "CENTER"
+            done += len(chunk)
+            yield table
+            if last:
+                return
+
+    # =============================================
+    # BUILD PDF
+    # =============================================
+    doc.build(_FlowableStream(elements, chunks()), onFirstPage=draw_page, onLaterPages=draw_page)
+
+
+def generate_table_report(filename, table, title, client_info=None, progress=None):
+    """Table report of an export_data.ExportTable (with its "Total" row)."""
+    generate_pdf_with_data(filename, table.header(), table.display_rows(), title,
+                           client_info, table.totals_row(), progress)
+
+
+#------Bon de vente------
+def generate_sale_pdf(filename, vente, items, progress=None):
+    """
+    Bon de vente of a single sale.
+    vente: (date, reference, montant_total, paye, client_nom, telephone, adresse)
+    items: (description, quantity, unit_price, total_price) rows
+    """
+    date, reference, montant_total, paye, client_nom, telephone, adresse = vente
+    reste = montant_total - paye
+
+    doc = new_document(filename)
+    story = []
+    styles = paragraph_styles()
+
+    # =============================================
+    # DOCUMENT TITLE
+    # =============================================
+    title_style = styles["sale_title"]
+
+    title_para = Paragraph("BON DE VENTE", title_style)
+    story.append(title_para)
+    story.append(Spacer(1, 0.5 * cm))
+
+    # =============================================
+    # VENTE & CLIENT INFO - SIDE BY SIDE
+    # =============================================
+    section_style = styles["section"]
+
+    # Create two-column layout for vente info and client info
+    left_col_data = [
+        [Paragraph("<b>INFORMATIONS DE VENTE</b>", section_style)],
+        [''],
+        ['Référence:', reference],
+        ['Date:', date],
+    ]
+
+    right_col_data = [
+        [Paragraph("<b>INFORMATIONS CLIENT</b>", section_style)],
+        [''],
+        ['Client:', client_nom if client_nom else "N/A"],
+        ['Téléphone:', telephone if telephone else "N/A"],
+        ['Adresse:', adresse if adresse else "N/A"],
+    ]
+
+    # Style for info boxes
+    info_box_style = TableStyle([
+        ('FONTNAME', (0, 2), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 2), (0, -1), 9),
+        ('TEXTCOLOR', (0, 2), (0, -1), colors.HexColor("#4A5568")),
+        ('ALIGN', (0, 2), (0, -1), 'LEFT'),
+        ('FONTNAME', (1, 2), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (1, 2), (1, -1), 9),
+        ('TEXTCOLOR', (1, 2), (1, -1), colors.HexColor("#2D3748")),
+        ('ALIGN', (1, 2), (1, -1), 'LEFT'),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('LEFTPADDING', (0, 0), (-1, -1), 8),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#E8F4F8")),
+        ('SPAN', (0, 0), (1, 0)),
+    ])
+
+    left_table = Table(left_col_data, colWidths=[3*cm, 5*cm])
+    left_table.setStyle(info_box_style)
+
+    right_table = Table(right_col_data, colWidths=[3*cm, 5*cm])
+    right_table.setStyle(info_box_style)
+
+    # Container for side-by-side layout
+    container_data = [[left_table, right_table]]
+    container_table = Table(container_data, colWidths=[8.5*cm, 8.5*cm])
+    container_table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+    ]))
+
+    story.append(container_table)
+    story.append(Spacer(1, 0.8 * cm))
+
+    # =============================================
+    # ITEMS SECTION
+    # =============================================
+    items_header = Paragraph("<b>DÉTAILS DES ARTICLES</b>", section_style)
+    story.append(items_header)
+    story.append(Spacer(1, 0.3 * cm))
+
+    # Items Table
+    items_table_data = [["Désignation du Produit", "Qté", "Prix Unit. (DT)", "Total (DT)"]]
+
+    if items:
+        for desc, qty, unit_price, total_price in items:
+            # Skip items with quantity 0
+            if float(qty) > 0:
+                items_table_data.append([
+                    str(desc or "-"),
+                    str(int(qty)),
+                    str(int(float(unit_price))),
+                    str(int(float(total_price)))
+                ])
+
+    items_table = Table(items_table_data, colWidths=[8*cm, 2*cm, 3.5*cm, 3.5*cm])
+    items_table.setStyle(TableStyle([
+        # Header styling
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1F2A44")),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+        ('ALIGN', (1, 0), (-1, 0), 'CENTER'),
+        ('TOPPADDING', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+
+        # Body styling
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor("#2D3748")),
+        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+        # Grid and alternating rows
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor("#CBD5E0")),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#F7FAFC")]),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ]))
+
+    story.append(items_table)
+    story.append(Spacer(1, 0.6 * cm))
+
+    # =============================================
+    # FINANCIAL SUMMARY - RIGHT ALIGNED
+    # =============================================
+    summary_header = Paragraph("<b>RÉCAPITULATIF FINANCIER</b>", section_style)
+    story.append(summary_header)
+    story.append(Spacer(1, 0.3 * cm))
+
+    # Financial summary table
+    totals_data = [
+        ['Montant Total:', f"{int(montant_total)} DT"],
+        ['Montant Payé:', f"{int(paye)} DT"],
+        ['', ''],  # Separator row
+        ['Reste à Payer:', f"{int(reste)} DT"],
+    ]
+
+    # Determine rest color based on amount
+    reste_color = colors.HexColor("#E53E3E") if reste > 0 else colors.HexColor("#38A169")
+
+    totals_table = Table(totals_data, colWidths=[10*cm, 4*cm], hAlign='RIGHT')
+    totals_table.setStyle(TableStyle([
+        # Labels
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (0, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, 1), colors.HexColor("#4A5568")),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+
+        # Values
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (1, 0), (1, -1), 10),
+        ('TEXTCOLOR', (1, 0), (1, 1), colors.HexColor("#2D3748")),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+
+        # Padding
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+
+        # Lines
+        ('LINEBELOW', (0, 1), (-1, 1), 0.5, colors.HexColor("#E2E8F0")),
+        ('LINEABOVE', (0, 3), (-1, 3), 1.5, colors.HexColor("#1F2A44")),
+        ('LINEBELOW', (0, 3), (-1, 3), 1.5, colors.HexColor("#1F2A44")),
+
+        # Highlight reste à payer
+        ('FONTSIZE', (0, 3), (-1, 3), 12),
+        ('TEXTCOLOR', (0, 3), (-1, 3), reste_color),
+        ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor("#F7FAFC")),
+    ]))
+
+    story.append(totals_table)
+
+    # Build PDF with header and footer
+    if progress is not None:
+        doc.setProgressCallBack(_page_progress(progress))
+    doc.build(story, onFirstPage=draw_page, onLaterPages=draw_page)
@@ -0,0 +1,156 @@
+import itertools
+import logging
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+import connection_manager
+
+logger = logging.getLogger(__name__)
+
+
+class _Relay(QObject):
+    # Emitted from pool threads, delivered (queued) on the executor's thread
+    finished = Signal(int, object)
+    failed = Signal(int, object)
+
+
+class _Query(QRunnable):
+    """Runs fn(*args) on a pool thread, using that thread's own connection."""
+
+    def __init__(self, request_id, fn, args, relay):
+        super().__init__()
+        self.setAutoDelete(False)  # the executor keeps (and drops) the reference
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.relay = relay
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def cancel(self):
+        """Drop the result; interrupt the SQLite statement if one is running."""
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def run(self):
+        # Always report back, even when cancelled, so the executor can forget
+        # the request; it discards results of cancelled requests itself.
+        try:
+            with self._lock:
+                if not self.cancelled:
+                    self._conn = connection_manager.get_connection()
+            if self._conn is None:
+                self.relay.finished.emit(self.request_id, None)
+                return
+            result = self.fn(*self.args)
+        except Exception as e:
+            # sqlite3.OperationalError("interrupted") after cancel() lands here too
+            self.relay.failed.emit(self.request_id, e)
+            return
+        finally:
+            # Never interrupt the next query run on this thread's connection
+            with self._lock:
+                self._conn = None
+        self.relay.finished.emit(self.request_id, result)
+
+
+class QueryExecutor(QObject):
+    """
+    Runs database reads on a thread pool and hands the results back on the
+    GUI thread, so views never block on SQLite.
+
+    Requests are identified by a key (e.g. "home.clients"): submitting a new
+    request with the same key cancels the previous one, whose result is
+    never delivered (superseded searches, reloads during a reload).
+
+        executor.submit("home.clients", get_client_balances, on_result=self.fill)
+
+    Each pool thread reads through its own connection_manager connection;
+    with WAL, readers do not wait for the GUI thread's writes.
+
+    Errors go to the request's on_error; without one, they are emitted by
+    failed(key, error) and logged.
+    """
+
+    failed = Signal(str, object)
+
+    def __init__(self, max_threads=2, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        # Threads (and their connections) live as long as the executor
+        self._pool.setExpiryTimeout(-1)
+        self._relay = _Relay(self)
+        self._relay.finished.connect(self._on_finished)
+        self._relay.failed.connect(self._on_failed)
+        self._ids = itertools.count(1)
+        self._pending = {}   # key -> _Query
+        self._requests = {}  # request_id -> (key, query, on_result, on_error)
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None):
+        """Run fn(*args) in the background; returns the request id."""
+        self.cancel(key)
+        request_id = next(self._ids)
+        query = _Query(request_id, fn, args, self._relay)
+        self._pending[key] = query
+        self._requests[request_id] = (key, query, on_result, on_error)
+        self._pool.start(query)
+        return request_id
+
+    def cancel(self, key):
+        """Cancel the pending request for key, if any."""
+        query = self._pending.pop(key, None)
+        if query is None:
+            return
+        query.cancel()
+        if self._pool.tryTake(query):
+            # Never started: it will not report back
+            self._requests.pop(query.request_id, None)
+
+    def is_pending(self, key):
+        return key in self._pending
+
+    def wait_for_done(self, msecs=-1):
+        return self._pool.waitForDone(msecs)
+
+    def _take(self, request_id):
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return None
+        key, query, on_result, on_error = entry
+        if self._pending.get(key) is query:
+            del self._pending[key]
+        if query.cancelled:
+            return None
+        return entry
+
+    def _on_finished(self, request_id, result):
+        entry = self._take(request_id)
+        if entry and entry[2] is not None:
+            entry[2](result)
+
+    def _on_failed(self, request_id, error):
+        entry = self._take(request_id)
+        if entry is None:
+            return
+        key, _query, _on_result, on_error = entry
+        if on_error is not None:
+            on_error(error)
+            return
+        logger.error("Background query %r failed", key, exc_info=error)
+        self.failed.emit(key, error)
+
+
+_executor = None
+
+
+def query_executor():
+    """Return the application-wide QueryExecutor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor()
+    return _executor
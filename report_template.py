@@ -0,0 +1,247 @@
+"""
+Page template shared by the ReportLab reports (pdf_reports): company
+header with logo, footer, margins and paragraph styles.
+
+The costly parts are done once: the logo is decoded once per process, the
+static header is recorded once per document as a form XObject and stamped
+on every page with doForm, and the ParagraphStyles are built once.
+"""
+import os
+import threading
+from datetime import datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+
+from app_paths import resource_path
+
+
+LOGO_PATH = "assets/logo.png"
+HEADER_FORM = "CompanyHeader"
+
+_lock = threading.Lock()
+_logo = None    # ImageReader, or False when there is no usable logo
+_styles = None
+
+
+def logo():
+    """The company logo as an ImageReader decoded once per process, or None."""
+    global _logo
+    with _lock:
+        if _logo is None:
+            path = resource_path(LOGO_PATH)
+            try:
+                _logo = ImageReader(path) if os.path.exists(path) else False
+                if _logo:
+                    _logo.getRGBData()  # decode now, drawImage reuses the pixels
+            except Exception:
+                _logo = False
+        return _logo or None
+
+
+def paragraph_styles():
+    """ParagraphStyles of the reports, built once: title, cell, cell_center, client, sale_title, section."""
+    global _styles
+    with _lock:
+        if _styles is None:
+            styles = getSampleStyleSheet()
+            _styles = {
+                # Professional title style
+                "title": ParagraphStyle(
+                    'CustomTitle',
+                    parent=styles['Title'],
+                    fontSize=18,  # Made smaller from 24
+                    textColor=colors.HexColor("#1F2A44"),
+                    spaceAfter=20,
+                    alignment=TA_LEFT,  # Changed from TA_CENTER to TA_LEFT
+                    fontName='Helvetica-Bold'
+                ),
+                # Cell text style for wrapping
+                "cell": ParagraphStyle(
+                    'CellStyle',
+                    parent=styles['Normal'],
+                    fontSize=8,
+                    leading=10,
+                    alignment=TA_LEFT
+                ),
+                "cell_center": ParagraphStyle(
+                    'CellStyleCenter',
+                    parent=styles['Normal'],
+                    fontSize=8,
+                    leading=10,
+                    alignment=TA_CENTER
+                ),
+                "client": ParagraphStyle(
+                    'ClientStyle',
+                    parent=styles['Normal'],
+                    fontSize=12,
+                    textColor=colors.HexColor("#1F2A44"),
+                    spaceAfter=10,
+                    alignment=TA_CENTER,
+                    fontName='Helvetica-Bold'
+                ),
+                # Bon de vente
+                "sale_title": ParagraphStyle(
+                    'SaleTitle',
+                    parent=styles['Title'],
+                    fontSize=20,
+                    textColor=colors.HexColor("#1F2A44"),
+                    spaceAfter=8,
+                    alignment=TA_CENTER,
+                    fontName='Helvetica-Bold'
+                ),
+                "section": ParagraphStyle(
+                    'SectionHeader',
+                    parent=styles['Heading2'],
+                    fontSize=11,
+                    textColor=colors.HexColor("#1F2A44"),
+                    spaceAfter=6,
+                    fontName='Helvetica-Bold',
+                    leftIndent=0
+                ),
+            }
+        return _styles
+
+
+def new_document(filename):
+    """A4 document with the margins the header and footer need."""
+    doc = SimpleDocTemplate(
+        filename,
+        pagesize=A4,
+        rightMargin=2 * cm,
+        leftMargin=2 * cm,
+        topMargin=6 * cm,
+        bottomMargin=3 * cm
+    )
+    doc.generated_on = datetime.now().strftime('%d/%m/%Y à %H:%M')
+    return doc
+
+
+def _draw_header(canvas):
+    """Static part of every page: company name, details, logo and separators."""
+    # =============================================
+    # HEADER SECTION
+    # =============================================
+
+    # Header background (subtle gradient effect with rectangle)
+    canvas.setFillColor(colors.HexColor("#F8F9FA"))
+    canvas.rect(0, A4[1] - 5.2 * cm, A4[0], 5.2 * cm, fill=True, stroke=False)  # Reduced from 6.5cm
+
+    # Header dimensions
+    header_y_base = A4[1] - 2 * cm
+    left_margin = 2 * cm
+    right_margin = A4[0] - 2 * cm
+
+    # =============================================
+    # COMPANY NAME (LEFT - LARGER & BOLD)
+    # =============================================
+    canvas.setFillColor(colors.HexColor("#1F2A44"))
+    canvas.setFont("Helvetica-Bold", 22)
+    canvas.drawString(left_margin, header_y_base, "Tuniplast")
+
+    # =============================================
+    # COMPANY INFORMATION (LEFT - PROFESSIONAL SPACING)
+    # =============================================
+    info_y = header_y_base - 0.9 * cm
+    line_height = 0.45 * cm
+
+    canvas.setFillColor(colors.HexColor("#4A5568"))
+    canvas.setFont("Helvetica", 7)
+
+    info_lines = [
+        "KM 6 ROUTE DE TUNIS SOLIMAN NABEUL, NABEUL",
+        "Représentant commercial : Sami Nasraoui",
+        "Email : nasrauisami@gmail.com",
+        "Tél : 20 400 041",
+        "TVA: 1500874L/A/M/000"
+    ]
+
+    for i, line in enumerate(info_lines):
+        canvas.drawString(left_margin + 0.1 * cm, info_y - (i * line_height), line)
+
+    # =============================================
+    # LOGO (RIGHT - LEVEL WITH FIRST INFO LINE)
+    # =============================================
+    image = logo()
+    logo_size = 2.5 * cm  # Slightly smaller logo
+    logo_x = right_margin - logo_size
+    logo_y = info_y - (logo_size / 2) + 0.15 * cm  # Align center of logo with first info line
+
+    if image is not None:
+        try:
+            canvas.drawImage(
+                image,
+                logo_x,
+                logo_y,
+                width=logo_size,
+                height=logo_size,
+                mask="auto",
+                preserveAspectRatio=True
+            )
+        except Exception:
+            # Logo placeholder if image fails
+            canvas.setFillColor(colors.HexColor("#4A90E2"))
+            canvas.rect(logo_x, logo_y, logo_size, logo_size, fill=True, stroke=True)
+            canvas.setFillColor(colors.white)
+            canvas.setFont("Helvetica-Bold", 10)
+            canvas.drawCentredString(
+                logo_x + logo_size/2,
+                logo_y + logo_size/2,
+                "LOGO"
+            )
+
+    # =============================================
+    # ELEGANT SEPARATOR LINE
+    # =============================================
+    separator_y = header_y_base - 3 * cm  # Adjusted for smaller header
+    canvas.setStrokeColor(colors.HexColor("#1F2A44"))
+    canvas.setLineWidth(1.5)
+    canvas.line(left_margin, separator_y, right_margin, separator_y)
+
+    # Accent line (thinner, below main line)
+    canvas.setStrokeColor(colors.HexColor("#4A90E2"))
+    canvas.setLineWidth(0.5)
+    canvas.line(left_margin, separator_y - 0.15 * cm, right_margin, separator_y - 0.15 * cm)
+
+
+def draw_page(canvas, doc):
+    """onFirstPage/onLaterPages callback: header (form XObject) and footer."""
+    if not canvas.hasForm(HEADER_FORM):
+        canvas.beginForm(HEADER_FORM)
+        _draw_header(canvas)
+        canvas.endForm()
+
+    canvas.saveState()
+    canvas.doForm(HEADER_FORM)
+
+    left_margin = 2 * cm
+    right_margin = A4[0] - 2 * cm
+
+
+    # =============================================
+    # FOOTER SECTION
+    # =============================================
+
+    footer_y = 2 * cm
+
+    # Footer separator line
+    canvas.setStrokeColor(colors.HexColor("#E0E0E0"))
+    canvas.setLineWidth(0.5)
+    canvas.line(left_margin, footer_y + 0.5 * cm, right_margin, footer_y + 0.5 * cm)
+
+    # Footer text
+    canvas.setFillColor(colors.HexColor("#718096"))
+    canvas.setFont("Helvetica", 8.5)
+
+    # Page number (left)
+    canvas.drawString(left_margin, footer_y, f"Page {doc.page}")
+
+    # Generated date (right), the same on every page
+    canvas.drawRightString(right_margin, footer_y, f"Généré le {doc.generated_on}")
+
+    canvas.restoreState()
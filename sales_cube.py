@@ -0,0 +1,147 @@
+"""
+Quantity pivot for the per-product columns: one row per vente, one column
+per product, in a single matrix built in one pass from the vente items.
+
+NumPy holds the matrix when it is installed (the build, row totals and
+column totals are then vectorized); otherwise a flat array.array('d') does,
+with the same results. Quantities of items whose product is not a column
+(deleted product) go to a hidden last column, so they still count in the
+row totals.
+"""
+from array import array
+
+try:
+    import numpy
+except ImportError:  # optional: array.array fallback
+    numpy = None
+
+
+class SalesCube:
+    """
+    rows: positions 0..len-1, in the caller's order (e.g. a table model's
+    rows); columns: column_ids, in display order.
+    """
+    __slots__ = ("column_ids", "_column", "_stride", "_rows", "_matrix")
+
+    def __init__(self, row_ids, column_ids, item_rows=(), item_columns=(), quantities=()):
+        """
+        row_ids / column_ids: the row and column keys (vente ids, product ids).
+        item_rows, item_columns, quantities: one value per item, e.g. the
+        array.array columns of VenteItemStore; items of unknown rows are ignored.
+        """
+        row_ids = list(row_ids)
+        self.column_ids = list(column_ids)
+        self._column = {cid: i for i, cid in enumerate(self.column_ids)}
+        self._stride = len(self.column_ids) + 1
+        self._rows = len(row_ids)
+        if numpy is not None:
+            self._matrix = numpy.zeros((self._rows, self._stride))
+            if len(quantities):
+                rows = _positions(row_ids, item_rows, -1)
+                columns = _positions(self.column_ids, item_columns, self._stride - 1)
+                known = rows >= 0
+                numpy.add.at(self._matrix, (rows[known], columns[known]),
+                             numpy.asarray(quantities, dtype=numpy.float64)[known])
+            return
+        stride = self._stride
+        matrix = self._matrix = array('d', bytes(8 * stride * self._rows))
+        bases = {rid: i * stride for i, rid in enumerate(row_ids)}
+        columns = self._column
+        other = stride - 1
+        for rid, cid, qty in zip(item_rows, item_columns, quantities):
+            base = bases.get(rid)
+            if base is not None:
+                matrix[base + columns.get(cid, other)] += qty
+
+    def __len__(self):
+        return self._rows
+
+    def value(self, row, column):
+        """Quantity at (row position, column position)."""
+        if numpy is not None:
+            return float(self._matrix[row, column])
+        return self._matrix[row * self._stride + column]
+
+    def row_values(self, row):
+        """The column quantities of a row, as a list."""
+        if numpy is not None:
+            return self._matrix[row, :-1].tolist()
+        start = row * self._stride
+        return self._matrix[start:start + self._stride - 1].tolist()
+
+    def row_total(self, row):
+        """Total quantity of a row, unknown columns included."""
+        if numpy is not None:
+            return float(self._matrix[row].sum())
+        start = row * self._stride
+        return sum(self._matrix[start:start + self._stride])
+
+    def row_totals(self):
+        """row_total() of every row, as a list."""
+        if numpy is not None:
+            return self._matrix.sum(axis=1).tolist()
+        stride = self._stride
+        return [sum(self._matrix[start:start + stride]) for start in range(0, len(self._matrix), stride)]
+
+    def column_totals(self, rows=None):
+        """Total of each column over the given row positions (default: all), as a list."""
+        if numpy is not None:
+            matrix = self._matrix if rows is None else self._matrix[list(rows)]
+            return matrix[:, :-1].sum(axis=0).tolist()
+        stride = self._stride
+        if rows is None:
+            return [sum(self._matrix[col::stride]) for col in range(stride - 1)]
+        totals = [0.0] * (stride - 1)
+        for row in rows:
+            for col, value in enumerate(self.row_values(row)):
+                totals[col] += value
+        return totals
+
+    #------Row changes------
+    def _line(self, pairs):
+        # (column_id, quantity) pairs -> the stride values of one row
+        line = [0.0] * self._stride
+        columns = self._column
+        other = self._stride - 1
+        for cid, qty in pairs:
+            line[columns.get(cid, other)] += qty or 0.0
+        return line
+
+    def set_row(self, row, pairs):
+        """Replace the quantities of a row with the (column_id, quantity) pairs."""
+        line = self._line(pairs)
+        if numpy is not None:
+            self._matrix[row] = line
+        else:
+            start = row * self._stride
+            self._matrix[start:start + self._stride] = array('d', line)
+
+    def insert_row(self, row, pairs):
+        """Insert a row before position row (len(self) appends)."""
+        line = self._line(pairs)
+        if numpy is not None:
+            self._matrix = numpy.insert(self._matrix, row, line, axis=0)
+        else:
+            start = row * self._stride
+            self._matrix[start:start] = array('d', line)
+        self._rows += 1
+
+    def remove_row(self, row):
+        if numpy is not None:
+            self._matrix = numpy.delete(self._matrix, row, axis=0)
+        else:
+            start = row * self._stride
+            del self._matrix[start:start + self._stride]
+        self._rows -= 1
+
+
+def _positions(keys, values, missing):
+    # Position of each value in keys (missing when absent), vectorized
+    values = numpy.asarray(values, dtype=numpy.int64)
+    if not keys:
+        return numpy.full(len(values), missing, dtype=numpy.int64)
+    keys = numpy.asarray(keys, dtype=numpy.int64)
+    order = numpy.argsort(keys, kind="stable")
+    ordered = keys[order]
+    found = numpy.minimum(numpy.searchsorted(ordered, values), len(ordered) - 1)
+    return numpy.where(ordered[found] == values, order[found], missing)
@@ -0,0 +1,67 @@
+import unicodedata
+
+
+def fold(text):
+    """Case- and accent-insensitive form of text ("Équipé" -> "equipe")."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    if text.isascii():
+        return text
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+class SearchIndex:
+    """
+    Substring search over precomputed folded keys, one key per row.
+    When a query extends the previous one (e.g. "ahm" -> "ahme"), only the
+    previous matches are rescanned instead of every row.
+    """
+
+    def __init__(self, texts=()):
+        self.set_texts(texts)
+
+    def set_texts(self, texts):
+        self.keys = [fold(t) for t in texts]
+        self._last_query = ""
+        self._last_matches = None
+
+    def insert(self, row, text):
+        self.keys.insert(row, fold(text))
+        self._forget_last()
+
+    def update(self, row, text):
+        self.keys[row] = fold(text)
+        self._forget_last()
+
+    def remove(self, row):
+        del self.keys[row]
+        self._forget_last()
+
+    def _forget_last(self):
+        # Row numbers changed: the previous matches can no longer be narrowed
+        self._last_query = ""
+        self._last_matches = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query):
+        """Return the list of matching row numbers, or None when the query is empty."""
+        query = fold(query).strip()
+        if not query:
+            self._last_query = ""
+            self._last_matches = None
+            return None
+
+        keys = self.keys
+        if self._last_matches is not None and self._last_query in query:
+            # Anything matching the longer query also matched the shorter one
+            candidates = self._last_matches
+            matches = [i for i in candidates if query in keys[i]]
+        else:
+            matches = [i for i, key in enumerate(keys) if query in key]
+
+        self._last_query = query
+        self._last_matches = matches
+        return matches
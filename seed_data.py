@@ -6,6 +6,10 @@ def get_connection():
     from database import get_connection
     return get_connection()
 
+def transaction():
+    from connection_manager import transaction
+    return transaction()
+
 def seed_clients():
     """Add sample Tunisian clients"""
     clients = [
@@ -17,17 +21,13 @@ def seed_clients():
        
     ]
 
-    conn = get_connection()
-    c = conn.cursor()
-
-    for client in clients:
-        c.execute("""
-            INSERT INTO clients (nom, telephone, adresse, email)
-            VALUES (?, ?, ?, ?)
-        """, client)
-
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        c = conn.cursor()
+        for client in clients:
+            c.execute("""
+                INSERT INTO clients (nom, telephone, adresse, email)
+                VALUES (?, ?, ?, ?)
+            """, client)
     print(f"Added {len(clients)} sample clients")
 
 def seed_ventes():
@@ -86,14 +86,11 @@ def seed_ventes():
 
         ventes.append((client_id, sale_date.strftime('%Y-%m-%d'), ref_number, montant_total, description))
 
-    for vente in ventes:
-        c.execute("""
+    with transaction() as conn:
+        conn.executemany("""
             INSERT INTO ventes (client_id, date, reference, montant_total, description)
             VALUES (?, ?, ?, ?, ?)
-        """, vente)
-
-    conn.commit()
-    conn.close()
+        """, ventes)
     print(f"Added {len(ventes)} sample sales")
 
 def seed_paiements():
@@ -158,14 +155,11 @@ def seed_paiements():
 
             paiements.append((vente_id, payment_date.strftime('%Y-%m-%d'), payment_amount, mode, note))
 
-    for paiement in paiements:
-        c.execute("""
+    with transaction() as conn:
+        conn.executemany("""
             INSERT INTO paiements (vente_id, date, montant, mode, note)
             VALUES (?, ?, ?, ?, ?)
-        """, paiement)
-
-    conn.commit()
-    conn.close()
+        """, paiements)
     print(f"Added {len(paiements)} sample payments with different dates")
 
 def seed_all():
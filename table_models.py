@@ -0,0 +1,646 @@
+from bisect import bisect_left, bisect_right
+
+from PySide6.QtCore import (
+    Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QRect, QEvent, Signal
+)
+from PySide6.QtGui import QColor, QPainter, QFont
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle
+
+from export_data import (
+    AGING_HEADERS, CLIENT_HEADERS, ExportColumn, ExportTable, QUANTITY, MONEY, aging_table, clients_table, to_money,
+    to_quantity
+)
+from sales_cube import SalesCube
+from search_index import SearchIndex
+
+
+#------Painted action buttons------
+class ActionButton:
+    """Description of one button painted by ActionButtonsDelegate."""
+    __slots__ = ("key", "label", "color", "hover_color", "enabled")
+
+    def __init__(self, key, label, color, hover_color=None, enabled=True):
+        self.key = key
+        self.label = label
+        self.color = QColor(color)
+        self.hover_color = QColor(hover_color or color)
+        self.enabled = enabled
+
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """
+    Paints a row of small buttons inside a cell instead of creating real
+    QPushButton widgets, so only visible rows cost anything.
+    Emits clicked(action_key, index) with the index of the view's model.
+    """
+    clicked = Signal(str, QModelIndex)
+
+    SPACING = 2
+    MARGIN = 2
+    MAX_WIDTH = 80
+
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        self.actions = actions
+        self._hover = None  # (row, action_key)
+        self._font = QFont()
+        self._font.setPointSize(7)
+
+    def actions_for(self, index):
+        """Buttons to draw for the given index (override for per-row buttons)."""
+        return self.actions
+
+    def _button_rects(self, option_rect, count):
+        if count == 0:
+            return []
+        inner = option_rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        width = (inner.width() - self.SPACING * (count - 1)) // count
+        width = max(1, min(width, self.MAX_WIDTH))
+        rects = []
+        x = inner.left()
+        for _ in range(count):
+            rects.append(QRect(x, inner.top(), width, inner.height()))
+            x += width + self.SPACING
+        return rects
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        actions = self.actions_for(index)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self._font)
+        for action, rect in zip(actions, self._button_rects(option.rect, len(actions))):
+            hovered = action.enabled and self._hover == (index.row(), action.key)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(action.hover_color if hovered else action.color)
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, action.label)
+        painter.restore()
+
+    def _action_at(self, option, index, pos):
+        actions = self.actions_for(index)
+        for action, rect in zip(actions, self._button_rects(option.rect, len(actions))):
+            if rect.contains(pos):
+                return action
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        etype = event.type()
+        if etype == QEvent.Type.MouseMove:
+            action = self._action_at(option, index, event.position().toPoint())
+            hover = (index.row(), action.key) if action else None
+            if hover != self._hover:
+                self._hover = hover
+                view = self.parent()
+                if view is not None:
+                    view.viewport().update()
+            return False
+        if etype == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            action = self._action_at(option, index, event.position().toPoint())
+            if action is not None and action.enabled:
+                self.clicked.emit(action.key, index)
+                return True
+        return False
+
+
+#------Home: clients list------
+class ClientsTableModel(QAbstractTableModel):
+    """
+    Read-only model over the clients cache of Home.
+    rows: database.ClientBalance rows (id, nom, telephone, adresse, email, credit, reste).
+    Columns: Client, Téléphone, Adresse, Email, [categories], Crédit, Reste à payer, Actions
+    """
+    FIXED_HEADERS = CLIENT_HEADERS
+
+    def __init__(self, categories, parent=None):
+        super().__init__(parent)
+        self.categories = categories  # List of (id, name, description) tuples
+        self.rows = []
+        self.category_quantities = {}
+        self.headers = list(self.FIXED_HEADERS)
+        self.headers.extend(cat_name for cat_id, cat_name, cat_desc in categories)
+        self.headers.extend(["Crédit", "Reste à payer", "Actions"])
+        self.actions_column = len(self.headers) - 1
+        self.search_index = SearchIndex()
+        self._row_by_id = {}
+        # (text, client ids) found by the database full-text index (sales,
+        # items), set by the view when its background search finishes
+        self._full_text_hits = ("", ())
+
+    @staticmethod
+    def _search_text(row):
+        # Text searched by the filter proxy (nom, téléphone, adresse, email)
+        return "\n".join((row[1] or "", row[2] or "", row[3] or "", row[4] or ""))
+
+    def set_clients(self, rows, category_quantities):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self._row_by_id = {r[0]: i for i, r in enumerate(self.rows)}
+        self.category_quantities = category_quantities
+        self.search_index.set_texts(self._search_text(r) for r in self.rows)
+        self.endResetModel()
+
+    def patch_client(self, client_id, row, quantities):
+        """
+        Apply a change to one client: row is the new get_client_balance() row
+        (None when deleted), quantities its {category_id: quantity}.
+        Rows stay ordered by name.
+        """
+        position = self._row_by_id.get(client_id)
+        if row is None:
+            self.category_quantities.pop(client_id, None)
+            if position is not None:
+                self._remove_row(position)
+            return
+        self.category_quantities[client_id] = quantities
+        if position is not None and self.rows[position][1] == row[1]:
+            self.rows[position] = row
+            self.search_index.update(position, self._search_text(row))
+            self.dataChanged.emit(self.index(position, 0), self.index(position, self.columnCount() - 1))
+            return
+        # New client or renamed: (re)insert at its sorted position
+        if position is not None:
+            self._remove_row(position)
+        names = [r[1] for r in self.rows]
+        position = bisect_right(names, row[1])
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, row)
+        self.search_index.insert(position, self._search_text(row))
+        self._row_by_id = {r[0]: i for i, r in enumerate(self.rows)}
+        self.endInsertRows()
+
+    def set_category_quantities(self, category_quantities):
+        """Replace the per-category quantities (e.g. after a product changed category)."""
+        self.category_quantities = category_quantities
+        if self.rows and self.categories:
+            self.dataChanged.emit(self.index(0, 4), self.index(len(self.rows) - 1, 3 + len(self.categories)))
+
+    def _remove_row(self, position):
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self.rows[position]
+        self.search_index.remove(position)
+        self._row_by_id = {r[0]: i for i, r in enumerate(self.rows)}
+        self.endRemoveRows()
+
+    def client_id(self, row):
+        return self.rows[row][0]
+
+    def client_name(self, row):
+        return self.rows[row][1]
+
+    def set_full_text_hits(self, text, client_ids):
+        """Client ids that search(text) adds to the matches of the loaded columns."""
+        self._full_text_hits = (text.strip(), client_ids)
+
+    def search(self, text):
+        """Rows matching text in the loaded columns, plus the full-text hits set for text."""
+        rows = self.search_index.search(text)
+        hits_text, client_ids = self._full_text_hits
+        if rows is None or hits_text != text or not client_ids:
+            return rows
+        extra = {self._row_by_id.get(cid) for cid in client_ids}
+        extra.discard(None)
+        if not extra.difference(rows):
+            return rows
+        return sorted(extra.union(rows))
+
+    def export_table(self, rows=None):
+        """Typed ExportTable of the given source rows (default: all), without Actions."""
+        if rows is not None:
+            rows = [self.rows[row] for row in rows]
+        return clients_table(self.rows if rows is None else rows, self.categories, self.category_quantities)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        cid, nom, tel, adr, eml, credit, reste = self.rows[index.row()]
+        col = index.column()
+        num_categories = len(self.categories)
+        if col == 0:
+            return nom
+        if col == 1:
+            return tel or ""
+        if col == 2:
+            return adr or ""
+        if col == 3:
+            return eml or ""
+        if col < 4 + num_categories:
+            cat_id = self.categories[col - 4][0]
+            return str(int(self.category_quantities.get(cid, {}).get(cat_id, 0)))
+        if col == 4 + num_categories:
+            return f"{credit:.3f} DT"
+        if col == 5 + num_categories:
+            return f"{reste:.3f} DT"
+        return None
+
+
+class SearchFilterProxyModel(QAbstractProxyModel):
+    """
+    Shows the rows matched by the source model's search(text).
+    The proxy only holds the list of visible source rows: a new query is one
+    SearchIndex lookup and a reset, with no per-row call back into Python
+    (QSortFilterProxyModel.filterAcceptsRow costs ~60 ms on 50k rows).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self._rows = None     # visible source rows, None: every row
+        self._reverse = None  # source row -> proxy row, built on demand
+        self._removing = False
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._on_source_reset)
+        model.dataChanged.connect(self._on_source_data_changed)
+        model.rowsAboutToBeInserted.connect(self._on_source_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._on_source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_source_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._on_source_rows_removed)
+
+    def _on_source_reset(self):
+        # New rows: the previous matches are meaningless, search again
+        self._rows = self._compute_rows()
+        self._reverse = None
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            first = self.mapFromSource(top_left.siblingAtRow(row))
+            if first.isValid():
+                last = self.index(first.row(), bottom_right.column())
+                self.dataChanged.emit(first, last, roles)
+
+    # Rows patched in the source are mapped without a reset. Inserted rows
+    # are shown even when a filter is active, so a new entry is visible.
+    def _on_source_rows_about_to_be_inserted(self, parent, first, last):
+        position = first if self._rows is None else bisect_left(self._rows, first)
+        self.beginInsertRows(QModelIndex(), position, position + last - first)
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        if self._rows is not None:
+            count = last - first + 1
+            position = bisect_left(self._rows, first)
+            shifted = [r + count if r >= first else r for r in self._rows]
+            shifted[position:position] = range(first, last + 1)
+            self._rows = shifted
+        self._reverse = None
+        self.endInsertRows()
+
+    def _on_source_rows_about_to_be_removed(self, parent, first, last):
+        if self._rows is None:
+            start, end = first, last + 1
+        else:
+            start, end = bisect_left(self._rows, first), bisect_right(self._rows, last)
+        self._removing = start < end
+        if self._removing:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+
+    def _on_source_rows_removed(self, parent, first, last):
+        if self._rows is not None:
+            count = last - first + 1
+            self._rows = [r - count if r > last else r for r in self._rows if not first <= r <= last]
+        self._reverse = None
+        if self._removing:
+            self.endRemoveRows()
+
+    def _compute_rows(self):
+        return self.sourceModel().search(self._text)
+
+    def _refilter(self):
+        self.beginResetModel()
+        self._rows = self._compute_rows()
+        self._reverse = None
+        self.endResetModel()
+
+    def source_rows(self):
+        """Source rows currently shown, in display order."""
+        if self._rows is None:
+            return range(self.sourceModel().rowCount())
+        return list(self._rows)
+
+    def set_search_text(self, text):
+        text = text.strip()
+        if text != self._text:
+            self._text = text
+            self._refilter()
+
+    def refilter(self):
+        """Search the same text again (the source's results for it changed); resets only on a difference."""
+        rows = self._compute_rows()
+        if rows != self._rows:
+            self.beginResetModel()
+            self._rows = rows
+            self._reverse = None
+            self.endResetModel()
+
+    # --- QAbstractProxyModel interface ---
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount() if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount()) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row() if self._rows is None else self._rows[proxy_index.row()]
+        return self.sourceModel().index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self._rows is None:
+            return self.index(source_index.row(), source_index.column())
+        if self._reverse is None:
+            self._reverse = {src: r for r, src in enumerate(self._rows)}
+        row = self._reverse.get(source_index.row())
+        return QModelIndex() if row is None else self.index(row, source_index.column())
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        # Shortcut for mapToSource(index).data(role): called for every painted cell
+        if not index.isValid():
+            return None
+        row = index.row() if self._rows is None else self._rows[index.row()]
+        source = self.sourceModel()
+        return source.data(source.index(row, index.column()), role)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        if role == Qt.ItemDataRole.DisplayRole:
+            return section + 1
+        return None
+
+
+#------ClientDetail: sales list------
+RESTE_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class SalesTableModel(QAbstractTableModel):
+    """
+    Read-only model over the ventes of ClientDetail's ClientSalesController.
+    rows: database.Vente rows (id, date, reference, description, montant_total, paye).
+    Columns: Date, Référence, [products], Qt total, Total DT, Payé DT, Reste DT, Actions
+    The product quantities are a SalesCube, one cube row per model row.
+    """
+
+    def __init__(self, products, parent=None):
+        super().__init__(parent)
+        self.products = products  # List of (id, name, price, category_id) tuples
+        self.rows = []
+        self.cube = SalesCube((), [prod[0] for prod in products])
+        self.search_index = SearchIndex()
+        self.headers = ["Date", "Référence"]
+        self.headers.extend(prod_name for prod_id, prod_name, prod_price, cat_id in products)
+        self.headers.extend(["Qt total", "Total DT", "Payé DT", "Reste DT", "Actions"])
+        self.actions_column = len(self.headers) - 1
+
+    @staticmethod
+    def _search_text(row):
+        return (row[2] or "") + "\n" + (row[3] or "")
+
+    def set_ventes(self, rows, items):
+        """
+        Replace the rows; items is the client's data_controllers.VenteItemStore.
+        Per-row quantities are computed once here, not on every filter.
+        """
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.cube = SalesCube([row.id for row in self.rows], self.cube.column_ids, *items.quantity_columns())
+        self.search_index.set_texts(self._search_text(r) for r in self.rows)
+        self.endResetModel()
+
+    def patch_vente(self, vente_id, row, items):
+        """
+        Apply a change to one vente: row is the new get_vente() row (None when
+        deleted), items its VenteItem rows. Rows stay ordered by date, newest first.
+        """
+        position = next((i for i, r in enumerate(self.rows) if r.id == vente_id), None)
+        if row is None:
+            if position is not None:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self.rows[position]
+                self.cube.remove_row(position)
+                self.search_index.remove(position)
+                self.endRemoveRows()
+            return
+        pairs = [(item.product_id, item.quantity) for item in items]
+        if position is not None:
+            self.rows[position] = row
+            self.cube.set_row(position, pairs)
+            self.search_index.update(position, self._search_text(row))
+            self.dataChanged.emit(self.index(position, 0), self.index(position, self.columnCount() - 1))
+            return
+        # Newest first: insert before the first older vente
+        date = row.date or ""
+        position = next((i for i, r in enumerate(self.rows) if (r.date or "") < date), len(self.rows))
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, row)
+        self.cube.insert_row(position, pairs)
+        self.search_index.insert(position, self._search_text(row))
+        self.endInsertRows()
+
+    def vente_id(self, row):
+        return self.rows[row][0]
+
+    def vente_reference(self, row):
+        vid, d, ref = self.rows[row][:3]
+        return ref or f"Vente #{vid}"
+
+    def vente_date(self, row):
+        return self.rows[row][1]
+
+    def search(self, text):
+        return self.search_index.search(text)
+
+    def export_table(self, rows=None):
+        """Typed ExportTable of the given source rows (default: all), without Actions."""
+        columns = [ExportColumn("Date"), ExportColumn("Référence")]
+        columns.extend(ExportColumn(prod_name, QUANTITY) for prod_id, prod_name, prod_price, cat_id in self.products)
+        columns.extend([
+            ExportColumn("Qt total", QUANTITY), ExportColumn("Total DT", MONEY),
+            ExportColumn("Payé DT", MONEY), ExportColumn("Reste DT", MONEY),
+        ])
+        cube = self.cube
+        positions = range(len(self.rows)) if rows is None else list(rows)
+        row_totals = cube.row_totals()
+        data = []
+        for row in positions:
+            vid, d, ref, desc, total, paye = self.rows[row]
+            total, paye = to_money(total), to_money(paye)
+            values = [d or "", ref or ""]
+            values.extend(map(to_quantity, cube.row_values(row)))
+            values.extend([to_quantity(row_totals[row]), total, paye, total - paye])
+            data.append(tuple(values))
+        # The quantity totals come from the cube in one pass
+        column_totals = cube.column_totals(None if rows is None else positions)
+        known_totals = {2 + i: to_quantity(total) for i, total in enumerate(column_totals)}
+        known_totals[2 + len(column_totals)] = to_quantity(sum(row_totals[row] for row in positions))
+        return ExportTable(columns, data, known_totals)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        vid, d, ref, desc, total, paye = self.rows[row]
+        if role == RESTE_ROLE:
+            return total - paye
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        col = index.column()
+        num_products = len(self.products)
+        if col == 0:
+            return d
+        if col == 1:
+            return ref or ""
+        if col < 2 + num_products:
+            return str(int(self.cube.value(row, col - 2)))
+        if col == 2 + num_products:
+            return str(int(self.cube.row_total(row)))
+        if col == 3 + num_products:
+            return f"{total:.3f} DT"
+        if col == 4 + num_products:
+            return f"{paye:.3f} DT"
+        if col == 5 + num_products:
+            return f"{total - paye:.3f} DT"
+        return None
+
+
+class SalesFilterProxyModel(SearchFilterProxyModel):
+    """Search filter plus an optional (from, to) ISO date range on the date column."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._date_range = None
+
+    def set_filters(self, text, date_range=None):
+        text = text.strip()
+        if text == self._text and date_range == self._date_range:
+            return
+        self._text = text
+        self._date_range = date_range
+        self._refilter()
+
+    def _compute_rows(self):
+        rows = super()._compute_rows()
+        if self._date_range is None:
+            return rows
+        model = self.sourceModel()
+        if rows is None:
+            rows = range(model.rowCount())
+        date_from, date_to = self._date_range
+        return [r for r in rows if date_from <= (model.vente_date(r) or "") <= date_to]
+
+
+class SalesActionsDelegate(ActionButtonsDelegate):
+    """Historique / Imprimer / Payer (or a disabled Payé) / Modifier / Suppr."""
+
+    def __init__(self, parent=None):
+        self._pay = ActionButton("pay", "💰 Payer", "#FF8C00", "#E67E00")
+        self._paid = ActionButton("paid", "✅ Payé", "#28A745", enabled=False)
+        self._head = [
+            ActionButton("history", "📜 Historique", "#6C757D", "#5A6268"),
+            ActionButton("print", "🖨️ Imprimer", "#17A2B8", "#138496"),
+        ]
+        self._tail = [
+            ActionButton("edit", "✏️ Modifier", "#0078D4", "#106EBE"),
+            ActionButton("delete", "🗑️ Suppr", "#D13438", "#B91C1C"),
+        ]
+        super().__init__(self._head + [self._pay] + self._tail, parent)
+        self._paid_actions = self._head + [self._paid] + self._tail
+
+    def actions_for(self, index):
+        reste = index.data(RESTE_ROLE) or 0
+        return self.actions if reste > 0 else self._paid_actions
+
+
+class AgingTableModel(QAbstractTableModel):
+    """
+    Read-only, sortable model over the aged receivables (balance âgée).
+    rows: database.AgingRow rows. Columns: export_data.AGING_HEADERS.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.headers = list(AGING_HEADERS)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+    def export_table(self):
+        """Typed ExportTable of the rows, in the displayed order."""
+        return aging_table(self.rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole and 2 <= col <= 6:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        # AgingRow without client_id: same order as the columns
+        value = self.rows[index.row()][col + 1]
+        if 2 <= col <= 6:
+            return f"{value:.3f} DT"
+        return value or ""
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        field = column + 1
+        amounts = 2 <= column <= 6
+        self.rows.sort(key=lambda row: row[field] if amounts else (row[field] or "").casefold(),
+                       reverse=order == Qt.SortOrder.DescendingOrder)
+        self.layoutChanged.emit()
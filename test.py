@@ -18,6 +18,7 @@ from param import APP_VERSION, APP_URL, UPDATE_JSON_URL
 from PySide6.QtGui import QIcon, QImage
 from PySide6.QtCore import QDate, Qt, QObject, Signal, QThread
 from database import init_db, get_connection, reset_db
+from connection_manager import transaction
 from datetime import date, datetime
 from PySide6.QtWidgets import QSplashScreen
 from PySide6.QtGui import QPixmap
@@ -1312,20 +1313,17 @@ class App(QWidget):
             
             if msg_box.clickedButton() == btn_oui:
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    
-                    # Supprimer les paiements associés aux ventes du client
-                    c.execute("DELETE FROM paiements WHERE vente_id IN (SELECT id FROM ventes WHERE client_id=?)", (client_id,))
-                    
-                    # Supprimer les ventes du client
-                    c.execute("DELETE FROM ventes WHERE client_id=?", (client_id,))
-                    
-                    # Supprimer le client
-                    c.execute("DELETE FROM clients WHERE id=?", (client_id,))
-                    
-                    conn.commit()
-                    conn.close()
+                    with transaction() as conn:
+                        c = conn.cursor()
+
+                        # Supprimer les paiements associés aux ventes du client
+                        c.execute("DELETE FROM paiements WHERE vente_id IN (SELECT id FROM ventes WHERE client_id=?)", (client_id,))
+
+                        # Supprimer les ventes du client
+                        c.execute("DELETE FROM ventes WHERE client_id=?", (client_id,))
+
+                        # Supprimer le client
+                        c.execute("DELETE FROM clients WHERE id=?", (client_id,))
                     
                     QMessageBox.information(self, "Succès", f"Client '{client_name}' supprimé avec succès.")
                     
@@ -1365,16 +1363,14 @@ class App(QWidget):
                         return
 
                     # Mettre à jour le client
-                    conn = get_connection()
-                    c = conn.cursor()
-                    c.execute("""
-                        UPDATE clients 
-                        SET nom=?, telephone=?, adresse=?, email=?
-                        WHERE id=?
-                    """, (data['nom'].strip(), data['telephone'].strip(), 
-                        data['adresse'].strip(), data['email'].strip(), client_id))
-                    conn.commit()
-                    conn.close()
+                    with transaction() as conn:
+                        c = conn.cursor()
+                        c.execute("""
+                            UPDATE clients 
+                            SET nom=?, telephone=?, adresse=?, email=?
+                            WHERE id=?
+                        """, (data['nom'].strip(), data['telephone'].strip(), 
+                            data['adresse'].strip(), data['email'].strip(), client_id))
 
                     self.load_clients()
                     QMessageBox.information(self, "Succès", "Client modifié avec succès!")
@@ -1445,12 +1441,10 @@ class App(QWidget):
                     return
 
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    c.execute("INSERT INTO clients(nom, telephone, adresse, email) VALUES (?,?,?,?)",
-                            (data['nom'].strip(), data['telephone'].strip(), data['adresse'].strip(), data['email'].strip()))
-                    conn.commit()
-                    conn.close()
+                    with transaction() as conn:
+                        c = conn.cursor()
+                        c.execute("INSERT INTO clients(nom, telephone, adresse, email) VALUES (?,?,?,?)",
+                                (data['nom'].strip(), data['telephone'].strip(), data['adresse'].strip(), data['email'].strip()))
 
                     self.load_clients()
                     QMessageBox.information(self, "Succès", "Client ajouté avec succès!")
@@ -1870,17 +1864,14 @@ class ClientDetail(QDialog):
             
             if msg_box.clickedButton() == btn_oui:
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    
-                    # Supprimer les paiements associés à la vente
-                    c.execute("DELETE FROM paiements WHERE vente_id=?", (vente_id,))
-                    
-                    # Supprimer la vente
-                    c.execute("DELETE FROM ventes WHERE id=?", (vente_id,))
-                    
-                    conn.commit()
-                    conn.close()
+                    with transaction() as conn:
+                        c = conn.cursor()
+
+                        # Supprimer les paiements associés à la vente
+                        c.execute("DELETE FROM paiements WHERE vente_id=?", (vente_id,))
+
+                        # Supprimer la vente
+                        c.execute("DELETE FROM ventes WHERE id=?", (vente_id,))
                     
                     QMessageBox.information(self, "Succès", f"Vente '{vente_ref}' supprimée avec succès.")
                     self.refresh_ventes()  # Recharger la liste
@@ -1954,22 +1945,19 @@ class ClientDetail(QDialog):
                     # new_paye = montant - new_reste
 
                     # Mettre à jour la vente
-                    conn = get_connection()
-                    c = conn.cursor()
-                    c.execute("""
-                        UPDATE ventes 
-                        SET reference=?, description=?, montant_total=?
-                        WHERE id=?
-                    """, (data['reference'], data['description'], montant, vente_id))
-
-                    # # Supprimer tous les paiements existants et ajouter un nouveau paiement avec le montant payé calculé
-                    # c.execute("DELETE FROM paiements WHERE vente_id=?", (vente_id,))
-                    # if new_paye > 0:
-                    #     from datetime import date
-                    #     c.execute("INSERT INTO paiements (vente_id, montant, date) VALUES (?, ?, ?)", (vente_id, new_paye, date.today().isoformat()))
-                    
-                    conn.commit()
-                    conn.close()
+                    with transaction() as conn:
+                        c = conn.cursor()
+                        c.execute("""
+                            UPDATE ventes 
+                            SET reference=?, description=?, montant_total=?
+                            WHERE id=?
+                        """, (data['reference'], data['description'], montant, vente_id))
+
+                        # # Supprimer tous les paiements existants et ajouter un nouveau paiement avec le montant payé calculé
+                        # c.execute("DELETE FROM paiements WHERE vente_id=?", (vente_id,))
+                        # if new_paye > 0:
+                        #     from datetime import date
+                        #     c.execute("INSERT INTO paiements (vente_id, montant, date) VALUES (?, ?, ?)", (vente_id, new_paye, date.today().isoformat()))
 
                     self.refresh_ventes()
                     QMessageBox.information(self, "Succès", "Vente modifiée avec succès!")
@@ -2013,14 +2001,12 @@ class ClientDetail(QDialog):
                     return
 
                 try:
-                    conn = get_connection()
-                    c = conn.cursor()
-                    c.execute("""
-                    INSERT INTO ventes(client_id, date, reference, description, montant_total)
-                    VALUES (?,?,?,?,?)
-                    """, (self.client_id, date.today().isoformat(), data['reference'], data['description'], montant))
-                    conn.commit()
-                    conn.close()
+                    with transaction() as conn:
+                        c = conn.cursor()
+                        c.execute("""
+                        INSERT INTO ventes(client_id, date, reference, description, montant_total)
+                        VALUES (?,?,?,?,?)
+                        """, (self.client_id, date.today().isoformat(), data['reference'], data['description'], montant))
 
                     self.refresh_ventes()
                     QMessageBox.information(self, "Succès", "Vente ajoutée avec succès!")
@@ -2072,14 +2058,12 @@ class ClientDetail(QDialog):
                 return
 
             try:
-                conn = get_connection()
-                c = conn.cursor()
-                c.execute("""
-                INSERT INTO paiements(vente_id, date, montant, mode, note)
-                VALUES (?,?,?,?,?)
-                """, (vente_id, date.today().isoformat(), montant, mode, note))
-                conn.commit()
-                conn.close()
+                with transaction() as conn:
+                    c = conn.cursor()
+                    c.execute("""
+                    INSERT INTO paiements(vente_id, date, montant, mode, note)
+                    VALUES (?,?,?,?,?)
+                    """, (vente_id, date.today().isoformat(), montant, mode, note))
 
                 self.refresh_ventes()
                 QMessageBox.information(self, "Succès", "Paiement enregistré avec succès!")
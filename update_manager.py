@@ -1,6 +1,5 @@
 import os
 import json
-import requests
 import subprocess
 import tempfile
 import shutil
@@ -15,6 +14,7 @@ class UpdateChecker(QThread):
     
     def run(self):
         try:
+            import requests  # only loaded when an update is checked
             response = requests.get(UPDATE_JSON_URL, timeout=5)
             response.raise_for_status()
             remote_version = response.json()
@@ -58,6 +58,7 @@ class AppUpdater(QThread):
     
     def run(self):
         try:
+            import requests
             response = requests.get(self.download_url, stream=True, timeout=30)
             response.raise_for_status()
             